@@ -11,12 +11,19 @@
     |>  https://danieldusek.com
 """
 import os
-import sys
-import importlib
+import json
+import random
+import argparse
+import contextlib
 import core.config as cfg
 from core import utils 
+from core import exporter
+from core import constants as Consts
+from core.context import RunContext
 from core.helpers import PresentationHelper
 from core.module_loader import ModuleLoader
+from core.runner import ModuleRunner
+from concurrent.futures import ProcessPoolExecutor
 from debugger import DEBUG
 
 DBG = DEBUG(DEBUG_ENABLED=True)
@@ -24,116 +31,292 @@ dprint = DBG.dprint
 fprint = DBG.fprint
 
 MODULES_FOLDER = "modules"
-cfg.CURRENT_RUN_ID = utils.generate_run_id()
-utils.prepare_tool_environment(cfg.CURRENT_RUN_ID)
-
-# FUTURE: Think about the way I am retrieving the target and remove default WP
-if len(sys.argv) >= 2:
-    run_target = sys.argv[1]
-else:
-    dprint(" [!] Target URL was not specified. The tool will run against danieldusek.com")
-    dprint(" [!] Pass the target application's URL as the first parameter (python ReconJay.py https://target.url)")
-    run_target = "https://danieldusek.com"
-
-# 1 - Discover modules
-
-ML = ModuleLoader(MODULES_FOLDER)
-options = ML.load_module_options()
-instantiated_modules = ML.discover_modules()
-DBG.discovered_modules()
-
-# 2 - Classify modules by their ability to be run
-
-independent, satisfiable, nonrunnable = ML.classify_modules(instantiated_modules)
-DBG.classified_modules(independent, satisfiable, nonrunnable)
-
-# 3 - Run independent modules and store run outputs
-
-modules_done = {}
-module_results = {}
-
-for module_name, instance in independent.items():
-    
-    physical_artifacts = instance.leaves_physical_artifacts()
-    if physical_artifacts:
-        utils.prepare_module_folder(module_name)
-
-    if module_name in options:
-        instance.set_options(options[module_name])
-
-    exit_flag = instance.execute(run_target)
-    results = instance.get_results()
-    
-    module_results[module_name] = {
-        "exit_flag": exit_flag,
-        "results": results,
-        "left_physical_artifacts": physical_artifacts
+
+
+def parse_arguments():
+    """Parses command line arguments of the tool."""
+    parser = argparse.ArgumentParser(description="ReconJay - web application penetration testing automation.")
+    parser.add_argument("target", nargs="?", help="URL of the target application")
+    parser.add_argument("--targets", metavar="FILE",
+        help="scan every target listed in the file (one URL per line, # comments)")
+    parser.add_argument("--concurrency", type=int, default=4,
+        help="number of targets scanned at the same time with --targets (default: 4)")
+    parser.add_argument("--export", action="append", choices=exporter.EXPORT_FORMATS, default=[],
+        help="export results of modules into output/<run id>/results.<format> (can be repeated)")
+    parser.add_argument("--no-html", action="store_true", 
+        help="do not render the report (for headless runs, use with --export)")
+    parser.add_argument("--modules", action="append", default=[], metavar="NAMES",
+        help="run only these modules (comma separated) and modules they depend on")
+    parser.add_argument("--skip", action="append", default=[], metavar="NAMES",
+        help="do not run these modules (comma separated)")
+    arguments = parser.parse_args()
+
+    if arguments.target and arguments.targets:
+        parser.error("pass either a single target or --targets file, not both")
+
+    available_modules = ModuleLoader(MODULES_FOLDER).discover_modules(do_not_import=True)
+    for option in ["modules", "skip"]:
+        names = [n.strip() for v in getattr(arguments, option) for n in v.split(',') if n.strip()]
+        unknown = [n for n in names if n not in available_modules]
+        if unknown:
+            parser.error("unknown modules in --%s: %s (available: %s)" % (
+                option, ', '.join(unknown), ', '.join(available_modules)
+            ))
+        setattr(arguments, option, names)
+    return arguments
+
+
+def select_modules(arguments):
+    """
+    Returns names of modules selected by --modules/--skip together with
+    their dependencies (None when all modules are to be run).
+    """
+    if not arguments.modules and not arguments.skip:
+        return None
+
+    selected = ModuleLoader(MODULES_FOLDER).select_modules(arguments.modules, arguments.skip)
+    dprint(" [I] Selected modules: %s" % ', '.join(selected))
+    return selected
+
+
+def run_modules(ML, run_context, exporters, modules=None):
+    """
+    Runs discovered modules (only 'modules' when given, others are not even
+    imported) against the target of the run. Every module is started once
+    modules it depends on finish (see ModuleRunner). Returns tuple of 
+    (modules done, module results, modules that could not be run).
+    """
+    # 1 - Discover modules
+
+    instantiated_modules = ML.discover_modules(selected=modules)
+    DBG.discovered_modules()
+
+    # 2 - Classify modules by their ability to be run
+
+    independent, satisfiable, nonrunnable = ML.classify_modules(instantiated_modules)
+    DBG.classified_modules(independent, satisfiable, nonrunnable)
+
+    # 3 - Run modules on a single event loop (asynchronous modules on the 
+    # loop itself, synchronous ones in a thread pool) and store run outputs
+
+    runner = ModuleRunner(run_context, exporters)
+    modules_done, module_results, unrunnable, failed = runner.run(independent, satisfiable)
+    dprint(" [I] Module run finished.")
+
+    # 4 - Modules left are waiting for each other or for a module that never ran.
+    for module_name in unrunnable:
+        dprint(" [W] Some modules can not be run. Dependency is not present in module_results.")
+        dprint("\t %s -> %s" % (module_name, [d["depends_on"] for d in satisfiable[module_name].get_dependencies()]))
+        nonrunnable[module_name] = "Circular or non-existent dependency."
+
+    # Modules that failed (or whose essential dependency failed) are not
+    # presented in the report.
+    nonrunnable.update(failed)
+
+    ML.show_module_loading_errors(nonrunnable)
+    return (modules_done, module_results, nonrunnable)
+
+
+def get_presentation_options(options):
+    """Returns presenting parameters (report options from /GLOBAL/ options)."""
+    global_options = options.get("/GLOBAL/", {})
+    return {
+        "show_module_description": True,
+        "split_report": global_options.get("SPLIT_REPORT") in [True, "True"],
+        "page_rows": global_options.get("REPORT_PAGE_ROWS", 1000),
+        "max_pages": global_options.get("REPORT_MAX_PAGES", 50)
+    }
+
+
+def render_report(modules_done, module_results, run_context):
+    """Composes report out of presenters' output. Returns path to report."""
+    # 5 - Compose OSINT Report and other output artifacts from modules
+    report_name = "Vulnerability Report (%s)" % (run_context.run_id)
+    PH = PresentationHelper(report_name, run_context)
+    PH.set_options(get_presentation_options(run_context.options))
+    report_type = "BWFormal"
+    for module_name, instance in modules_done.items():
+        fprint(" [I] Calling presenter on module: %s, required style: %s" % (module_name, report_type))
+        presenter = instance.get_presenter(module_results)
+        presentable = presenter.present_content(report_type)
+        PH.add_part(module_name, presentable["description"], presentable["content"], presenter.get_importance())
+
+    dprint(" [I] Result parts obtained from presenters, generating final report...")
+    return PH.generate_report(report_type, run_context.target)
+
+
+def scan_target(run_target, run_id, export_formats=(), no_html=False, modules=None):
+    """
+    Runs the whole module pipeline against a single target. Returns summary
+    of the run.
+
+    Modules get the run context through set_context(), the run is set in
+    core.config as well for modules that do not implement it.
+    """
+    cfg.CURRENT_RUN_ID = run_id
+    utils.prepare_tool_environment(run_id)
+
+    ML = ModuleLoader(MODULES_FOLDER)
+    run_context = RunContext(run_id, run_target, ML.load_module_options())
+
+    # Exporters stream results of every module as soon as the module finishes.
+    exporters = exporter.get_exporters(export_formats, run_id, run_target)
+
+    try:
+        modules_done, module_results, nonrunnable = run_modules(
+            ML, run_context, exporters, modules
+        )
+    finally:
+        for results_exporter in exporters:
+            results_exporter.close()
+    if exporters:
+        dprint(" [I] Results exported into: %s" % run_context.output_dir)
+
+    report_path = None
+    if no_html:
+        dprint(" [I] Report rendering skipped (--no-html).")
+    else:
+        report_path = render_report(modules_done, module_results, run_context)
+
+    return {
+        "target": run_target,
+        "run_id": run_id,
+        "status": "OK",
+        "modules_done": list(modules_done.keys()),
+        "nonrunnable": nonrunnable,
+        "report": report_path
     }
-    
-
-    dprint(" [I] Module %s finished and saved results." % module_name)
-    modules_done[module_name] = instance
-
-dprint(" [I] Independent run finished.")
-
-# 4 - Check and run satisfiably dependent modules
-
-try_again = True
-while try_again:
-
-    try_again = False
-
-    for module_name, instance in satisfiable.items():
-        required_dependencies = instance.get_dependencies()
-
-        can_run = True
-        for dependency in required_dependencies:
-            if dependency["depends_on"] not in module_results.keys():
-                dprint(" [W] Some modules can not be run. Dependency is not present in module_results.")
-                dprint("\t %s -> %s" % (module_name, dependency["depends_on"]))
-                nonrunnable[module_name] = "Circular or non-existent dependency."
-                can_run = False
-                break
-        
-        if can_run:
-            
-            if module_name in options:
-                instance.set_options(options[module_name])
-            
-            instance.provide_results(module_results)
-            exit_flag = instance.execute(run_target)
-            results = instance.get_results()
-            physical_artifacts = instance.leaves_physical_artifacts()
-
-            module_results[module_name] = {
-                "exit_flag": exit_flag,
-                "results": results,
-                "left_physical_artifacts": physical_artifacts
+
+
+def scan_batch_target(run_target, export_formats, no_html, modules):
+    """
+    Scans single target of the batch in a worker process. Output of the scan
+    goes into the run's console.log instead of the shared console.
+    """
+    # Forked workers inherit state of the parent's generator, without
+    # reseeding they would share run IDs and canaries.
+    random.seed()
+    run_id = utils.generate_run_id()
+    utils.prepare_tool_environment(run_id)
+
+    console_log = os.path.join("output", run_id, "console.log")
+    with open(console_log, 'a') as f, contextlib.redirect_stdout(f):
+        try:
+            return scan_target(run_target, run_id, export_formats, no_html, modules)
+        except Exception as e:
+            print(" [ERROR] Scan of %s failed: %s" % (run_target, repr(e)))
+            return {
+                "target": run_target,
+                "run_id": run_id,
+                "status": "KO",
+                "error": repr(e),
+                "modules_done": [],
+                "nonrunnable": {},
+                "report": None
             }
 
-            modules_done[module_name] = instance
-
-            try_again = True
-    
-    # Remove modules that were already run (their result is recorded in module_results)
-    for module_name in module_results.keys():
-        satisfiable.pop(module_name, None)
-
-ML.show_module_loading_errors(nonrunnable)
-
-# 5 - Compose OSINT Report and other output artifacts from modules
-report_name = "Vulnerability Report (%s)" % (cfg.CURRENT_RUN_ID)
-PH = PresentationHelper(report_name)
-presentation_options = {
-    "show_module_description": True
-}
-PH.set_options(presentation_options)
-report_type = "BWFormal"
-for module_name, instance in modules_done.items():
-    fprint(" [I] Calling presenter on module: %s, required style: %s" % (module_name, report_type))
-    presenter = instance.get_presenter(module_results)
-    presentable = presenter.present_content(report_type)
-    PH.add_part(module_name, presentable["description"], presentable["content"], presenter.get_importance())
-
-dprint(" [I] Result parts obtained from presenters, generating final report...")
-PH.generate_report(report_type, run_target)
\ No newline at end of file
+
+def load_targets(file_name):
+    """Reads targets from the file (one per line, empty lines and comments skipped)."""
+    targets = []
+    with open(file_name, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and line not in targets:
+                targets.append(line)
+    return targets
+
+
+def scan_batch(targets, concurrency, export_formats=(), no_html=False, modules=None):
+    """
+    Scans all targets, each one in a separate worker process with its own 
+    run, at most 'concurrency' of them at the same time. Summary of the batch
+    is written (as targets finish) into output/<batch id>/summary.jsonl and
+    rendered into a summary index report.
+    """
+    cfg.CURRENT_RUN_ID = "BATCH_" + utils.generate_run_id()
+    utils.prepare_tool_environment(cfg.CURRENT_RUN_ID)
+    summary_path = os.path.join("output", cfg.CURRENT_RUN_ID, "summary.jsonl")
+    dprint(" [I] Scanning %s targets (%s at a time), batch %s." % (
+        len(targets), concurrency, cfg.CURRENT_RUN_ID
+    ))
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max(concurrency, 1)) as executor, \
+        open(summary_path, 'w') as summary_file:
+        futures = [
+            executor.submit(scan_batch_target, target, export_formats, no_html, modules)
+            for target in targets
+        ]
+        for target, future in zip(targets, futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                summary = {"target": target, "run_id": None, "status": "KO",
+                    "error": repr(e), "modules_done": [], "nonrunnable": {},
+                    "report": None}
+            summary_file.write(json.dumps(summary) + '\n')
+            summary_file.flush()
+            summaries.append(summary)
+            dprint(" [I] %s: %s (%s)" % (summary["status"], target, summary["run_id"]))
+
+    PH = PresentationHelper("Batch Summary (%s)" % cfg.CURRENT_RUN_ID,
+        RunContext(cfg.CURRENT_RUN_ID)
+    )
+    PH.set_options({"show_module_description": True})
+    PH.add_part("Batch", "<p>Scanned %s targets, %s of them failed.</p>" % (
+        len(summaries), len([x for x in summaries if x["status"] != "OK"])
+    ), get_batch_summary_table(summaries), 0)
+    PH.generate_report("BWFormal", "%s targets" % len(targets))
+
+
+def get_batch_summary_table(summaries):
+    """Yields summary table of the batch (links lead to reports of targets)."""
+    yield """
+    <table>
+    <tr>
+        <th>Target</th>
+        <th>Run</th>
+        <th>Status</th>
+        <th>Modules run</th>
+        <th>Not run</th>
+    </tr>
+    """
+    for summary in summaries:
+        run = utils.encode_for_html(summary["run_id"] or Consts.EMPTY_STRING)
+        if summary["report"]:
+            run = '<a href="%s">%s</a>' % (
+                os.path.relpath(summary["report"], "reports").replace(os.sep, '/'), run
+            )
+        yield "<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>" % (
+            utils.encode_for_html(summary["target"]),
+            run,
+            utils.encode_for_html(summary.get("error", summary["status"])),
+            len(summary["modules_done"]),
+            utils.encode_for_html(', '.join(summary["nonrunnable"]))
+        )
+    yield "</table>"
+
+
+def main():
+    arguments = parse_arguments()
+
+    if arguments.targets:
+        scan_batch(load_targets(arguments.targets), arguments.concurrency,
+            arguments.export, arguments.no_html, select_modules(arguments))
+        return
+
+    # FUTURE: Think about the way I am retrieving the target and remove default WP
+    if arguments.target:
+        run_target = arguments.target
+    else:
+        dprint(" [!] Target URL was not specified. The tool will run against danieldusek.com")
+        dprint(" [!] Pass the target application's URL as the first parameter (python ReconJay.py https://target.url)")
+        run_target = "https://danieldusek.com"
+
+    scan_target(run_target, utils.generate_run_id(), arguments.export, 
+        arguments.no_html, select_modules(arguments))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+    |>  This software is a part of the master thesis:
+    |>  "Web Application Penetration Testing Automation"
+    |>  Brno, University of Technology, 2019
+    |
+    |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+    |>  Contact: dusekdan@gmail.com
+    |>  https://danieldusek.com
+"""
+import asyncio
+import functools
+import threading
+import requests
+from time import sleep, monotonic
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.packages.urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:
+    # Optional, AsyncHTTPClient falls back to a thread pool without it.
+    aiohttp = None
+
+
+def set_form_fields(method, fields, enctype, kwargs):
+    """
+    Puts form fields into request keyword arguments (query string of GET
+    requests, JSON or form data body of the others). Returns the method.
+    """
+    method = method.upper()
+    if method == "GET":
+        kwargs["params"] = fields
+    elif enctype == "application/json":
+        kwargs["json"] = fields
+    else:
+        kwargs["data"] = fields
+    return method
+
+
+class RateLimiter():
+    """
+    Spaces out requests sent to the same host. No matter how many workers
+    send requests concurrently, a new request against a host is started at
+    most once per 'delay' seconds.
+    """
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+
+    def reserve(self, host, delay=None):
+        """
+        Reserves the caller's turn to send request to host. Returns number of
+        seconds the caller has to wait for its turn.
+        """
+        if delay is None:
+            delay = self.delay
+
+        with self.lock:
+            now = monotonic()
+            slot = max(self.next_slot.get(host, now), now)
+            self.next_slot[host] = slot + delay
+
+        return slot - now
+
+
+    def wait(self, host, delay=None):
+        """Blocks until it is the caller's turn to send request to host."""
+        wait_for = self.reserve(host, delay)
+        if wait_for > 0:
+            sleep(wait_for)
+
+
+class HTTPClient():
+    """
+    Pooled HTTP client with retries that is shared by the modules. Keeps
+    connections to the target alive between requests and lets all requests
+    pass through a single per-host rate limiter, so modules can send their
+    requests from multiple threads without hammering the target.
+    """
+
+    def __init__(self, delay=0.1, pool_size=32, retries=5,
+        backoff_factor=0.3, status_forcelist=(500,502,503,504), timeout=30):
+
+        self.limiter = RateLimiter(delay)
+        self.timeout = timeout
+
+        retry = Retry(
+            total= retries, read = retries, connect = retries,
+            backoff_factor = backoff_factor, status_forcelist = status_forcelist,
+            raise_on_status = False
+        )
+        self.session = self.create_session(pool_size, retry)
+
+        # Requests whose failure is the answer (e.g. probes of the target 
+        # limits) are sent only once.
+        self.single_try_session = self.create_session(pool_size, 0)
+
+
+    def create_session(self, pool_size, max_retries):
+        """Creates session with connection pool of given size and retries."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections = pool_size, pool_maxsize = pool_size,
+            max_retries = max_retries
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
+    def request(self, method, url, delay=None, retry=True, **kwargs):
+        """
+        Sends request once the rate limiter allows it. Optional 'delay'
+        overrides the default per-host delay for this request, with 'retry'
+        set to False the request is not retried on failures.
+        """
+        self.limiter.wait(urlparse(url).netloc, delay)
+        kwargs.setdefault("timeout", self.timeout)
+        if retry:
+            return self.session.request(method, url, **kwargs)
+        return self.single_try_session.request(method, url, **kwargs)
+
+
+    def get(self, url, **kwargs):
+        """Sends GET request through the pooled session."""
+        return self.request("GET", url, **kwargs)
+
+
+    def head(self, url, **kwargs):
+        """Sends HEAD request through the pooled session."""
+        return self.request("HEAD", url, **kwargs)
+
+
+    def get_prefix(self, url, limit, **kwargs):
+        """
+        Sends streamed GET request and downloads at most 'limit' bytes of the
+        body (none for limit=0). The connection is closed right after, so 
+        large bodies are never transferred as a whole.
+        """
+        kwargs["stream"] = True
+        r = self.request("GET", url, **kwargs)
+        try:
+            content = b''
+            if limit > 0:
+                for chunk in r.iter_content(chunk_size=min(limit, 8192)):
+                    content += chunk
+                    if len(content) >= limit:
+                        break
+            r._content = content[:limit]
+        finally:
+            r.close()
+        return r
+
+
+    def post(self, url, **kwargs):
+        """Sends POST request through the pooled session."""
+        return self.request("POST", url, **kwargs)
+
+
+    def submit(self, method, url, fields, enctype=None, **kwargs):
+        """
+        Submits fields the way a form would. Fields of GET requests are sent
+        in the query string, fields of other requests in the body - encoded
+        as JSON for 'application/json' enctype, as form data otherwise.
+        """
+        method = set_form_fields(method, fields, enctype, kwargs)
+        return self.request(method, url, **kwargs)
+
+
+class AsyncHTTPClient():
+    """
+    Asynchronous counterpart of HTTPClient for modules implementing
+    execute_async(). Requests are sent with aiohttp when it is installed,
+    otherwise the synchronous client sends them from a thread pool. Either
+    way, at most 'concurrency' requests are in flight, they pass through the
+    rate limiter of the synchronous client (shared with modules running
+    synchronously) and requests.Response objects are returned, failures are
+    raised as requests exceptions - module code is the same for both. Like
+    HTTPClient, aiohttp requests are retried on errors and on responses with
+    status in 'status_forcelist'.
+    """
+
+    def __init__(self, http_client=None, concurrency=64, retries=5,
+        backoff_factor=0.3, status_forcelist=(500,502,503,504)):
+
+        self.sync_client = http_client or get_client()
+        self.limiter = self.sync_client.limiter
+        self.timeout = self.sync_client.timeout
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+
+        # Created in the event loop on the first request.
+        self.semaphore = None
+        self.session = None
+        self.executor = None
+
+
+    def uses_aiohttp(self):
+        """Are requests sent by aiohttp (and not from a thread pool)?"""
+        return aiohttp is not None
+
+
+    async def request(self, method, url, delay=None, retry=True, **kwargs):
+        """
+        Sends request once the rate limiter allows it. Accepts the same 
+        keyword arguments as HTTPClient.request (retry, params, data, json,
+        headers, allow_redirects, timeout).
+        """
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self.semaphore:
+            if not self.uses_aiohttp():
+                return await self.request_in_thread(method, url, delay, 
+                    retry=retry, **kwargs)
+
+            retries = self.retries if retry else 0
+            for attempt in range(retries + 1):
+                wait_for = self.limiter.reserve(urlparse(url).netloc, delay)
+                if wait_for > 0:
+                    await asyncio.sleep(wait_for)
+                try:
+                    response = await self.request_with_aiohttp(method, url, **kwargs)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == retries:
+                        raise requests.exceptions.ConnectionError(repr(e))
+                else:
+                    # Response of the last attempt is returned whatever its
+                    # status is (as HTTPClient does).
+                    if (response.status_code not in self.status_forcelist
+                        or attempt == retries):
+                        return response
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+
+    async def request_in_thread(self, method, url, delay, **kwargs):
+        """Sends request by the synchronous client from a thread pool."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(
+                self.sync_client.request, method, url, delay=delay, **kwargs
+            )
+        )
+
+
+    async def request_with_aiohttp(self, method, url, **kwargs):
+        """Sends request by aiohttp and converts it to requests.Response."""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency)
+            )
+        timeout = kwargs.pop("timeout", self.timeout)
+        async with self.session.request(method, url, 
+            timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as r:
+
+            response = requests.Response()
+            response.status_code = r.status
+            response.reason = r.reason
+            response.headers = CaseInsensitiveDict(r.headers)
+            response.url = str(r.url)
+            response.encoding = r.charset
+            response._content = await r.read()
+            return response
+
+
+    async def get(self, url, **kwargs):
+        """Sends GET request."""
+        return await self.request("GET", url, **kwargs)
+
+
+    async def post(self, url, **kwargs):
+        """Sends POST request."""
+        return await self.request("POST", url, **kwargs)
+
+
+    async def submit(self, method, url, fields, enctype=None, **kwargs):
+        """Submits fields the way a form would (see HTTPClient.submit)."""
+        method = set_form_fields(method, fields, enctype, kwargs)
+        return await self.request(method, url, **kwargs)
+
+
+    async def close(self):
+        """Closes the aiohttp session and the thread pool (when created)."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns HTTP client shared by all modules run in this process."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HTTPClient()
+        return _shared_client
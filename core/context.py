@@ -0,0 +1,81 @@
+"""
+    |>  This software is a part of the master thesis:
+    |>  "Web Application Penetration Testing Automation"
+    |>  Brno, University of Technology, 2019
+    |
+    |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+    |>  Contact: dusekdan@gmail.com
+    |>  https://danieldusek.com
+"""
+import os
+import threading
+import core.config as cfg
+from core import client
+
+
+class RunContext():
+    """
+    State of a single run: run ID, target, output and report paths, HTTP
+    client, run log and options of modules. Modules given a run context
+    (optional set_context() module API) use it instead of the global
+    core.config.CURRENT_RUN_ID, so multiple runs can share one process.
+    """
+
+    def __init__(self, run_id, target=None, options=None, http_client=None):
+        self.run_id = run_id
+        self.target = target
+        self.options = options or {}
+        self.client = http_client or client.get_client()
+
+        # Asynchronous client (core.client.AsyncHTTPClient) for modules
+        # implementing execute_async(), set by ModuleRunner while it runs.
+        self.async_client = None
+
+        self.output_dir = os.path.join("output", run_id)
+        self.log_file = os.path.join(".", "output", run_id, "run.log")
+        self.log_lock = threading.Lock()
+
+
+    def module_dir(self, module_name):
+        """Returns output folder of the module (output/<run id>/<module>)."""
+        return os.path.join(self.output_dir, module_name)
+
+
+    def report_path(self, extension):
+        """Returns path to the single file report (reports/<run id><ext>)."""
+        return os.path.join("reports", self.run_id + extension)
+
+
+    def report_dir(self):
+        """Returns folder of the split report (reports/<run id>)."""
+        return os.path.join("reports", self.run_id)
+
+
+    def get_module_options(self, module_name):
+        """Returns options of the module (empty when there are none)."""
+        return self.options.get(module_name, {})
+
+
+    def log(self, string):
+        """Writes line into run.log of the run."""
+        try:
+            with self.log_lock, open(self.log_file, 'a') as f:
+                f.write(string + '\n')
+        except IOError:
+            print("[DBG-ERROR] Unable to write to file: %s" % self.log_file)
+
+
+_config_context = None
+
+
+def get_context(run_context=None):
+    """
+    Returns given run context. Without one (modules not given a context),
+    returns context of the run set in core.config.CURRENT_RUN_ID.
+    """
+    global _config_context
+    if run_context is not None:
+        return run_context
+    if _config_context is None or _config_context.run_id != cfg.CURRENT_RUN_ID:
+        _config_context = RunContext(cfg.CURRENT_RUN_ID)
+    return _config_context
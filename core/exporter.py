@@ -0,0 +1,199 @@
+"""
+    |>  This software is a part of the master thesis:
+    |>  "Web Application Penetration Testing Automation"
+    |>  Brno, University of Technology, 2019
+    |
+    |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+    |>  Contact: dusekdan@gmail.com
+    |>  https://danieldusek.com
+
+    Machine-readable export of module results. Results of every module are
+    exported as soon as the module finishes, split into records:
+
+        run     - run_id, target
+        module  - run_id, module, exit_flag, left_physical_artifacts
+        result  - run_id, module, section ('parsable'|'nonparsable'),
+                  collection (path of keys leading to the item, list indexes
+                  left out), key (dict key or list index of the item),
+                  data (the item itself, JSON)
+
+    Results are split into items recursively: lists and dictionaries that
+    only hold other lists and dictionaries are expanded, anything else (a
+    scalar, or a dictionary with at least one scalar value, e.g. a single
+    finding) is an item. E.g. every crawled URL of SiteCopier is a single
+    item in 'anyProcessor/crawledUrls' collection.
+"""
+import os
+import json
+import sqlite3
+
+EXPORT_FORMATS = ["jsonl", "sqlite"]
+
+
+def is_item(value):
+    """
+    Returns True for values that are not expanded any further: scalars and
+    dictionaries with at least one scalar value.
+    """
+    if isinstance(value, dict):
+        return any([not isinstance(x, (list, tuple, dict)) for x in value.values()])
+    return not isinstance(value, (list, tuple))
+
+
+def iter_items(value, collection=(), key=None):
+    """Yields (collection, key, item) for all items of the results section."""
+    if is_item(value):
+        yield ('/'.join(collection), key, value)
+    elif isinstance(value, dict):
+        for child_key, child in value.items():
+            child_collection = collection
+            if not is_item(child):
+                child_collection = collection + (str(child_key),)
+            yield from iter_items(child, child_collection, child_key)
+    else:
+        for index, child in enumerate(value):
+            yield from iter_items(child, collection, index)
+
+
+def iter_result_records(run_id, module_name, module_result):
+    """Yields result records of a single module run."""
+    results = module_result["results"]
+    if not isinstance(results, dict):
+        results = {"nonparsable": results}
+
+    for section in ["parsable", "nonparsable"]:
+        for collection, key, item in iter_items(results.get(section, {})):
+            yield {
+                "run_id": run_id,
+                "module": module_name,
+                "section": section,
+                "collection": collection,
+                "key": None if key is None else str(key),
+                "data": item
+            }
+
+
+def to_json(value):
+    """Serializes value, anything JSON does not know is turned to string."""
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+class JSONLExporter():
+    """
+    Streams records into a JSON Lines file, one record per line. Every line
+    has a 'record' property ('run', 'module' or 'result').
+    """
+
+    def __init__(self, path, run_id, target):
+        self.run_id = run_id
+        self.file = open(path, 'w', encoding='utf-8')
+        self.write({"record": "run", "run_id": run_id, "target": target})
+
+
+    def write(self, record):
+        """Writes a single record as one line."""
+        self.file.write(to_json(record) + '\n')
+
+
+    def export(self, module_name, module_result):
+        """Writes module record and all the result records of the module."""
+        self.write({
+            "record": "module",
+            "run_id": self.run_id,
+            "module": module_name,
+            "exit_flag": module_result["exit_flag"],
+            "left_physical_artifacts": module_result["left_physical_artifacts"]
+        })
+        for record in iter_result_records(self.run_id, module_name, module_result):
+            record["record"] = "result"
+            self.write(record)
+        self.file.flush()
+
+
+    def close(self):
+        """Closes the exported file."""
+        self.file.close()
+
+
+class SQLiteExporter():
+    """
+    Streams records into a SQLite database (tables 'runs', 'modules' and
+    'results'). Results are indexed by module and collection, and by key.
+    Item data are stored as JSON text, so they can be queried with SQLite
+    JSON functions.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            target TEXT
+        );
+        CREATE TABLE IF NOT EXISTS modules (
+            run_id TEXT,
+            module TEXT,
+            exit_flag TEXT,
+            left_physical_artifacts INTEGER,
+            PRIMARY KEY (run_id, module)
+        );
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY,
+            run_id TEXT,
+            module TEXT,
+            section TEXT,
+            collection TEXT,
+            key TEXT,
+            data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS results_collection
+            ON results (run_id, module, collection);
+        CREATE INDEX IF NOT EXISTS results_key ON results (key);
+    """
+
+
+    def __init__(self, path, run_id, target):
+        self.run_id = run_id
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.SCHEMA)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?)", (run_id, target)
+        )
+        self.connection.commit()
+
+
+    def export(self, module_name, module_result):
+        """Inserts module record and all result records of the module."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO modules VALUES (?, ?, ?, ?)", (
+                self.run_id, module_name,
+                None if module_result["exit_flag"] is None
+                    else str(module_result["exit_flag"]),
+                int(bool(module_result["left_physical_artifacts"]))
+            )
+        )
+        self.connection.executemany(
+            "INSERT INTO results (run_id, module, section, collection, key, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)", (
+                (r["run_id"], r["module"], r["section"], r["collection"],
+                r["key"], to_json(r["data"]))
+                for r in iter_result_records(self.run_id, module_name, module_result)
+            )
+        )
+        self.connection.commit()
+
+
+    def close(self):
+        """Closes the database."""
+        self.connection.close()
+
+
+def get_exporters(formats, run_id, target):
+    """
+    Creates exporters for requested formats, writing into the run's output
+    folder (output/<run_id>/results.jsonl, output/<run_id>/results.sqlite).
+    """
+    classes = {"jsonl": JSONLExporter, "sqlite": SQLiteExporter}
+    exporters = []
+    for export_format in sorted(set(formats)):
+        path = os.path.join("output", run_id, "results.%s" % export_format)
+        exporters.append(classes[export_format](path, run_id, target))
+    return exporters
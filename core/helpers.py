@@ -8,9 +8,10 @@
     |>  https://danieldusek.com
 """
 import os
+import re
 import core.utils as utils
 from core import constants as Consts
-from core import config as cfg
+from core import context
 from urllib.parse import urlparse, urljoin, parse_qs, parse_qsl
 from requests.models import PreparedRequest
 from collections import OrderedDict
@@ -23,11 +24,21 @@ class PresentationHelper():
     application output.
     """
 
-    def __init__(self, report_title):
+    WILDCARD_PATTERN = re.compile(r"\{([A-Z_]+)\}")
+    WRITE_BUFFER_SIZE = 1024 * 1024
+
+    # Templates split into segments (shared cache, see compile_template).
+    compiled_templates = {}
+
+
+    def __init__(self, report_title, run_context=None):
 
         """Displayed in title-tag/document name"""
         self.report_title = report_title
 
+        """Run the report is generated for (names report files)."""
+        self.run_context = context.get_context(run_context)
+
         """Relative address from root to libs directory (platform independent)"""
         self.path_to_libs = os.path.join("core", "presentation", "libs")
         
@@ -46,6 +57,9 @@ class PresentationHelper():
         """Accumulates output from presenters before it is rendered."""
         self.parts = {}
 
+        """Presenting parameters (see set_options)."""
+        self.options = {}
+
         pass
 
 
@@ -57,7 +71,9 @@ class PresentationHelper():
     def add_part(self, module, description, content, importance):
         """
         Adds information about report part (outputs from module execution) into
-        the internal structure.
+        the internal structure. Content is either a string, or an iterable of
+        string fragments that is consumed only when the report is written.
+        Split report accepts only the iterable.
         """
         self.parts[module] = {
             "description": description,
@@ -66,31 +82,102 @@ class PresentationHelper():
         }
 
 
-    def replace_template_wildcards(self, template, title, parts, target):
-        """Replaces template wildards with their respective contents."""
-        return template.replace(
-            '{REPORT_TITLE}', title
-            ).replace(
-                '{PARTS}', parts
-            ).replace(
-                '{REPORT_TARGET}', utils.encode_for_html(target)
-            )
+    def compile_template(self, path):
+        """
+        Splits template into literal segments and wildcard names, so it can
+        be written out without any string replacing. Templates are compiled
+        only once and cached. Returns list of (is_wildcard, text) segments.
+        """
+        if path in self.compiled_templates:
+            return self.compiled_templates[path]
 
+        with open(path, 'r', encoding='utf-8') as t:
+            template = t.read()
 
-    def replace_part_wildcards(self, part, title, description, part_output):
-        """Replaces part template wildcards with their respective contents."""
+        segments = []
+        position = 0
+        for wildcard in self.WILDCARD_PATTERN.finditer(template):
+            segments.append((False, template[position:wildcard.start()]))
+            segments.append((True, wildcard.group(1)))
+            position = wildcard.end()
+        segments.append((False, template[position:]))
 
-        if "show_module_description" in self.options:
-            if not self.options["show_module_description"]:
-                description = Consts.EMPTY_STRING
+        self.compiled_templates[path] = [x for x in segments if x[1]]
+        return self.compiled_templates[path]
+
+
+    def write_template(self, f, segments, values):
+        """
+        Writes compiled template into the file. Wildcard values are either
+        strings, iterables of string fragments (written one by one, as they
+        are produced) or callables writing the value into the file on their
+        own. Unknown wildcards are written as they are.
+        """
+        for is_wildcard, text in segments:
+            if not is_wildcard:
+                f.write(text)
+            elif text not in values:
+                f.write('{%s}' % text)
+            elif isinstance(values[text], str):
+                f.write(values[text])
+            elif callable(values[text]):
+                values[text](f)
+            else:
+                self.write_fragments(f, values[text])
+
+
+    def write_fragments(self, f, fragments):
+        """
+        Writes fragments into the file. Fragments that are not strings (e.g.
+        PagedTable) are iterables of fragments themselves.
+        """
+        for fragment in fragments:
+            if isinstance(fragment, str):
+                f.write(fragment)
+            else:
+                self.write_fragments(f, fragment)
 
-        return part.replace(
-            '{PART_TITLE}', title
-        ).replace(
-            '{PART_DESCRIPTION}', description
-        ).replace(
-            '{PART_CONTENT}', part_output
-        )
+
+    def split_template(self, segments, wildcard):
+        """Splits compiled template into segments before and after wildcard."""
+        for index, (is_wildcard, text) in enumerate(segments):
+            if is_wildcard and text == wildcard:
+                return (segments[:index], segments[index + 1:])
+        return (segments, [])
+
+
+    def get_ordered_parts(self):
+        """Returns names of modules ordered by importance of their parts."""
+        importances = {}
+        for module_name, part_record in self.parts.items():
+            importances.setdefault(part_record["importance"], []).append(module_name)
+
+        ordered = []
+        for _, module_names in utils.sort_dict_by_key(
+            importances, reverse=True).items():
+            ordered += module_names
+        return ordered
+
+
+    def get_part_description(self, part_record):
+        """Returns description of the part, unless descriptions are hidden."""
+        if self.options.get("show_module_description", True):
+            return part_record["description"]
+        return Consts.EMPTY_STRING
+
+
+    def render_parts(self, f, part_segments):
+        """
+        Writes parts into the file, ordered by importance as reported by the
+        module.
+        """
+        for module_name in self.get_ordered_parts():
+            part_record = self.parts[module_name]
+            self.write_template(f, part_segments, {
+                "PART_TITLE": module_name,
+                "PART_DESCRIPTION": self.get_part_description(part_record),
+                "PART_CONTENT": part_record["content"]
+            })
 
 
     def generate_report(self, style_type, target):
@@ -98,6 +185,16 @@ class PresentationHelper():
         Generates report in output format as specified by 'style_type' 
         parameter. At the moment HTML only.
 
+        Report is streamed into the file: templates are written segment by
+        segment and content of the parts fragment by fragment, as presenters
+        produce it, through a buffered writer.
+
+        With 'split_report' option, HTML report is written as an index page
+        and paginated pages of every module instead (see 
+        generate_split_report).
+
+        Returns path to the report (None when the report was not generated).
+
         FUTURE: Extend this method to be able to re-generate PDF out of HTML.
         """
 
@@ -105,42 +202,15 @@ class PresentationHelper():
             style_type = 'Plaintext'
             print(" [ERROR] Requested template is not supported. Falling back to plaintext.")
 
-        # Standard processing path for HTML templates, load it, replace it,
-        # and render it.
         try:
             template_files = self.template_source[style_type]
-            with open(template_files["main"], 'r', encoding='utf-8') as t:
-                template = t.read()
-            with open(template_files["part"], 'r', encoding='utf-8') as p:
-                part = p.read()
-            
-            parts = {}
-            for module_name, part_record in self.parts.items():
-
-                current_part = part
-                part_output = self.replace_part_wildcards(
-                        current_part, module_name,
-                        part_record["description"], 
-                        part_record["content"]
-                )
+            template = self.compile_template(template_files["main"])
+            part = self.compile_template(template_files["part"])
 
-                if part_record["importance"] in parts:
-                    parts[part_record["importance"]].append(
-                        part_output
-                    )
-                else:
-                    parts[part_record["importance"]] = [part_output]
-
-            # Go through the parts output and craft value for {PARTS}, ordered
-            # by importance as reported by the module.
-            parts_render = Consts.EMPTY_STRING
-            for _, to_render in utils.sort_dict_by_key(
-                parts, reverse=True).items():
-                for render_part in to_render:
-                    parts_render += render_part
-            
-            final_report = self.replace_template_wildcards(template, 
-            self.report_title, parts_render, target)
+            if self.options.get("split_report"):
+                if style_type == 'BWFormal':
+                    return self.generate_split_report(template, part, target)
+                print(" [W] Split report is only supported for HTML templates. Generating a single file.")
 
             if style_type == 'BWFormal':
                 extension = '.htm'
@@ -148,11 +218,18 @@ class PresentationHelper():
                 # Default to plain-text.
                 extension = '.txt'
 
-            report_path = os.path.join("reports", cfg.CURRENT_RUN_ID + extension)
-            with open(report_path, 'w', errors="ignore") as f:
-                f.write(final_report)
+            report_path = self.run_context.report_path(extension)
+            with open(report_path, 'w', errors="ignore", 
+                buffering=self.WRITE_BUFFER_SIZE) as f:
+                self.write_template(f, template, {
+                    "REPORT_TITLE": self.report_title,
+                    "PARTS": lambda f: self.render_parts(f, part),
+                    "REPORT_TARGET": utils.encode_for_html(target),
+                    "ROOT": "../"
+                })
 
             print(" [ALL-DONE] Review the report file in: %s " % report_path)
+            return report_path
 
         except FileNotFoundError as e:
             print(" [ERROR] Template %s improperly structured." % style_type)
@@ -160,7 +237,193 @@ class PresentationHelper():
         except IOError as e:
             print(" [ERROR] Unable to read template %s file." % style_type)
             print(e)
-            
+
+
+    def generate_split_report(self, template, part, target):
+        """
+        Generates HTML report split into multiple files in reports/<run id>
+        directory: paginated pages for every module and an index page linking
+        them. Rows of paged tables are spread over pages of at most
+        'page_rows' rows and at most 'max_pages' pages are written for each
+        module, so size of every file (and of the whole report) is bounded
+        no matter how large the results are. Returns path to the index page.
+        """
+        directory = self.run_context.report_dir()
+        os.makedirs(directory, exist_ok=True)
+
+        pages = {}
+        for module_name in self.get_ordered_parts():
+            pager = PartPager(self, directory, module_name, template, part, target)
+            pages[module_name] = pager.write_part(self.parts[module_name])
+
+        def render_index(f):
+            for module_name in self.get_ordered_parts():
+                links = ', '.join([
+                    '<a href="%s">%s</a>' % (PartPager.page_name(module_name, page), page)
+                    for page in range(1, pages[module_name] + 1)
+                ])
+                self.write_template(f, part, {
+                    "PART_TITLE": module_name,
+                    "PART_DESCRIPTION": self.get_part_description(
+                        self.parts[module_name]),
+                    "PART_CONTENT": "<p>Pages: %s</p>" % links
+                })
+
+        report_path = os.path.join(directory, "index.htm")
+        with open(report_path, 'w', errors="ignore") as f:
+            self.write_template(f, template, {
+                "REPORT_TITLE": self.report_title,
+                "PARTS": render_index,
+                "REPORT_TARGET": utils.encode_for_html(target),
+                "ROOT": "../../"
+            })
+
+        print(" [ALL-DONE] Review the report file in: %s " % report_path)
+        return report_path
+
+
+
+class PagedTable():
+    """
+    Table (or a list) in presenter output whose rows may be spread over
+    multiple pages of the split report. Header and footer are repeated on 
+    every page the rows are written on. Rows can be any iterable of strings.
+    """
+
+    def __init__(self, header, rows, footer):
+        self.header = header
+        self.rows = rows
+        self.footer = footer
+
+
+    def __iter__(self):
+        yield self.header
+        yield from self.rows
+        yield self.footer
+
+
+
+class PartPager():
+    """
+    Writes a single report part into paginated files. New page is started
+    once 'page_rows' rows of paged tables were written on the current one,
+    paged table is closed at the end of the page and reopened on the next
+    page. Rows that do not fit into 'max_pages' pages are only counted.
+    """
+
+    def __init__(self, helper, directory, module_name, template, part, target):
+        self.helper = helper
+        self.directory = directory
+        self.module_name = module_name
+        self.target = target
+        self.page_rows = max(int(helper.options.get("page_rows", 1000)), 1)
+        self.max_pages = max(int(helper.options.get("max_pages", 50)), 1)
+
+        self.template_head, self.template_tail = helper.split_template(
+            template, "PARTS")
+        self.part_head, self.part_tail = helper.split_template(
+            part, "PART_CONTENT")
+
+        self.page = 0
+        self.rows = 0
+        self.omitted_rows = 0
+        self.file = None
+
+
+    @staticmethod
+    def page_name(module_name, page):
+        """Returns file name of the module's page (numbered from 1)."""
+        return "%s-%s.htm" % (module_name, page)
+
+
+    def write_part(self, part_record):
+        """
+        Writes the part content into pages. Returns number of pages. Content
+        must be an iterable of fragments, plain string content would neither
+        be paged nor written efficiently.
+        """
+        if isinstance(part_record["content"], str):
+            raise TypeError("Content of the %s part is a string, split report "
+                "requires an iterable of fragments." % self.module_name)
+
+        self.description = self.helper.get_part_description(part_record)
+        self.open_page()
+        try:
+            for fragment in part_record["content"]:
+                if isinstance(fragment, PagedTable):
+                    self.write_table(fragment)
+                elif isinstance(fragment, str):
+                    self.file.write(fragment)
+                else:
+                    self.helper.write_fragments(self.file, fragment)
+
+            if self.omitted_rows:
+                self.file.write(
+                    "<p><em>%s more rows were omitted from the report.</em></p>"
+                    % self.omitted_rows
+                )
+        finally:
+            self.close_page(last=True)
+        return self.page
+
+
+    def write_table(self, table):
+        """Writes rows of the table, starting new pages when needed."""
+        self.file.write(table.header)
+        for row in table.rows:
+            if self.rows >= self.page_rows:
+                if self.page >= self.max_pages:
+                    self.omitted_rows += 1
+                    continue
+                self.file.write(table.footer)
+                self.close_page()
+                self.open_page()
+                self.file.write(table.header)
+
+            self.file.write(row)
+            self.rows += 1
+        self.file.write(table.footer)
+
+
+    def open_page(self):
+        """Starts the next page of the part."""
+        self.page += 1
+        self.rows = 0
+        path = os.path.join(self.directory, self.page_name(self.module_name, self.page))
+        self.file = open(path, 'w', errors="ignore", 
+            buffering=self.helper.WRITE_BUFFER_SIZE)
+
+        title = self.module_name
+        if self.page > 1:
+            title += " (page %s)" % self.page
+        self.helper.write_template(self.file, self.template_head, {
+            "REPORT_TITLE": "%s - %s" % (self.helper.report_title, title),
+            "REPORT_TARGET": utils.encode_for_html(self.target),
+            "ROOT": "../../"
+        })
+        self.helper.write_template(self.file, self.part_head, {
+            "PART_TITLE": title,
+            "PART_DESCRIPTION": self.description if self.page == 1 
+                else Consts.EMPTY_STRING
+        })
+
+
+    def close_page(self, last=False):
+        """Writes navigation and the rest of the templates, closes the page."""
+        navigation = ['<a href="index.htm">Index</a>']
+        if self.page > 1:
+            navigation.append('<a href="%s">Previous</a>' % self.page_name(
+                self.module_name, self.page - 1))
+        navigation.append("Page %s" % self.page)
+        if not last:
+            navigation.append('<a href="%s">Next</a>' % self.page_name(
+                self.module_name, self.page + 1))
+        self.file.write("<p>%s</p>" % " | ".join(navigation))
+
+        self.helper.write_template(self.file, self.part_tail, {})
+        self.helper.write_template(self.file, self.template_tail, {})
+        self.file.close()
+
 
 
 class URLHelper():
@@ -294,6 +557,21 @@ class URLHelper():
         return req.url
 
 
+    def replace_parameter_values(self, url, values):
+        """
+        Replaces values of multiple query string parameters at once. Values 
+        are provided as a dictionary of parameter names and new values.
+        """
+        parts = urlparse(url)
+        query_dict = dict(parse_qsl(parts.query, keep_blank_values=True))
+        query_dict.update(values)
+        req = PreparedRequest()
+        req.prepare_url(
+            parts.scheme + "://" + parts.netloc + parts.path, query_dict
+        )
+        return req.url
+
+
     def order_query_string_params(self, url):
         """
         Orders query string parameters alphabetically. E.g. for:
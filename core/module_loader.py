@@ -20,13 +20,14 @@ class ModuleLoader:
         self.available_dependencies = []
 
 
-    def discover_modules(self, do_not_import = False):
+    def discover_modules(self, do_not_import = False, selected = None):
         """
         Imports tool modules from the given module folder.
 
         When it is desirable to return only names of the discovered modules, 
         optional parameter do_not_import can be specified to prevent discovered
-        modules from being imported.
+        modules from being imported. When 'selected' module names are given,
+        only those modules are imported (see select_modules).
 
         Implementation was inspired by the following sources:
          |-> https://stackoverflow.com/a/301146
@@ -40,6 +41,9 @@ class ModuleLoader:
         if do_not_import:
             return discovered_modules
 
+        if selected is not None:
+            discovered_modules = [m for m in discovered_modules if m in selected]
+
         instantiated_modules = {}
         for module in discovered_modules:
             module_path = self.modules_folder + "." + module + "." + module
@@ -48,6 +52,7 @@ class ModuleLoader:
 
             instantiable = getattr(imported_module, module)
             instantiated_modules[module] = instantiable()
+            self.check_manifest(module, instantiated_modules[module])
             
             # Update internal information about dependencies that are available.
             self.available_dependencies.append(module)
@@ -55,6 +60,65 @@ class ModuleLoader:
         return instantiated_modules
 
 
+    def read_manifest(self, module_name):
+        """
+        Reads manifest of the module (<modules folder>/<module>/manifest.json)
+        without importing the module. Manifest holds module's name, short
+        description and dependencies (same structure as get_dependencies()
+        returns). Returns None when the module has no (readable) manifest.
+        """
+        manifest_file = os.path.join(self.modules_folder, module_name, "manifest.json")
+        if not os.path.exists(manifest_file):
+            return None
+        try:
+            with open(manifest_file, 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            print("[ERROR][ModuleLoader] Manifest of '%s' module is not readable." % module_name)
+            print(repr(e))
+            return None
+
+
+    def select_modules(self, selected = None, skipped = None):
+        """
+        Returns names of modules to be imported - selected modules (all the
+        discovered ones when none are selected) and modules they essentially
+        depend on, skipped modules excluded. Dependencies are resolved from
+        manifests, modules are not imported. Dependencies of modules without
+        a manifest are only known once they are imported, missing ones make
+        the module non-runnable then (see classify_modules).
+        """
+        discovered_modules = self.discover_modules(do_not_import=True)
+        skipped = skipped or []
+        queue = list(selected) if selected else list(discovered_modules)
+
+        chosen = []
+        while queue:
+            module_name = queue.pop(0)
+            if module_name in chosen or module_name in skipped or \
+                module_name not in discovered_modules:
+                continue
+            chosen.append(module_name)
+
+            manifest = self.read_manifest(module_name)
+            if manifest is None:
+                continue
+            for dependency in manifest.get("dependencies", []):
+                if dependency.get("is_essential", True):
+                    queue.append(dependency["depends_on"])
+
+        return [m for m in discovered_modules if m in chosen]
+
+
+    def check_manifest(self, module_name, instance):
+        """Warns when manifest dependencies differ from get_dependencies()."""
+        manifest = self.read_manifest(module_name)
+        if manifest is None or not hasattr(instance, "get_dependencies"):
+            return
+        if manifest.get("dependencies", []) != instance.get_dependencies():
+            print("[W][ModuleLoader] Dependencies in manifest of '%s' module differ from get_dependencies()." % module_name)
+
+
     def classify_modules(self, modules):
         """
         Classifies modules into following categories:
@@ -84,8 +148,12 @@ class ModuleLoader:
                 independent[module_name] = instance
                 continue
             
-            missing_dependencies = NO_DEPENDENCIES
+            # Only essential dependencies are required to be present, module
+            # runs without the non-essential ones.
+            missing_dependencies = []
             for dependency in current_dependencies:
+                if not dependency.get("is_essential", True):
+                    continue
                 if dependency["depends_on"] not in self.available_dependencies:
                     missing_dependencies.append(dependency["depends_on"])
             
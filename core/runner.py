@@ -0,0 +1,163 @@
+"""
+    |>  This software is a part of the master thesis:
+    |>  "Web Application Penetration Testing Automation"
+    |>  Brno, University of Technology, 2019
+    |
+    |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+    |>  Contact: dusekdan@gmail.com
+    |>  https://danieldusek.com
+"""
+import asyncio
+from core import utils
+from core.client import AsyncHTTPClient
+from concurrent.futures import ThreadPoolExecutor
+
+
+def is_async_module(instance):
+    """Does the module implement the optional execute_async(ctx) API?"""
+    return asyncio.iscoroutinefunction(getattr(instance, "execute_async", None))
+
+
+class ModuleRunner():
+    """
+    Runs modules of a single run on one event loop. Every module is started
+    as soon as the modules it depends on finish, so modules that do not
+    depend on each other run at the same time.
+
+    Modules implementing execute_async(ctx) run on the loop itself and send
+    their requests through the asynchronous client of the run context
+    (ctx.async_client). Synchronous modules (execute(target)) are run in a
+    thread pool.
+    """
+
+    def __init__(self, run_context, exporters=()):
+        self.run_context = run_context
+        self.exporters = exporters
+        self.modules_done = {}
+        self.module_results = {}
+        self.failed = {}
+
+
+    def run(self, independent, satisfiable):
+        """
+        Runs classified modules. Returns tuple of (modules done, module
+        results, modules that can not be run because of circular or
+        non-existent dependency, dictionary of failed modules and reasons).
+        """
+        planned, unrunnable = self.plan(independent, satisfiable)
+        modules = dict(independent)
+        modules.update(satisfiable)
+
+        asyncio.run(self.run_modules(
+            [(module_name, modules[module_name]) for module_name in planned],
+            list(independent.keys())
+        ))
+        return (self.modules_done, self.module_results, unrunnable, self.failed)
+
+
+    def plan(self, independent, satisfiable):
+        """
+        Orders modules so that every module follows modules it depends on.
+        Non-essential dependencies that will never run are skipped. Returns
+        tuple of (ordered module names, names of modules left waiting).
+        """
+        planned = list(independent.keys())
+        waiting = dict(satisfiable)
+
+        progress = True
+        while progress:
+            progress = False
+            for module_name, instance in list(waiting.items()):
+                can_run = True
+                for dependency in instance.get_dependencies():
+                    depends_on = dependency["depends_on"]
+                    if depends_on in planned:
+                        continue
+                    if depends_on in waiting or dependency.get("is_essential", True):
+                        can_run = False
+                        break
+
+                if can_run:
+                    planned.append(module_name)
+                    waiting.pop(module_name)
+                    progress = True
+
+        return (planned, list(waiting.keys()))
+
+
+    async def run_modules(self, modules, independent):
+        """Runs planned modules, each one once its dependencies finished."""
+        self.finished = {module_name: asyncio.Event() for module_name, _ in modules}
+        self.executor = ThreadPoolExecutor(max_workers=max(len(modules), 1))
+        self.run_context.async_client = AsyncHTTPClient(self.run_context.client)
+        try:
+            await asyncio.gather(*[
+                self.run_module(module_name, instance, module_name in independent)
+                for module_name, instance in modules
+            ])
+        finally:
+            await self.run_context.async_client.close()
+            self.run_context.async_client = None
+            self.executor.shutdown()
+
+
+    async def run_module(self, module_name, instance, is_independent):
+        """
+        Waits for the module's dependencies, runs it and stores results. 
+        Failure of the module is recorded and does not stop the other modules,
+        modules depending on it are released either way.
+        """
+        try:
+            for dependency in instance.get_dependencies():
+                depends_on = dependency["depends_on"]
+                if depends_on not in self.finished:
+                    continue
+                await self.finished[depends_on].wait()
+                if depends_on in self.failed and dependency.get("is_essential", True):
+                    self.failed[module_name] = "Essential dependency %s failed." % depends_on
+                    print(" [ERROR] Module %s skipped, %s failed." % (module_name, depends_on))
+                    return
+
+            await self.execute_module(module_name, instance, is_independent)
+        except Exception as e:
+            self.failed[module_name] = "Module failed: %s" % repr(e)
+            print(" [ERROR] Module %s failed (%s)." % (module_name, repr(e)))
+        finally:
+            self.finished[module_name].set()
+
+
+    async def execute_module(self, module_name, instance, is_independent):
+        """Runs the module (dependencies already finished), stores results."""
+        physical_artifacts = instance.leaves_physical_artifacts()
+        if is_independent and physical_artifacts:
+            utils.prepare_module_folder(module_name, self.run_context.run_id)
+
+        # Modules without the optional set_context() API use the run set in
+        # core.config instead.
+        if hasattr(instance, "set_context"):
+            instance.set_context(self.run_context)
+        if module_name in self.run_context.options:
+            instance.set_options(self.run_context.options[module_name])
+        if not is_independent:
+            instance.provide_results(self.module_results)
+
+        if is_async_module(instance):
+            exit_flag = await instance.execute_async(self.run_context)
+        else:
+            exit_flag = await asyncio.get_running_loop().run_in_executor(
+                self.executor, instance.execute, self.run_context.target
+            )
+
+        if not is_independent:
+            physical_artifacts = instance.leaves_physical_artifacts()
+
+        self.module_results[module_name] = {
+            "exit_flag": exit_flag,
+            "results": instance.get_results(),
+            "left_physical_artifacts": physical_artifacts
+        }
+        for results_exporter in self.exporters:
+            results_exporter.export(module_name, self.module_results[module_name])
+
+        print(" [I] Module %s finished and saved results." % module_name)
+        self.modules_done[module_name] = instance
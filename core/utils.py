@@ -11,9 +11,11 @@ import os, errno
 import re, string
 import cgi
 import random
+import hashlib
 import datetime
 import core.config as cfg
 from collections import OrderedDict
+from functools import lru_cache
 
 
 def generate_run_id():
@@ -38,20 +40,67 @@ def find_between_str(s, start, end):
     return s.split(start)[1].split(end)[0]
 
 
-def find_all_between_str(s, start, end):
-    """Finds all occurrences of a string between start and end strings."""
+@lru_cache(maxsize=256)
+def between_pattern(start, end):
+    """
+    Returns compiled pattern matching anything between start and end strings.
+    Separators are escaped, so they can contain regex metacharacters.
+    """
     # (.*?) - The question mark makes * non-greedy, which results in properly
     # returned matches (if it was not there, a single match between the very 
     # first separator and the very last separator would be returned.
-    matches = re.findall(start + "(.*?)" + end, s)
-    return matches
+    # Matched text never contains the start separator, so a reflection cut 
+    # before its end separator is not merged with the following one.
+    return re.compile(
+        re.escape(start) + "((?:(?!" + re.escape(start) + ").)*?)" + re.escape(end)
+    )
 
 
-def find_nth(sub, string, n):
-    """Finds n-th occurence of substring within the string."""
-    if n == 1:
-        return string.find(sub)
-    return string.find(sub, find_nth(sub, string, n - 1) + 1)
+def find_reflections(s, start, end, context_length=64):
+    """
+    Locates all reflections enclosed in start and end strings in a single
+    pass. For each returns its value, offsets of its start separator and of
+    the end of its end separator, and the text surrounding it.
+    """
+    reflections = []
+    for m in between_pattern(start, end).finditer(s):
+        reflections.append({
+            "value": m.group(1),
+            "start": m.start(),
+            "end": m.end(),
+            "before": s[max(m.start() - context_length, 0):m.start()],
+            "after": s[m.end():m.end() + context_length]
+        })
+    return reflections
+
+
+def simhash(text, bits=64):
+    """
+    Computes simhash of the text (over its words). Similar texts have hashes
+    that differ only in a few bits, see hamming_distance().
+    """
+    vector = [0] * bits
+    for word in re.findall(r"\w+", text):
+        word_hash = int.from_bytes(
+            hashlib.md5(word.encode('utf-8', errors='ignore')).digest()[:bits // 8],
+            'big'
+        )
+        for bit in range(bits):
+            if word_hash & (1 << bit):
+                vector[bit] += 1
+            else:
+                vector[bit] -= 1
+
+    fingerprint = 0
+    for bit in range(bits):
+        if vector[bit] > 0:
+            fingerprint |= (1 << bit)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    """Returns number of bits in which two integers differ."""
+    return bin(a ^ b).count('1')
 
 
 def prepare_tool_environment(run_id):
@@ -85,12 +134,13 @@ def prepare_tool_environment(run_id):
             raise
 
 
-def prepare_module_folder(module_name):
+def prepare_module_folder(module_name, run_id=None):
     """
-    Creates module folder for module with given name under /output/ directory.
+    Creates module folder for module with given name under /output/ directory
+    of the run (the run in core.config when run_id is not given).
     """
     try:
-        os.makedirs("output/%s/%s" % (cfg.CURRENT_RUN_ID, module_name))
+        os.makedirs("output/%s/%s" % (run_id or cfg.CURRENT_RUN_ID, module_name))
         print(" [I] %s module output directory created." % module_name)
     except OSError as e:
         print(" [ERROR] Unable to create output directory for %s module!" % module_name)
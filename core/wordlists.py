@@ -0,0 +1,81 @@
+"""
+    |>  This software is a part of the master thesis:
+    |>  "Web Application Penetration Testing Automation"
+    |>  Brno, University of Technology, 2019
+    |
+    |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+    |>  Contact: dusekdan@gmail.com
+    |>  https://danieldusek.com
+"""
+import os
+import random
+import threading
+from sys import intern
+
+PAYLOADS_FOLDER = "payloads"
+
+
+class Wordlist():
+    """
+    Read-only, deduplicated list of payload entries in the order of the 
+    source file. Entries are interned and stored once in a tuple, the set 
+    used for O(1) membership checks references the very same objects.
+    """
+
+    def __init__(self, entries):
+        unique = []
+        seen = set()
+        for entry in entries:
+            if entry and entry not in seen:
+                entry = intern(entry)
+                seen.add(entry)
+                unique.append(entry)
+
+        self.entries = tuple(unique)
+        self.members = frozenset(self.entries)
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+
+    def __contains__(self, entry):
+        return entry in self.members
+
+
+    def sample(self, count, rng=None):
+        """
+        Returns 'count' randomly selected entries (without replacement). 
+        Optional 'rng' (random.Random instance) makes the selection 
+        reproducible.
+        """
+        rng = rng or random
+        count = min(max(count, 0), len(self.entries))
+        return [self.entries[i] for i in rng.sample(range(len(self.entries)), count)]
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load(file_name):
+    """
+    Returns Wordlist with contents of given payload file. Every file is read
+    only once per process, subsequent calls return the already loaded list.
+    Raises IOError when the file can not be read.
+    """
+    with _loaded_lock:
+        if file_name not in _loaded:
+            path = os.path.join(PAYLOADS_FOLDER, file_name)
+            with open(path, 'r', errors="ignore") as f:
+                _loaded[file_name] = Wordlist(f.read().splitlines())
+
+        return _loaded[file_name]
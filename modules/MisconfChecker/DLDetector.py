@@ -1,11 +1,12 @@
-import os
+import re
 import requests
-import core.config as cfg
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from core import context
+from core import client
 from core.helpers import URLHelper
-from urllib.parse import urlparse, urljoin, parse_qs, parse_qsl
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from . import DirectoryTree as _DT
+from . import ListingSignatures as _LS
+from urllib.parse import urlparse, urljoin
 
 class DLDetector():
     """
@@ -20,108 +21,114 @@ class DLDetector():
         |>  https://danieldusek.com
     """
 
-    def __init__(self, urls, target):
+    def __init__(self, urls, target, http_client=None, run_context=None):
         self.urls = urls
         self.module_name = "MisconfChecker"
         self.target = target
+        self.client = http_client or client.get_client()
+        self.run_context = run_context
         self.URLHelper = URLHelper()
         self.directory_listings = []
         
         self.DELAY = 0.1
+        self.WORKERS = 8
+
+        # Maximum number of directories checked (including those discovered
+        # in directory listings).
+        self.MAX_REQUESTS = 200
+
+        self.signatures = _LS.ListingSignatures()
+
+        self.HREF_PATTERN = re.compile(
+            r"""href\s*=\s*["']?([^"'\s>?#]+/)["'\s>]""", re.IGNORECASE
+        )
+
 
     def detect_directory_listing(self):
         """
         Discovers subdirectories on given target based on what has been
-        observed in the crawling phase (SiteCopier)
+        observed in the crawling phase (SiteCopier). Directories are checked
+        concurrently, level by level. Subdirectories linked from discovered
+        directory listings are checked as well, until MAX_REQUESTS is spent.
         """
-        self.virtual_dirs = []
+        self.tree = _DT.DirectoryTree()
         for url in self.urls:
-            # Detect virtual directories (and update the list of them)
             if self.URLHelper.is_in_scope(self.target, url):
-                self.update_virtual_dirs(
-                    self.detect_virtual_directories(url)
-                )
+                self.tree.add_url(url)
 
-        parts = urlparse(self.target)
-        for directory_address in self.virtual_dirs:
-            url = parts.scheme + '://' + parts.netloc + '/' + directory_address
-            
-            self.fprint("Checking: %s" % url)
-            try:
-                r = self._retry_session().get(url)
-                sleep(self.DELAY)
-            except requests.exceptions.RequestException as e:
-                self.mprint("[ERROR] Request to %s failed." % url)
-                self.fprint(repr(e))
-            
-            if self.is_dl_reply(r.text):
-                self.directory_listings.append(
-                    url
-                )      
+        frontier = self.tree.directories()
+        budget = self.MAX_REQUESTS
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            while frontier and budget > 0:
+                batch, frontier = frontier[:budget], frontier[budget:]
+                budget -= len(batch)
+
+                for url, response in executor.map(self.check_directory, batch):
+                    if response is None:
+                        continue
+                    self.directory_listings.append(url)
+                    frontier += self.add_listed_directories(url, response)
+
+            if frontier:
+                self.mprint("Directory listing checks limited, MAX REQUESTS (%s) reached." % self.MAX_REQUESTS)
 
         return self.directory_listings
 
 
-    def is_dl_reply(self, response):
+    def check_directory(self, directory_address):
         """
-        Inspects response for directory listing indicators and determines
-        whether DL is enabled.
+        Requests the directory. Returns its URL and body of the response when
+        it is a directory listing, None otherwise. Only the beginning of the
+        response is downloaded, unless it turns out to be a listing.
         """
-        title_indicator = heading_indicator = above_indicator = False
-        
-        if '<title>Index of' in response:
-            title_indicator = True
-
-        if '<h1>Index of' in response:
-            heading_indicator = True
-
-        # First two conditions are standard.
-        # Later two conditions were discovered in startupgarden.fi's directory
-        # listing response-
-        if '<a href="../">../</a>' in response or \
-            "<a href='../'>../</a>" in response or \
-            '<a href="/">Parent Directory</a>' in response or\
-            "<a href='/'>Parent Directory</a>" in response:
-            above_indicator = True
-        
-        return title_indicator and heading_indicator and above_indicator
-
-
-    def detect_virtual_directories(self, url):
-        """Detects what virtual directories are present in the URL"""
-        parts = urlparse(url)
-        path = parts.path
-        components = path.split('/')
-        components.remove('')
-        
-        if not components:
-            return components
-
-        # Do not consider file to be a directory.
-        if '.' in components[-1]:
-            components.pop()
-
-        return self.build_virtual_directory_components(components)
-
+        parts = urlparse(self.target)
+        url = parts.scheme + '://' + parts.netloc + '/' + directory_address + '/'
 
-    def build_virtual_directory_components(self, components):
-        """Recursively builds all possible directory paths."""
-        if not components:
-            return components
-        ccomp = components.copy()
-        results = ['/'.join(ccomp)]
-        ccomp.pop()
-        results += self.build_virtual_directory_components(ccomp)
-        return results
+        self.fprint("Checking: %s" % url)
+        try:
+            limit = self.signatures.SCAN_LENGTH
+            r = self.client.get_prefix(url, limit, delay=self.DELAY)
+            if not self.is_dl_reply(r.text):
+                return (url, None)
+
+            # Whole listing is needed to discover its subdirectories.
+            if len(r.content) >= limit:
+                r = self.client.get(url, delay=self.DELAY)
+            return (url, r.text)
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR] Request to %s failed." % url)
+            self.fprint(repr(e))
+        return (url, None)
+
+
+    def add_listed_directories(self, url, response):
+        """
+        Adds subdirectories linked from the directory listing into the tree.
+        Returns those that were not known before.
+        """
+        root = urlparse(url).path
+        added = []
+        for href in self.HREF_PATTERN.findall(response):
+            child = urlparse(urljoin(url, href))
+            if child.netloc != urlparse(url).netloc:
+                continue
+            # Only entries below the listed directory (skips parent links).
+            if not child.path.startswith(root) or child.path == root:
+                continue
+            added += self.tree.add_directory(child.path)
+        return added
 
 
-    def update_virtual_dirs(self, new_directories):
+    def is_dl_reply(self, response):
         """
-        Merges current values of the virtual_dir property with newly retrieved
-        virtual directory values.
+        Inspects response for directory listing indicators and determines
+        whether DL is enabled.
         """
-        self.virtual_dirs += new_directories
-        self.virtual_dirs = list(set(self.virtual_dirs))
+        listing = self.signatures.match(response)
+        if listing:
+            self.fprint("Directory listing signature matched: %s" % listing)
+            return True
+        return False
 
 
     def mprint(self, string):
@@ -132,32 +139,5 @@ class DLDetector():
 
     def fprint(self, string):
         """Write into the current log file instead of STDOU."""
-        file_name = os.path.join(".", "output", cfg.CURRENT_RUN_ID, "run.log")
         message = " [%s]: %s" % (self.module_name, string)
-        try:
-            with open(file_name, 'a') as f:
-                f.write(message + '\n')
-        except IOError:
-            print("[DBG-ERROR] Unable to write to file: %s" % file_name)
-
-
-    def _retry_session(self, 
-        retries = 5, 
-        backoff_factor = 0.3, 
-        status_forcelist = (500,502,503,504),
-        session = None):
-        """
-        Gets a retry session with default parameters unless specifically
-        requested otherwise.
-        """
-        session = session or requests.Session()
-        retry = Retry(
-            total= retries, read = retries, connect = retries,
-            backoff_factor = backoff_factor, status_forcelist = status_forcelist
-        )
-
-        adapter = HTTPAdapter(max_retries = retries)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        
-        return session
\ No newline at end of file
+        context.get_context(self.run_context).log(message)
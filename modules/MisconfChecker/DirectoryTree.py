@@ -0,0 +1,71 @@
+from urllib.parse import urlparse
+
+
+class DirectoryTree():
+    """
+        Trie of the target's directories. Every node is a dictionary of its
+        subdirectories, so a directory (and all its parents) is inserted by
+        a single walk from the root and duplicates are never stored.
+
+        |>  This software is a part of the master thesis: 
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+
+    def add_url(self, url):
+        """
+        Inserts directories from the URL's path. Last path component is 
+        considered to be a file when it contains a dot and there is no 
+        trailing slash. Returns newly inserted directory paths.
+        """
+        components = [c for c in urlparse(url).path.split('/') if c]
+        if components and '.' in components[-1] and not url.endswith('/'):
+            components.pop()
+        return self.add_components(components)
+
+
+    def add_directory(self, path):
+        """Inserts directory path (e.g. 'a/b/c'). Returns new directories."""
+        return self.add_components([c for c in path.split('/') if c])
+
+
+    def add_components(self, components):
+        """Walks the trie, creating missing nodes along the way."""
+        added = []
+        node = self.root
+        for depth, component in enumerate(components):
+            if component not in node:
+                node[component] = {}
+                self.size += 1
+                added.append('/'.join(components[:depth + 1]))
+            node = node[component]
+        return added
+
+
+    def directories(self):
+        """Returns all directory paths, shallow directories first."""
+        paths = []
+        level = [('', self.root)]
+        while level:
+            next_level = []
+            for prefix, node in level:
+                for name, children in node.items():
+                    path = prefix + name
+                    paths.append(path)
+                    next_level.append((path + '/', children))
+            level = next_level
+        return paths
+
+
+    def __len__(self):
+        return self.size
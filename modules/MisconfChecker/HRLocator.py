@@ -1,8 +1,10 @@
 import os, random
 import requests
-import core.config as cfg
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from core import context
+from core import client
+from core import wordlists
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import Soft404Detector as _S4D
 from urllib.parse import urlparse
 
 class HiddenResourcesLocator():
@@ -19,8 +21,10 @@ class HiddenResourcesLocator():
     """
 
 
-    def __init__(self, target):
+    def __init__(self, target, http_client=None, run_context=None):
         self.target = target
+        self.client = http_client or client.get_client()
+        self.run_context = run_context
         self.module_name = "MisconfChecker"
         self.parts = urlparse(self.target)
         
@@ -32,8 +36,33 @@ class HiddenResourcesLocator():
         self.discovered_resources = []
         self.discovered_vcs_resources = []
 
+        self.SOFT_404_DETECTION = True
+        self.soft404 = _S4D.Soft404Detector(self.client, self.build_url,
+            self.run_context
+        )
+
         self.MAX_REQUESTS = 1000
         self.RANDOMIZE_SELECTION = True
+        self.RANDOM_SEED = None
+        self.WORKERS = 8
+
+        # Per-host delay between starts of two enumeration requests. Workers
+        # share it, so it bounds the request rate of the whole enumeration
+        # (the rate of sequential enumeration with the common 0.1s DELAY).
+        self.ENUMERATION_DELAY = 0.1
+
+        # How existence of resources is probed: "HEAD" requests (falling back
+        # to GET when the target does not handle them), "RANGE" (GET requesting 
+        # only the first byte) or "GET" (streamed GET closed before the body
+        # is read). Bodies (at most MAX_BODY_BYTES) are only downloaded for 
+        # hits that need to be classified as soft-404s.
+        self.PROBE_MODE = "HEAD"
+        self.MAX_BODY_BYTES = 65536
+
+        # Target answering HEAD (but not GET) of its root with one of these
+        # codes does not support HEAD. Decided once, before enumeration.
+        self.head_failure_codes = [400, 405, 501]
+        self.head_supported = True
 
         # Standard apache files are expected to return 403 even when not 
         # present. Ignore these.
@@ -52,75 +81,178 @@ class HiddenResourcesLocator():
         (1) a list of most commonly ocurring files/resources
         (2) commonly used VCS configuration/tracking files and directories
         """
-        requests_done = 0
-        if self.RANDOMIZE_SELECTION:
-            # When selection is randomized, we need a copy of resource list
-            # which can be updated.
-            resource_list_cp = self.resource_list.copy()
-            for _ in range(len(self.resource_list)):
-                if requests_done <= self.MAX_REQUESTS:
-                    rnd_resource = random.choice(resource_list_cp)
-                    
-                    self.request_resource(rnd_resource)
-                    requests_done += 1
-                    
-                    resource_list_cp.remove(rnd_resource)
-                else:
-                    self.mprint("Resource enumeration terminated, MAX REQUESTS (%s) reached." % self.MAX_REQUESTS)
-                    break
-        else:
-            # When no randomization applies, target first N resources.
-            for resource in self.resource_list:
-                if requests_done <= self.MAX_REQUESTS:
-                    self.request_resource(resource)
-                    requests_done += 1
-                else:
-                    self.mprint("Resource enumeration terminated, MAX REQUESTS (%s) reached." % self.MAX_REQUESTS)
-                    break
-        
+        self.soft404.DELAY = self.ENUMERATION_DELAY
+        self.soft404.MAX_BODY_BYTES = self.MAX_BODY_BYTES
+        self.calibrate_head_support()
+        selected = self.select_resources()
+        if len(selected) < len(self.resource_list):
+            self.mprint("Resource enumeration limited, MAX REQUESTS (%s) will be sent." % self.MAX_REQUESTS)
+
+        self.enumerate_resources(selected, self.record_resource)
         self.locate_vcs_leftovers()
+
+        self.discovered_resources.sort()
+        self.discovered_vcs_resources.sort()
         
         return (self.discovered_resources, self.discovered_vcs_resources)
 
+
+    def select_resources(self):
+        """
+        Selects at most MAX_REQUESTS resources to be requested. Either random
+        ones (RANDOMIZE_SELECTION), or the first N resources from the list.
+
+        Random selection is seeded with RANDOM_SEED (or a freshly generated 
+        seed, which is logged), so the very same selection can be repeated
+        and scans compared across time.
+        """
+        if self.RANDOMIZE_SELECTION:
+            seed = self.RANDOM_SEED
+            if seed is None:
+                seed = random.randrange(2**32)
+            self.fprint("Resource selection seed: %s" % seed)
+            return self.resource_list.sample(self.MAX_REQUESTS, random.Random(seed))
+
+        # When no randomization applies, target first N resources.
+        return list(self.resource_list[:self.MAX_REQUESTS])
+
+
+    def calibrate_head_support(self):
+        """
+        Decides whether the target handles HEAD requests, so a single failing
+        resource does not switch the whole enumeration to GET. HEAD of the
+        target root is compared with GET of the root, the target does not
+        support HEAD when only HEAD fails.
+        """
+        if self.PROBE_MODE != "HEAD":
+            return
+
+        root = self.build_url("")
+        try:
+            r = self.client.head(root, delay=self.ENUMERATION_DELAY)
+            if r.status_code not in self.head_failure_codes:
+                return
+            reference = self.client.get_prefix(root, 0, delay=self.ENUMERATION_DELAY)
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR] Unable to check HEAD support of %s" % root)
+            self.fprint(repr(e))
+            return
+
+        if reference.status_code not in self.head_failure_codes:
+            self.head_supported = False
+            self.mprint("HEAD not supported by %s (%s), falling back to GET." % (
+                self.parts.netloc, r.status_code
+            ))
+
+
+    def enumerate_resources(self, resources, callback):
+        """
+        Requests given resources using a bounded pool of WORKERS threads. 
+        Results are passed to the callback (in the calling thread) as soon as
+        they arrive, in the order of completion.
+        """
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            futures = [
+                executor.submit(self.request_resource, resource) 
+                for resource in resources
+            ]
+            for future in as_completed(futures):
+                callback(*future.result())
+                done += 1
+                if done % 100 == 0:
+                    self.mprint("%s/%s resources checked." % (done, len(resources)))
+
     
     def request_resource(self, resource):
-        """Send request discovering whether hidden resource is available."""
+        """
+        Send request discovering whether hidden resource is available. Returns
+        resource, its URL and status code (None when the request failed).
+        """
+        url = self.build_url(resource)
         try:
-            url = self.build_url(resource)
-            r = self._retry_session().get(url)
+            status_code = self.probe_resource(url)
 
-            if r.status_code == 403 and resource in self.blacklist_403:
-                return
-            
-            # If target returns anything other than 404, it's there.
-            if r.status_code != 404:
-                if self.is_vcs_leftover(resource):
-                    self.discovered_vcs_resources.append(url)
-                else:
-                    if r.status_code in range(200,399):
-                        self.discovered_resources.append(url)
-                    else:
-                        self.mprint("Discovered: %s, but the code was %s so this discovery will not be put into the report." % (url, r.status_code))
+            # Body of the hit is downloaded only when the target is known to
+            # answer with soft-404s there. Responses matching the soft-404
+            # fingerprint are discarded as if they were 404s.
+            if status_code != 404 and self.SOFT_404_DETECTION:
+                if self.soft404.has_soft_404(resource):
+                    r = self.client.get_prefix(
+                        url, self.MAX_BODY_BYTES, delay=self.ENUMERATION_DELAY
+                    )
+                    if self.soft404.is_soft_404(resource, r):
+                        self.fprint("Soft-404 discarded: %s (%s)" % (url, r.status_code))
+                        return (resource, url, 404)
+                    status_code = r.status_code
+
+            return (resource, url, status_code)
         except requests.exceptions.RequestException as e:
             self.mprint("[ERROR] Unable to send resource discovery request for %s" % resource)
             self.fprint(repr(e))
+        return (resource, url, None)
+
+
+    def probe_resource(self, url):
+        """
+        Returns status code for the URL without downloading its body, using 
+        the method configured in PROBE_MODE.
+        """
+        if self.PROBE_MODE == "HEAD" and self.head_supported:
+            r = self.client.head(url, delay=self.ENUMERATION_DELAY)
+            return r.status_code
+
+        if self.PROBE_MODE == "RANGE":
+            r = self.client.get_prefix(
+                url, 0, delay=self.ENUMERATION_DELAY, 
+                headers={"Range": "bytes=0-0"}
+            )
+            # Partial content or unsatisfiable range (empty file) both mean
+            # the resource is there.
+            if r.status_code in [206, 416]:
+                return 200
+            return r.status_code
+
+        r = self.client.get_prefix(url, 0, delay=self.ENUMERATION_DELAY)
+        return r.status_code
+
+
+    def record_resource(self, resource, url, status_code):
+        """Records the resource when the target reported it to be there."""
+        if status_code is None:
+            return
+
+        if status_code == 403 and resource in self.blacklist_403:
+            return
+        
+        # If target returns anything other than 404, it's there.
+        if status_code != 404:
+            if self.is_vcs_leftover(resource):
+                if url not in self.discovered_vcs_resources:
+                    self.discovered_vcs_resources.append(url)
+            else:
+                if status_code in range(200,399):
+                    self.discovered_resources.append(url)
+                else:
+                    self.mprint("Discovered: %s, but the code was %s so this discovery will not be put into the report." % (url, status_code))
 
 
     def obtain_list_from_payload_file(self, file_name):
-        """Retrieves contents of the file and converts them into the list."""
+        """
+        Retrieves (once per process loaded and deduplicated) contents of 
+        the payload file.
+        """
         path = os.path.join("payloads", file_name)
 
         try:
-            with open(path, 'r') as f:
-                resource_list = f.readlines()
-            return [x.replace('\n', '') for x in resource_list]
+            return wordlists.load(file_name)
         except FileNotFoundError as e:
             self.mprint("[ERROR] Unable to retrieve file: %s " % path)
             self.fprint(repr(e))
         except IOError as e:
             self.mprint("[ERROR] Unable to retrieve file: %s " % path)
             self.fprint(repr(e))
-        return []
+        return wordlists.Wordlist([])
 
 
     def build_url(self, resource):
@@ -140,17 +272,16 @@ class HiddenResourcesLocator():
         Verifies whether VCS leftover directories were accidentally pushed into
         production environment.
         """
-        for resource in self.vcs_resources_list:
-            try:
-                url = self.build_url(resource)
-                r = self._retry_session().get(url)
+        self.enumerate_resources(
+            list(self.vcs_resources_list), self.record_vcs_leftover
+        )
+
 
-                if r.status_code == 403:
-                    if url not in self.discovered_vcs_resources:
-                        self.discovered_vcs_resources.append(url)
-            except requests.exceptions.RequestException as e:
-                self.mprint("[ERROR] Unable to send resource discovery request for %s" % resource)
-                self.fprint(repr(e))
+    def record_vcs_leftover(self, resource, url, status_code):
+        """Records VCS leftover that is present, but forbidden."""
+        if status_code == 403:
+            if url not in self.discovered_vcs_resources:
+                self.discovered_vcs_resources.append(url)
 
 
     def classify_results_by_severity(self, resources):
@@ -166,33 +297,5 @@ class HiddenResourcesLocator():
     
     def fprint(self, string):
         """Write into the current log file instead of STDOU."""
-        file_name = os.path.join(".", "output", cfg.CURRENT_RUN_ID, "run.log")
         message = " [%s]: %s" % (self.module_name, string)
-        try:
-            with open(file_name, 'a') as f:
-                f.write(message + '\n')
-        except IOError:
-            print("[DBG-ERROR] Unable to write to file: %s" % file_name)
-
-
-    
-    def _retry_session(self, 
-        retries = 5, 
-        backoff_factor = 0.3, 
-        status_forcelist = (500,502,503,504),
-        session = None):
-        """
-        Gets a retry session with default parameters unless specifically
-        requested otherwise.
-        """
-        session = session or requests.Session()
-        retry = Retry(
-            total= retries, read = retries, connect = retries,
-            backoff_factor = backoff_factor, status_forcelist = status_forcelist
-        )
-
-        adapter = HTTPAdapter(max_retries = retries)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        
-        return session
\ No newline at end of file
+        context.get_context(self.run_context).log(message)
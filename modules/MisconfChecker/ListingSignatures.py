@@ -0,0 +1,60 @@
+import re
+
+
+class ListingSignatures():
+    """
+        Recognizes directory listings generated by common web servers. All 
+        signatures are compiled into a single regular expression (one named
+        group per signature), so the response is scanned only once and only
+        its beginning (first SCAN_LENGTH characters) is inspected.
+
+        New signatures can be registered with add_signature().
+
+        |>  This software is a part of the master thesis: 
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+    # More specific signatures go first (nginx and Apache share the title).
+    DEFAULT_SIGNATURES = [
+        ("nginx", r"<h1>Index of /[^<]*</h1>\s*<hr>\s*<pre>\s*<a href=\"\.\./\">\.\./</a>"),
+        ("apache", r"<h1>Index of /[^<]*</h1>\s*(?:<ul>|<table|<pre>)|<a href=\"/[^\"]*\">\s*Parent Directory</a>"),
+        ("iis", r"<a href=\"[^\"]*\">\[To Parent Directory\]</a>"),
+        ("lighttpd", r"<table summary=\"Directory Listing\""),
+        ("python", r"<title>Directory listing for /[^<]*</title>"),
+        ("s3", r"<ListBucketResult\s+xmlns=\"http://s3\.amazonaws\.com/doc/2006-03-01/\">"),
+    ]
+
+
+    def __init__(self):
+        self.SCAN_LENGTH = 4096
+        self.signatures = list(self.DEFAULT_SIGNATURES)
+        self.compile()
+
+
+    def add_signature(self, name, pattern):
+        """Registers a new signature (name must be a valid identifier)."""
+        self.signatures.append((name, pattern))
+        self.compile()
+
+
+    def compile(self):
+        """Compiles all signatures into a single case insensitive pattern."""
+        self.pattern = re.compile('|'.join(
+            ["(?P<%s>%s)" % (name, pattern) for name, pattern in self.signatures]
+        ), re.IGNORECASE)
+
+
+    def match(self, response):
+        """
+        Returns name of the server whose directory listing signature appears
+        at the beginning of the response, None when there is none.
+        """
+        found = self.pattern.search(response, 0, self.SCAN_LENGTH)
+        if found:
+            return found.lastgroup
+        return None
@@ -1,12 +1,12 @@
-import os
 import requests
-import core.config as cfg
+from core import context
 from core.helpers import URLHelper
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 from . import Presenter as p
 from . import DLDetector as _DLD
 from . import HRLocator as _HRL
+from . import VCSRecovery as _VCSR
 
 class MisconfChecker():
     """
@@ -33,17 +33,32 @@ class MisconfChecker():
         ]
         self.module_name = "MisconfChecker"
         self.sitecopier_results = {}
+        self.run_context = None
 
         self.directory_listing = []
 
         self.URLHelper = URLHelper()
 
         self.DELAY = 0.1
+        self.RANDOMIZE_SELECTION = True
+        self.RANDOM_SEED = None
+        self.MAX_REQUESTS = 1000
+        self.WORKERS = 8
+        self.ENUMERATION_DELAY = 0.1
+        self.SOFT_404_DETECTION = True
+        self.PROBE_MODE = "HEAD"
+        self.MAX_BODY_BYTES = 65536
+        self.MAX_DL_REQUESTS = 200
+        self.RECOVER_VCS = True
+        self.MAX_RECOVERED_FILES = 500
+        self.MAX_RECOVERED_FILE_SIZE = 1048576
 
         """Structures to hold findings discovered by the scan."""
         self.resources = []
         self.vcs_resources = []
         self.directory_listing = []
+        self.vcs_repositories = []
+        self.recovered_files = []
 
 
     def mprint(self, string):
@@ -54,35 +69,56 @@ class MisconfChecker():
     
     def fprint(self, string):
         """Write into the current log file instead of STDOU."""
-        file_name = os.path.join(".", "output", cfg.CURRENT_RUN_ID, "run.log")
         message = " [%s]: %s" % (self.module_name, string)
-        try:
-            with open(file_name, 'a') as f:
-                f.write(message + '\n')
-        except IOError:
-            print("[DBG-ERROR] Unable to write to file: %s" % file_name)
+        context.get_context(self.run_context).log(message)
 
 
     def execute(self, param):
         self.mprint("Checking IIS/VCS misconfigurations...")
         self.target = param
+        run_context = context.get_context(self.run_context)
 
         # Hidden resources & VCS leftover resources discovery
-        HRL = _HRL.HiddenResourcesLocator(self.target)
+        HRL = _HRL.HiddenResourcesLocator(self.target, run_context.client,
+            run_context
+        )
         HRL.RANDOMIZE_SELECTION = self.RANDOMIZE_SELECTION
+        HRL.RANDOM_SEED = self.RANDOM_SEED
         HRL.MAX_REQUESTS = self.MAX_REQUESTS
-        HRL.DELAY = self.DELAY
+        HRL.WORKERS = self.WORKERS
+        HRL.ENUMERATION_DELAY = self.ENUMERATION_DELAY
+        HRL.SOFT_404_DETECTION = self.SOFT_404_DETECTION
+        HRL.PROBE_MODE = self.PROBE_MODE
+        HRL.MAX_BODY_BYTES = self.MAX_BODY_BYTES
         self.mprint("Locating hidden resources...")
         self.resources, self.vcs_resources = HRL.discover_hidden_resources()
         
+        # Recovery of the files tracked by exposed repositories
+        if self.RECOVER_VCS and self.vcs_resources:
+            VCSR = _VCSR.VCSRecovery(self.target, run_context.client,
+                run_context
+            )
+            VCSR.DELAY = self.DELAY
+            VCSR.WORKERS = self.WORKERS
+            VCSR.MAX_FILES = self.MAX_RECOVERED_FILES
+            VCSR.MAX_FILE_SIZE = self.MAX_RECOVERED_FILE_SIZE
+            self.mprint("Recovering files from VCS leftovers...")
+            self.vcs_repositories, self.recovered_files = VCSR.recover(
+                self.vcs_resources
+            )
+
         # Enabled directory listing discovery
         sc_artifacts = self.sitecopier_results["parsable"]["anyProcessor"][0]
         urls_seen = (
             sc_artifacts["crawledUrls"] + sc_artifacts["failedUrls"] + 
             self.resources + self.vcs_resources
         )
-        DLD = _DLD.DLDetector(urls_seen, self.target)
+        DLD = _DLD.DLDetector(urls_seen, self.target, run_context.client,
+            run_context
+        )
         DLD.DELAY = self.DELAY
+        DLD.WORKERS = self.WORKERS
+        DLD.MAX_REQUESTS = self.MAX_DL_REQUESTS
         self.mprint("Searching for enabled directory listing...")
         self.directory_listing = DLD.detect_directory_listing()
 
@@ -91,9 +127,10 @@ class MisconfChecker():
         self.fprint("Discovered following VCS resources: %s" % self.vcs_resources)
         self.fprint("Detected directory listing in: %s" % self.directory_listing)
 
-        self.mprint("Discovered resources: %s | VCS: %s | Directory Listing: %s" %(
+        self.mprint("Discovered resources: %s | VCS: %s | Recovered files: %s | Directory Listing: %s" %(
             len(self.resources),
             len(self.vcs_resources),
+            len(self.recovered_files),
             len(self.directory_listing)))
         self.mprint("Misconfiguration checks done.")
 
@@ -115,10 +152,18 @@ class MisconfChecker():
                 "vcs_resources": self.vcs_resources,
                 "directory_listing": self.directory_listing,
             },
-            "parsable": {}
+            "parsable": {
+                "vcs_repositories": self.vcs_repositories,
+                "recovered_files": self.recovered_files
+            }
         }
 
 
+    def set_context(self, run_context):
+        """Sets context of the run the module is executed in."""
+        self.run_context = run_context
+
+
     def get_dependencies(self):
         """Provides information about the module's dependency requirements."""
         return self.dependencies
@@ -135,14 +180,35 @@ class MisconfChecker():
         if "DELAY" in options:
             self.DELAY = options["DELAY"]
         if "RANDOMIZE_SELECTION" in options:
-            self.RANDOMIZE_SELECTION = bool(options["RANDOMIZE_SELECTION"])
+            self.RANDOMIZE_SELECTION = options["RANDOMIZE_SELECTION"] in [True, "True"]
+        if "RANDOM_SEED" in options:
+            self.RANDOM_SEED = options["RANDOM_SEED"]
         if "MAX_REQUESTS" in options:
             self.MAX_REQUESTS = options["MAX_REQUESTS"]
+        if "WORKERS" in options:
+            self.WORKERS = max(int(options["WORKERS"]), 1)
+        if "ENUMERATION_DELAY" in options:
+            self.ENUMERATION_DELAY = options["ENUMERATION_DELAY"]
+        if "SOFT_404_DETECTION" in options:
+            self.SOFT_404_DETECTION = options["SOFT_404_DETECTION"] in [True, "True"]
+        if "PROBE_MODE" in options:
+            if options["PROBE_MODE"] in ["HEAD", "RANGE", "GET"]:
+                self.PROBE_MODE = options["PROBE_MODE"]
+        if "MAX_BODY_BYTES" in options:
+            self.MAX_BODY_BYTES = int(options["MAX_BODY_BYTES"])
+        if "MAX_DL_REQUESTS" in options:
+            self.MAX_DL_REQUESTS = int(options["MAX_DL_REQUESTS"])
+        if "RECOVER_VCS" in options:
+            self.RECOVER_VCS = options["RECOVER_VCS"] in [True, "True"]
+        if "MAX_RECOVERED_FILES" in options:
+            self.MAX_RECOVERED_FILES = int(options["MAX_RECOVERED_FILES"])
+        if "MAX_RECOVERED_FILE_SIZE" in options:
+            self.MAX_RECOVERED_FILE_SIZE = int(options["MAX_RECOVERED_FILE_SIZE"])
 
 
     def leaves_physical_artifacts(self):
         """Does the module leave artifacts phisically on filesystem?"""
-        return False
+        return len(self.recovered_files) > 0
 
 
     def _retry_session(self, 
@@ -1,5 +1,6 @@
 from core import constants as Consts
 from core import utils as utils
+from core.helpers import PagedTable
 
 
 class Presenter():
@@ -39,6 +40,7 @@ class Presenter():
     def present_content(self, presentation_style):
         """
         Returns content ready for presentation in style specified by parameter.
+        Content is a generator of output fragments.
         """
         self.style = presentation_style
         return {
@@ -55,91 +57,120 @@ class Presenter():
         """
         results = self.results['MisconfChecker']['results']['nonparsable']
 
-        content = Consts.EMPTY_STRING
         if len(results) > 0:
-            content += self.get_findings(results)
+            yield from self.get_findings(results)
         else:
-            content += self.get_no_data()
+            yield self.get_no_data()
 
         # Corner case when nothing was discovered
         if  len(results["directory_listing"]) == 0 and \
             len(results["vcs_resources"]) == 0 and \
             len(results["hidden_resources"]) == 0:
-            content += self.get_no_data()
-
-        return content
+            yield self.get_no_data()
 
 
     def get_findings(self, results):
-        """Returns discovered findings in presentable format."""
+        """Yields discovered findings in presentable format."""
         directory_listing_found = len(results["directory_listing"]) > 0
         vcs_leftovers_found = len(results["vcs_resources"]) > 0
         resources_found = len(results["hidden_resources"]) > 0
         if self.style == 'BWFormal':
             # Information paragraphs about what was found.
-            info = Consts.EMPTY_STRING
             if directory_listing_found:
-                info += """
+                yield PagedTable("""
                 <p><strong>Enabled directory browsing/listing</strong> was
                 discovered in the following locations:</p>
-                <ul>"""
-
-                for dl_item in results["directory_listing"]:
-                    info += "<li>%s</li>" % utils.encode_for_html(dl_item)
-
-                info += "</ul>"
+                <ul>""", self.get_list_items(results["directory_listing"]), "</ul>")
             if vcs_leftovers_found:
-                info += """
+                yield PagedTable("""
                 <p><strong>Version control files</strong> were pushed into the
                 production along with the code. Sometimes, it is possible to 
                 recreate the codebase and discover take over the application.
                 See following locations:</p>
                 <ul>
-                """
-
-                for vcs_item in results["vcs_resources"]:
-                    info += "<li>%s</li>" % utils.encode_for_html(vcs_item)
-                
-                info += "</ul>"
+                """, self.get_list_items(results["vcs_resources"]), "</ul>")
+
+                repositories = self.get_vcs_repositories()
+                if repositories:
+                    yield """
+                    <p>Exposure of the following repositories was confirmed
+                    and files tracked by them were recovered (into the run's
+                    output folder):</p>
+                    <table>
+                    <tr>
+                        <th>Repository</th>
+                        <th>Ref (commit)</th>
+                        <th>Recovered files</th>
+                    </tr>
+                    """
+
+                    for repository in repositories:
+                        yield "<tr><td>%s</td><td>%s</td><td>%s/%s</td></tr>" % (
+                            utils.encode_for_html(repository["url"]),
+                            utils.encode_for_html("%s (%s)" % (repository["ref"], repository["commit"])),
+                            repository["recovered_files"],
+                            repository["tracked_files"]
+                        )
+
+                    yield "</table>"
             if resources_found:
-                info += """<p>Other interesting <strong>resources</strong> were
+                yield PagedTable("""<p>Other interesting <strong>resources</strong> were
                 found in the following locations:</p>
                 <ul>
-                """
-
-                for resource in results["hidden_resources"]:
-                    info += "<li>%s</li>" % utils.encode_for_html(resource)
-                
-                info += "</ul>"
-                
-            return info
+                """, self.get_list_items(results["hidden_resources"]), "</ul>")
         else:
-            info = Consts.EMPTY_STRING
             if directory_listing_found:
-                info += """
+                yield """
 Enabled directory browsing/listing was discovered in the following locations:
                 """
 
                 for dl_item in results["directory_listing"]:
-                    info += "\t|->%s" % dl_item
+                    yield "\t|->%s" % dl_item
 
             if vcs_leftovers_found:
-                info += """
+                yield """
 Version control files were pushed into the production along with the code. Sometimes, 
 it is possible to recreate the codebase and discover take over the application. See 
 following locations:
                 """
                 for vcs_item in results["vcs_resources"]:
-                    info += "\t|->%s" % vcs_item
+                    yield "\t|->%s" % vcs_item
+
+                repositories = self.get_vcs_repositories()
+                if repositories:
+                    yield """
+Exposure of the following repositories was confirmed and files tracked by them were recovered
+(into the run's output folder):
+
+Format: Repository | Ref (commit) | Recovered files
+"""
+                    for repository in repositories:
+                        yield "%s | %s (%s) | %s/%s \n" % (
+                            repository["url"],
+                            repository["ref"],
+                            repository["commit"],
+                            repository["recovered_files"],
+                            repository["tracked_files"]
+                        )
 
             if resources_found:
-                info += """Other interesting <strong>resources</strong> were found in the following locations:
+                yield """Other interesting <strong>resources</strong> were found in the following locations:
 """
 
                 for resource in results["hidden_resources"]:
-                    info += "\t|->%s" % resource
-            
-            return info
+                    yield "\t|->%s" % resource
+
+
+    def get_list_items(self, items):
+        """Yields HTML list items, one for each of the items."""
+        for item in items:
+            yield "<li>%s</li>" % utils.encode_for_html(item)
+
+
+    def get_vcs_repositories(self):
+        """Returns repositories whose exposure was confirmed (if any)."""
+        results = self.results['MisconfChecker']['results']
+        return results.get('parsable', {}).get('vcs_repositories', [])
 
 
     def get_no_data(self):
@@ -0,0 +1,174 @@
+import re
+import math
+import threading
+import requests
+import core.utils as utils
+from core import context
+from urllib.parse import quote
+
+
+class Soft404Detector():
+    """
+        Recognizes "soft 404" responses - responses to non-existent resources
+        that are not reported with 404 status code (e.g. 200 with a "page not
+        found" page, or a redirect to the main page).
+
+        For every directory and extension combination a few random (surely
+        non-existent) resources are requested first and fingerprint of the
+        responses (status code, length bucket and simhash of the body) is 
+        remembered. Later responses are then compared against these 
+        fingerprints without any further requests.
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+
+    # Numbers and long random-looking tokens (timestamps, CSRF tokens, ...).
+    TOKEN_PATTERN = re.compile(r"[A-Za-z0-9+/_=-]{16,}|\d+")
+
+
+    def __init__(self, client, build_url, run_context=None):
+        self.client = client
+        self.run_context = run_context
+        self.build_url = build_url
+        self.module_name = "MisconfChecker"
+
+        self.DELAY = 0.1
+        self.CALIBRATION_REQUESTS = 2
+        self.MAX_SIMHASH_DISTANCE = 3
+
+        # Only the beginning of the bodies is downloaded and compared.
+        self.MAX_BODY_BYTES = 65536
+
+        self.fingerprints = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+
+    def has_soft_404(self, resource):
+        """
+        Returns True when the target answers with soft-404s in the resource's
+        directory (for its extension). When it does not, hits there can be 
+        trusted without downloading and fingerprinting their bodies.
+        """
+        return len(self.get_fingerprints(resource)) > 0
+
+
+    def is_soft_404(self, resource, response):
+        """
+        Returns True when the response to the resource looks like a response
+        to a non-existent resource in the same directory and with the same 
+        extension.
+        """
+        fingerprint = self.fingerprint(resource, response)
+        for calibrated in self.get_fingerprints(resource):
+            if self.matches(fingerprint, calibrated):
+                return True
+        return False
+
+
+    def get_fingerprints(self, resource):
+        """Returns (lazily calibrated) fingerprints for resource's group."""
+        key = self.calibration_key(resource)
+
+        with self.lock:
+            if key in self.fingerprints:
+                return self.fingerprints[key]
+            if key not in self.key_locks:
+                self.key_locks[key] = threading.Lock()
+            key_lock = self.key_locks[key]
+
+        # Only one worker calibrates given key, others wait for the result.
+        with key_lock:
+            with self.lock:
+                if key in self.fingerprints:
+                    return self.fingerprints[key]
+
+            fingerprints = self.calibrate(key)
+            with self.lock:
+                self.fingerprints[key] = fingerprints
+            return fingerprints
+
+
+    def calibrate(self, key):
+        """Requests random resources and fingerprints the responses."""
+        directory, extension = key
+        fingerprints = []
+        for _ in range(self.CALIBRATION_REQUESTS):
+            resource = directory + utils.get_rnd_string(12).lower() + extension
+            try:
+                r = self.client.get_prefix(
+                    self.build_url(resource), self.MAX_BODY_BYTES, 
+                    delay=self.DELAY
+                )
+            except requests.exceptions.RequestException as e:
+                self.fprint("[ERROR] Soft-404 calibration request failed.")
+                self.fprint(repr(e))
+                continue
+
+            if r.status_code != 404:
+                fingerprints.append(self.fingerprint(resource, r))
+
+        if fingerprints:
+            self.fprint("Soft-404 behaviour detected for %s*%s" % key)
+        return fingerprints
+
+
+    def calibration_key(self, resource):
+        """
+        Splits the resource into (directory, extension) key. Resources with
+        a trailing slash are grouped as directories.
+        """
+        if resource.endswith('/'):
+            directory = resource[:resource.rstrip('/').rfind('/') + 1]
+            return (directory, '/')
+
+        directory = resource[:resource.rfind('/') + 1]
+        name = resource[len(directory):]
+        extension = name[name.rfind('.'):] if '.' in name[1:] else ''
+        return (directory, extension)
+
+
+    def fingerprint(self, resource, response):
+        """
+        Computes (status code, length bucket, simhash) fingerprint of the
+        response. Reflections of the requested resource are removed first,
+        as soft-404 pages often echo the requested path, and volatile tokens
+        are masked.
+        """
+        text = response.text
+        for reflection in set([resource, quote(resource)]):
+            text = text.replace(reflection, '')
+        text = self.TOKEN_PATTERN.sub('', text)
+
+        return (
+            response.status_code,
+            self.length_bucket(len(text)),
+            utils.simhash(text)
+        )
+
+
+    def length_bucket(self, length):
+        """Logarithmic length bucket, neighbouring buckets differ by ~10%."""
+        return int(math.log(length + 1) / math.log(1.1))
+
+
+    def matches(self, fingerprint, calibrated):
+        """Compares two fingerprints."""
+        return (
+            fingerprint[0] == calibrated[0]
+            and abs(fingerprint[1] - calibrated[1]) <= 1
+            and utils.hamming_distance(fingerprint[2], calibrated[2]) <= self.MAX_SIMHASH_DISTANCE
+        )
+
+
+    def fprint(self, string):
+        """Write into the current log file instead of STDOU."""
+        message = " [%s]: %s" % (self.module_name, string)
+        context.get_context(self.run_context).log(message)
@@ -0,0 +1,412 @@
+import os, re
+import zlib
+import struct
+import sqlite3
+import tempfile
+import requests
+from core import context
+from core import client
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, quote
+
+class VCSRecovery():
+    """
+        Confirms that discovered VCS leftovers (.git, .svn) are really exposed
+        and recovers files tracked by the repository from them.
+
+        Git: HEAD and refs are read to confirm the exposure, .git/index is
+        parsed to enumerate tracked files and their loose objects are fetched
+        concurrently and decompressed as they stream in (objects stored only
+        in pack files are not recovered).
+
+        SVN (1.7+): .svn/wc.db is downloaded and queried for tracked files,
+        which are then fetched from the pristine store.
+
+        Recovered files are written under output/<run>/MisconfChecker/vcs.
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+
+    def __init__(self, target, http_client=None, run_context=None):
+        self.target = target
+        self.client = http_client or client.get_client()
+        self.run_context = run_context
+        self.module_name = "MisconfChecker"
+
+        self.DELAY = 0.1
+        self.WORKERS = 8
+
+        # Limits keeping both traffic and memory bounded.
+        self.MAX_FILES = 500
+        self.MAX_FILE_SIZE = 1048576
+        self.MAX_INDEX_SIZE = 8388608
+
+        self.output_dir = os.path.join(
+            context.get_context(run_context).module_dir("MisconfChecker"), "vcs"
+        )
+
+        self.repositories = []
+        self.recovered_files = []
+
+
+    def recover(self, vcs_resources):
+        """
+        Attempts recovery of every repository whose leftovers were discovered.
+        Returns (repositories, recovered files).
+        """
+        for base, vcs in self.locate_repositories(vcs_resources):
+            if vcs == ".git":
+                self.recover_git(base)
+            else:
+                self.recover_svn(base)
+
+        return (self.repositories, self.recovered_files)
+
+
+    def locate_repositories(self, vcs_resources):
+        """
+        Returns (base URL, VCS directory) pairs for the discovered .git and
+        .svn leftovers.
+        """
+        repositories = []
+        for url in vcs_resources:
+            parts = urlparse(url)
+            components = parts.path.split('/')
+            for vcs in [".git", ".svn"]:
+                if vcs not in components:
+                    continue
+                base_path = '/'.join(components[:components.index(vcs)]) + '/'
+                base = parts.scheme + "://" + parts.netloc + base_path
+                if (base, vcs) not in repositories:
+                    repositories.append((base, vcs))
+        return repositories
+
+
+    def recover_git(self, base):
+        """Confirms exposure of .git directory and recovers tracked files."""
+        git = base + ".git/"
+        head = self.fetch(git + "HEAD", 1024)
+        if head is None or not self.is_git_head(head):
+            self.fprint("Git repository not exposed: %s" % git)
+            return
+
+        head = head.decode('ascii', errors='replace').strip()
+        ref, commit = self.resolve_git_head(git, head)
+        self.mprint("Exposed git repository confirmed: %s (%s)" % (git, ref))
+
+        repository = {
+            "url": git, "vcs": "git", "ref": ref, "commit": commit,
+            "tracked_files": 0, "recovered_files": 0
+        }
+        self.repositories.append(repository)
+
+        index = self.fetch(git + "index", self.MAX_INDEX_SIZE)
+        if index is None:
+            self.fprint("Git index not available: %s" % git)
+            return
+
+        try:
+            entries = self.parse_git_index(index)
+        except (ValueError, IndexError, struct.error) as e:
+            self.mprint("[ERROR] Unable to parse git index: %s" % git)
+            self.fprint(repr(e))
+            return
+
+        repository["tracked_files"] = len(entries)
+        repository["recovered_files"] = self.recover_files(
+            base, "git", entries[:self.MAX_FILES],
+            partial(self.fetch_git_object, git)
+        )
+
+
+    def is_git_head(self, head):
+        """HEAD contains either a symbolic ref or a commit hash."""
+        return re.match(rb"^(ref: refs/\S+|[0-9a-f]{40})\s*$", head) is not None
+
+
+    def resolve_git_head(self, git, head):
+        """
+        Returns (ref, commit hash) HEAD points to. Ref is looked up as a loose
+        ref first and in packed-refs then. Commit is None when unresolved.
+        """
+        if not head.startswith("ref: "):
+            return ("HEAD", head)
+
+        ref = head[len("ref: "):]
+        loose = self.fetch(git + ref, 1024)
+        if loose is not None and re.match(rb"^[0-9a-f]{40}\s*$", loose):
+            return (ref, loose.decode('ascii').strip())
+
+        packed = self.fetch(git + "packed-refs", self.MAX_INDEX_SIZE)
+        if packed is not None:
+            for line in packed.decode('utf-8', errors='replace').splitlines():
+                parts = line.split(' ')
+                if len(parts) == 2 and parts[1] == ref:
+                    return (ref, parts[0])
+
+        return (ref, None)
+
+
+    def parse_git_index(self, index):
+        """
+        Parses .git/index (versions 2, 3 and 4) and returns (path, object
+        hash) pairs of the tracked regular files.
+
+        Format description:
+         |-> https://git-scm.com/docs/index-format
+        """
+        signature, version, count = struct.unpack(">4sII", index[:12])
+        if signature != b"DIRC" or version not in [2, 3, 4]:
+            raise ValueError("Unsupported index (%s, version %s)" % (signature, version))
+
+        entries = []
+        position = 12
+        path = b''
+        for _ in range(count):
+            start = position
+            mode = struct.unpack(">I", index[position + 24:position + 28])[0]
+            sha = index[position + 40:position + 60].hex()
+            flags = struct.unpack(">H", index[position + 60:position + 62])[0]
+            position += 62
+
+            # Extended flags (version 3+)
+            if flags & 0x4000:
+                position += 2
+
+            if version == 4:
+                # Path is prefix-compressed against the previous entry.
+                strip, position = self.decode_git_varint(index, position)
+                end = index.index(b'\0', position)
+                path = path[:len(path) - strip] + index[position:end]
+                position = end + 1
+            else:
+                end = index.index(b'\0', position)
+                path = index[position:end]
+                # Entries are NUL-padded to a multiple of eight bytes.
+                position = start + ((end - start + 8) // 8) * 8
+
+            # Regular files only (no symlinks and submodules).
+            if mode >> 12 == 0b1000:
+                entries.append((path.decode('utf-8', errors='replace'), sha))
+
+        return entries
+
+
+    def decode_git_varint(self, data, position):
+        """Decodes git's offset-encoded variable length integer."""
+        byte = data[position]
+        position += 1
+        value = byte & 0x7f
+        while byte & 0x80:
+            byte = data[position]
+            position += 1
+            value = ((value + 1) << 7) | (byte & 0x7f)
+        return (value, position)
+
+
+    def fetch_git_object(self, git, sha):
+        """
+        Fetches loose object and returns its content (None when unavailable
+        or not a blob). Object is decompressed while it is being downloaded
+        and download is aborted once MAX_FILE_SIZE is exceeded.
+        """
+        url = git + "objects/" + sha[:2] + "/" + sha[2:]
+        limit = self.MAX_FILE_SIZE + 64
+        try:
+            r = self.client.get(url, delay=self.DELAY, stream=True)
+            try:
+                if r.status_code != 200:
+                    return None
+
+                decompressor = zlib.decompressobj()
+                data = bytearray()
+                for chunk in r.iter_content(chunk_size=8192):
+                    data += decompressor.decompress(chunk, limit - len(data))
+                    if decompressor.unconsumed_tail or len(data) >= limit:
+                        self.fprint("Git object too large, skipping: %s" % url)
+                        return None
+                    if decompressor.eof:
+                        break
+            finally:
+                r.close()
+        except requests.exceptions.RequestException as e:
+            self.fprint("[ERROR] Unable to fetch git object: %s" % url)
+            self.fprint(repr(e))
+            return None
+        except zlib.error as e:
+            self.fprint("[ERROR] Unable to decompress git object: %s" % url)
+            self.fprint(repr(e))
+            return None
+
+        # Loose object = "<type> <size>\0<content>"
+        header_end = data.find(b'\0')
+        if header_end < 0 or not data.startswith(b"blob "):
+            return None
+        if len(data) - header_end - 1 > self.MAX_FILE_SIZE:
+            self.fprint("Git object too large, skipping: %s" % url)
+            return None
+        return bytes(data[header_end + 1:])
+
+
+    def recover_svn(self, base):
+        """Confirms exposure of .svn directory and recovers tracked files."""
+        svn = base + ".svn/"
+        database = self.fetch(svn + "wc.db", self.MAX_INDEX_SIZE)
+        if database is None or not database.startswith(b"SQLite format 3\0"):
+            self.fprint("SVN working copy database not exposed: %s" % svn)
+            return
+
+        self.mprint("Exposed SVN working copy confirmed: %s" % svn)
+        try:
+            entries = self.parse_svn_database(database)
+        except sqlite3.Error as e:
+            self.mprint("[ERROR] Unable to read SVN database: %s" % svn)
+            self.fprint(repr(e))
+            entries = []
+
+        repository = {
+            "url": svn, "vcs": "svn", "ref": None, "commit": None,
+            "tracked_files": len(entries), "recovered_files": 0
+        }
+        self.repositories.append(repository)
+        repository["recovered_files"] = self.recover_files(
+            base, "svn", entries[:self.MAX_FILES],
+            partial(self.fetch_svn_pristine, svn)
+        )
+
+
+    def parse_svn_database(self, database):
+        """Returns (path, SHA-1 checksum) pairs of files tracked in wc.db."""
+        handle, file_name = tempfile.mkstemp(suffix=".db")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(database)
+            connection = sqlite3.connect(file_name)
+            try:
+                rows = connection.execute(
+                    "SELECT local_relpath, checksum FROM NODES "
+                    "WHERE kind = 'file' AND checksum IS NOT NULL"
+                ).fetchall()
+            finally:
+                connection.close()
+        finally:
+            os.remove(file_name)
+
+        # Checksums are stored as "$sha1$<hash>"
+        return [
+            (path, checksum.split('$')[-1]) for path, checksum in rows
+            if checksum.startswith("$sha1$")
+        ]
+
+
+    def fetch_svn_pristine(self, svn, sha):
+        """Fetches pristine copy of the tracked file."""
+        return self.fetch(
+            svn + "pristine/" + sha[:2] + "/" + sha + ".svn-base",
+            self.MAX_FILE_SIZE
+        )
+
+
+    def recover_files(self, base, vcs, entries, fetch_file):
+        """
+        Fetches files of the (path, hash) entries concurrently and writes them
+        into the output directory. Returns number of recovered files.
+        """
+        parts = urlparse(base)
+        repository_dir = os.path.join(
+            self.output_dir, re.sub(r"[^A-Za-z0-9._-]", "_", parts.netloc + parts.path)
+        )
+
+        # Every worker writes the file it fetched, so at most WORKERS files
+        # are held in memory at once.
+        recover_file = partial(self.recover_file, base, vcs, repository_dir, fetch_file)
+        recovered = 0
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            for recovered_file in executor.map(recover_file, entries):
+                if recovered_file is not None:
+                    self.recovered_files.append(recovered_file)
+                    recovered += 1
+
+        self.mprint("Recovered %s/%s files tracked by %s." % (recovered, len(entries), vcs))
+        return recovered
+
+
+    def recover_file(self, base, vcs, repository_dir, fetch_file, entry):
+        """
+        Fetches file of the (path, hash) entry and writes it into the
+        repository directory. Returns record of the recovered file (None when
+        it was not recovered).
+        """
+        path, sha = entry
+        local_path = self.local_path(repository_dir, path)
+        if local_path is None:
+            self.fprint("Suspicious tracked path skipped: %s" % path)
+            return None
+
+        content = fetch_file(sha)
+        if content is None:
+            return None
+
+        try:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            with open(local_path, 'wb') as f:
+                f.write(content)
+        except (IOError, OSError) as e:
+            self.fprint("[ERROR] Unable to write recovered file: %s" % local_path)
+            self.fprint(repr(e))
+            return None
+
+        return {"url": base + quote(path), "path": local_path, "vcs": vcs}
+
+
+    def local_path(self, repository_dir, path):
+        """
+        Maps tracked path into the output directory. Absolute paths and paths
+        escaping the directory are refused (None).
+        """
+        components = [
+            c for c in path.replace('\\', '/').split('/') if c not in ['', '.']
+        ]
+        if not components or '..' in components or ':' in components[0]:
+            return None
+        return os.path.join(repository_dir, *components)
+
+
+    def fetch(self, url, limit):
+        """
+        Returns body of the response (at most 'limit' bytes are downloaded),
+        None when the resource is unavailable or larger than the limit.
+        """
+        try:
+            r = self.client.get_prefix(url, limit + 1, delay=self.DELAY)
+        except requests.exceptions.RequestException as e:
+            self.fprint("[ERROR] Request to %s failed." % url)
+            self.fprint(repr(e))
+            return None
+
+        if r.status_code != 200:
+            return None
+        if len(r.content) > limit:
+            self.fprint("Resource exceeds %s bytes, skipping: %s" % (limit, url))
+            return None
+        return r.content
+
+
+    def mprint(self, string):
+        """Module-specific print wrapper."""
+        print(" [%s]: %s" % (self.module_name, string))
+        self.fprint(string)
+
+
+    def fprint(self, string):
+        """Write into the current log file instead of STDOU."""
+        message = " [%s]: %s" % (self.module_name, string)
+        context.get_context(self.run_context).log(message)
@@ -0,0 +1,54 @@
+import core.utils as utils
+from .CandidateMiner import CandidateMiner
+
+
+class BodyParamMiner(CandidateMiner):
+    """
+        Responsible for discovering hidden body parameters of a form (POST
+        form data or JSON body). Candidate parameters are sent in the request
+        body together with the form's own fields (see CandidateMiner).
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+
+    def __init__(self, form, client, run_context=None):
+        super().__init__(form["action"], client, run_context)
+        self.form = form
+        self.candidate_name = "body parameter"
+
+        # Bodies are not limited as strictly as headers are, batches are
+        # limited by the number of parameters mostly.
+        self.MAX_BATCH_LENGTH = 65536
+        self.MAX_BATCH_SIZE = 256
+        self.CANDIDATE_OVERHEAD = 2 # '=' + '&'
+
+        self.candidate_list = [
+            x for x in self.obtain_list_from_payload_file("parameters.txt")
+            if x not in form["fields"]
+        ]
+
+
+    def random_candidate(self):
+        """Returns name of a parameter the target surely does not recognize."""
+        return utils.get_rnd_string(15)
+
+
+    def send(self, params):
+        """Submits the form with candidate parameters added to its fields."""
+        fields = dict(self.form["fields"])
+        fields.update(params)
+        return self.client.submit(self.form["method"], self.target, fields,
+            enctype=self.form["enctype"], delay=self.DELAY
+        )
+
+
+    def sent_values(self, params):
+        """Converts sent parameters into reflections understood by comparator."""
+        return [(name, value) for name, value in params.items()]
@@ -0,0 +1,225 @@
+import os
+import requests
+import core.utils as utils
+from core import context
+from core import wordlists
+from concurrent.futures import ThreadPoolExecutor
+from .ResponseComparator import ResponseComparator
+
+
+class CandidateMiner():
+    """
+        Base of miners discovering hidden inputs (headers, body parameters)
+        the target reacts to. Candidates are packed (each with its own canary)
+        into as few requests as the batch limits allow. Batches that change
+        the response are bisected until the effective candidates are isolated,
+        reflections are attributed by canaries.
+
+        Subclasses fill in the candidate list and implement send(),
+        sent_values() and random_candidate().
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+
+    def __init__(self, target, client, run_context=None):
+        self.target = target
+        self.client = client
+        self.run_context = run_context
+        self.module_name = "RequestMiner"
+        self.candidate_name = "candidate"
+
+        self.DELAY = 0.1
+        self.CANARY_LENGTH = 8
+        self.BASELINE_SAMPLES = 3
+        self.WORKERS = 4
+
+        # Total size of candidates packed into a single request, their count
+        # and the size each candidate adds on top of its name and canary.
+        self.MAX_BATCH_LENGTH = 4096
+        self.MAX_BATCH_SIZE = 64
+        self.CANDIDATE_OVERHEAD = 0
+
+        self.candidate_list = []
+
+        self.discovered = []
+        self.reflected = []
+
+
+    def mine(self):
+        """
+        Sends packed candidates to the target and returns a tuple of
+        (discovered candidates, reflected candidates).
+        """
+        try:
+            comparator = self.learn_baseline()
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR][Preflight] %s mining request failed (%s). Mining terminated." % (
+                self.candidate_name.capitalize(), e))
+            self.fprint(repr(e))
+            return ([], [])
+
+        batches = self.prepare_batches()
+        self.mprint("Mining %s %ss using %s requests." % (
+            len(self.candidate_list), self.candidate_name, len(batches)
+        ))
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            for discovered, reflected in executor.map(
+                lambda batch: self.mine_batch(batch, comparator), batches):
+                self.discovered += discovered
+                self.reflected += reflected
+
+        return (self.discovered, self.reflected)
+
+
+    def learn_baseline(self):
+        """
+        Learns the target response to requests with a random (surely not
+        recognized) candidate.
+        """
+        comparator = ResponseComparator()
+        for _ in range(self.BASELINE_SAMPLES):
+            candidates = {self.random_candidate(): utils.get_rnd_string(10)}
+            r = self.send(candidates)
+            comparator.learn(r, self.sent_values(candidates))
+
+        return comparator
+
+
+    def prepare_batches(self):
+        """
+        Splits candidates into batches that fit into the batch limits. Each
+        candidate is assigned its own canary value.
+        """
+        batches = []
+        batch = {}
+        batch_len = 0
+        for candidate in self.candidate_list:
+            candidate_len = len(candidate) + self.CANARY_LENGTH + self.CANDIDATE_OVERHEAD
+            if batch and (batch_len + candidate_len > self.MAX_BATCH_LENGTH
+                or len(batch) >= self.MAX_BATCH_SIZE):
+                batches.append(batch)
+                batch = {}
+                batch_len = 0
+
+            batch[candidate] = utils.get_rnd_string(self.CANARY_LENGTH)
+            batch_len += candidate_len
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+
+    def mine_batch(self, batch, comparator):
+        """
+        Sends a batch of candidates and returns lists of effective and
+        reflected candidates from the batch.
+        """
+        try:
+            r = self.send(batch)
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR][Discovery] %s mining request failed (%s)." % (
+                self.candidate_name.capitalize(), e))
+            self.fprint(repr(e))
+            return ([], [])
+
+        reflected = self.find_reflections(r, batch)
+        discovered = []
+        if comparator.is_anomalous(r, self.sent_values(batch)):
+            self.mprint("Found something... will try to pinpoint the %s." % self.candidate_name)
+            discovered = self.bisect(batch, comparator)
+            if discovered:
+                self.mprint("\t |-> Determined cause: %s" % discovered)
+
+        return (discovered, reflected)
+
+
+    def bisect(self, batch, comparator):
+        """
+        Isolates candidates responsible for the change of the response. Batch
+        is split in halves and only halves that still change the response are
+        split further.
+        """
+        if len(batch) == 1:
+            return list(batch.keys())
+
+        names = list(batch.keys())
+        middle = len(names) // 2
+        effective = []
+        for half in [names[:middle], names[middle:]]:
+            sub_batch = dict([(name, batch[name]) for name in half])
+            try:
+                r = self.send(sub_batch)
+            except requests.exceptions.RequestException as e:
+                self.mprint("[ERROR][Pinpointing] %s mining request failed (%s)." % (
+                    self.candidate_name.capitalize(), e))
+                self.fprint(repr(e))
+                continue
+
+            if comparator.is_anomalous(r, self.sent_values(sub_batch)):
+                if len(sub_batch) == 1:
+                    effective += half
+                else:
+                    effective += self.bisect(sub_batch, comparator)
+
+        return effective
+
+
+    def find_reflections(self, response, batch):
+        """
+        Returns candidates whose canaries are reflected in the response body
+        or in the response headers.
+        """
+        response_headers = ' '.join(response.headers.values())
+        reflected = []
+        for candidate, canary in batch.items():
+            if canary in response.text or canary in response_headers:
+                reflected.append(candidate)
+        return reflected
+
+
+    def random_candidate(self):
+        """Returns name of a candidate the target surely does not recognize."""
+        raise NotImplementedError
+
+
+    def send(self, candidates):
+        """Sends request to the target with given candidates."""
+        raise NotImplementedError
+
+
+    def sent_values(self, candidates):
+        """Converts sent candidates into reflections understood by comparator."""
+        raise NotImplementedError
+
+
+    def obtain_list_from_payload_file(self, file_name):
+        """Retrieves contents of the file and converts them into the list."""
+        path = os.path.join("payloads", file_name)
+
+        try:
+            return wordlists.load(file_name)
+        except IOError as e:
+            self.mprint("[ERROR] Unable to retrieve file: %s " % path)
+            self.fprint(repr(e))
+        return wordlists.Wordlist([])
+
+
+    def mprint(self, string):
+        """Module-specific print wrapper."""
+        print(" [%s]: %s" % (self.module_name, string))
+        self.fprint(string)
+
+
+    def fprint(self, string):
+        """Write into the current log file instead of STDOU."""
+        message = " [%s]: %s" % (self.module_name, string)
+        context.get_context(self.run_context).log(message)
@@ -0,0 +1,45 @@
+import core.utils as utils
+from .CandidateMiner import CandidateMiner
+
+
+class HeaderMiner(CandidateMiner):
+    """
+        Responsible for discovering hidden request headers the target reacts
+        to. Candidate headers are packed into as few requests as the target's
+        header limits allow (see CandidateMiner).
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+
+    def __init__(self, target, client, run_context=None):
+        super().__init__(target, client, run_context)
+        self.candidate_name = "header"
+
+        # Total size of headers packed into a single request and their count.
+        self.MAX_BATCH_LENGTH = 4096
+        self.MAX_BATCH_SIZE = 64
+        self.CANDIDATE_OVERHEAD = 4 # ': ' + CRLF
+
+        self.candidate_list = self.obtain_list_from_payload_file("headers.txt")
+
+
+    def random_candidate(self):
+        """Returns name of a header the target surely does not recognize."""
+        return "X-%s" % utils.get_rnd_string(10)
+
+
+    def send(self, headers):
+        """Sends request to the target with given headers."""
+        return self.client.get(self.target, headers=headers, delay=self.DELAY)
+
+
+    def sent_values(self, headers):
+        """Converts sent headers into reflections understood by comparator."""
+        return [(None, value) for value in headers.values()]
@@ -1,5 +1,6 @@
 from core import constants as Consts
 from core import utils as utils
+from core.helpers import PagedTable
 from urllib.parse import urlparse, parse_qs
 
 
@@ -40,6 +41,7 @@ class Presenter():
     def present_content(self, presentation_style):
         """
         Returns content ready for presentation in style specified by parameter.
+        Content is a generator of output fragments.
         """
         self.style = presentation_style
         return {
@@ -56,60 +58,210 @@ class Presenter():
         """
         results = self.results['RequestMiner']['results']['parsable']
 
-        content = Consts.EMPTY_STRING
         if len(results) > 0:
             # There are results to be presented
-            content += self.get_results_table(results)
+            yield from self.get_results_table(results)
         else:
-            content += self.get_no_data()
-
-        return content
+            yield self.get_no_data()
 
 
     def get_results_table(self, results):
-        """Returns information collected by the RequestsMiner module."""
+        """Yields information collected by the RequestsMiner module."""
+        yield from self.get_hidden_params_table(results)
+        yield from self.get_hidden_headers_table(results)
+        yield from self.get_body_forms_table(results)
+        yield from self.get_existing_params_table(results)
+        yield from self.get_existing_headers_table(results)
+
+
+    def get_hidden_params_table(self, results):
+        """Yields table of hidden URL parameters mined on each endpoint."""
         if self.style == 'BWFormal':
-            
-            table_3 = """
+            yield PagedTable("""
             <h5>List of Discovered Hidden URL Parameters</h5>
-            <p>These parameters were mined on URL: %s</p>
+            <p>These parameters were mined on the following URLs:</p>
             <table>
             <tr>
+                <th>Mined URL</th>
                 <th>Parameter name</th>
                 <th>Reflected?</th>
             </tr>
-            """ % utils.encode_for_html(results["hidden_params"]["source_url"])
+            """, self.get_hidden_params_rows(results), "</table>")
+        else:
+            yield """
+LIST OF DISCOVERED HIDDEN URL PARAMETERS
 
-            discovered_params = results["hidden_params"]["discovered"]
-            reflected_params = results["hidden_params"]["reflected"]
+Format: Mined URL | Parameter name | Is reflected?
+\n
+            """
+
+            for url, record in self.get_mined_endpoints(results).items():
+                for param in record["discovered"]:
+                    
+                    if param in record["reflected"]:
+                        reflected = "Yes"
+                    else:
+                        reflected = "No"
+
+                    yield "%s | %s | %s \n" % (
+                        url,
+                        param,
+                        reflected
+                    )
             
-            for param in discovered_params:
+            yield "\n"
+
+
+    def get_hidden_params_rows(self, results):
+        """Yields HTML rows of the hidden URL parameters table."""
+        for url, record in self.get_mined_endpoints(results).items():
+            for param in record["discovered"]:
                 
-                if param in reflected_params:
+                if param in record["reflected"]:
                     reflected = "Yes"
                 else:
                     reflected = "No"
 
-                table_3 += "<tr><td>%s</td><td>%s</td></tr>" % (
+                yield "<tr><td>%s</td><td>%s</td><td>%s</td></tr>" % (
+                    utils.encode_for_html(url),
                     utils.encode_for_html(param),
                     reflected
                 )
-            
-            table_3 += "</table>"
 
-            
-            
-            table_1 = """
+
+    def get_hidden_headers_table(self, results):
+        """Yields table of mined hidden request headers (if there are any)."""
+        hidden_headers = results.get("hidden_headers")
+        if not hidden_headers or not hidden_headers["discovered"] + hidden_headers["reflected"]:
+            return
+
+        if self.style == 'BWFormal':
+            yield """
+                <h5>List of Discovered Hidden Request Headers</h5>
+                <p>These headers were mined on URL: %s</p>
+                <table>
+                <tr>
+                    <th>Header name</th>
+                    <th>Changes response?</th>
+                    <th>Reflected?</th>
+                </tr>
+                """ % utils.encode_for_html(hidden_headers["source_url"])
+
+            for header in self.get_mined_headers(hidden_headers):
+                yield "<tr><td>%s</td><td>%s</td><td>%s</td></tr>" % (
+                    utils.encode_for_html(header),
+                    "Yes" if header in hidden_headers["discovered"] else "No",
+                    "Yes" if header in hidden_headers["reflected"] else "No"
+                )
+
+            yield "</table>"
+        else:
+            yield """
+LIST OF DISCOVERED HIDDEN REQUEST HEADERS
+
+These headers were mined on URL: %s
+
+Format: Header name | Changes response? | Is reflected?
+\n
+""" % hidden_headers["source_url"]
+
+            for header in self.get_mined_headers(hidden_headers):
+                yield "%s | %s | %s \n" % (
+                    header,
+                    "Yes" if header in hidden_headers["discovered"] else "No",
+                    "Yes" if header in hidden_headers["reflected"] else "No"
+                )
+
+
+    def get_body_forms_table(self, results):
+        """Yields table of forms submitting request body (if there are any)."""
+        forms = self.get_body_forms(results)
+        if not forms:
+            return
+
+        if self.style == 'BWFormal':
+            yield """
+                <h5>List of Detected Forms Submitting Request Body</h5>
+                <table>
+                <tr>
+                    <th>Action</th>
+                    <th>Method (Encoding)</th>
+                    <th>Fields</th>
+                    <th>Reflected fields</th>
+                    <th>Hidden parameters</th>
+                </tr>
+                """
+
+            for form in forms:
+                yield "<tr><td>%s</td><td>%s (%s)</td><td>%s</td><td>%s</td><td>%s</td></tr>" % (
+                    utils.encode_for_html(form["action"]),
+                    utils.encode_for_html(form["method"]),
+                    utils.encode_for_html(form["enctype"]),
+                    utils.encode_for_html(', '.join(form["fields"])),
+                    utils.encode_for_html(', '.join(form["reflected"])),
+                    utils.encode_for_html(', '.join(self.get_hidden_body_params(form)))
+                )
+
+            yield "</table>"
+        else:
+            yield """
+LIST OF DETECTED FORMS SUBMITTING REQUEST BODY
+
+Format: Action | Method (Encoding) | Fields | Reflected fields | Hidden parameters
+\n
+"""
+
+            for form in forms:
+                yield "%s | %s (%s) | %s | %s | %s \n" % (
+                    form["action"],
+                    form["method"],
+                    form["enctype"],
+                    ', '.join(form["fields"]),
+                    ', '.join(form["reflected"]),
+                    ', '.join(self.get_hidden_body_params(form))
+                )
+
+
+    def get_existing_params_table(self, results):
+        """Yields table of URL parameters detected in crawled URLs."""
+        if self.style == 'BWFormal':
+            yield PagedTable("""
             <h5>List of Detected URL Parameters in Use</h5>
             <table>
             <tr>
                 <th>Parameter name</th>
                 <th>Details</th>
             </tr>
-            """
+            """, self.get_existing_params_rows(results), "</table>")
+        else:
+            yield """
+LIST OF DETECTED URL PARAMETERS IN USE
+
+Format: Parameter name | Details
+\n
+"""
 
             for param, record in results["existing_params"].items():
-                table_1 += """<tr>
+                yield """
+%s | (Format: Source | Values | Is Reflected?) 
+
+""" % param
+                sources = self.classify_param_sources(record["sources"])
+                yield "\n\t"
+                for _, values in sources.items():
+                    yield values[0] + ", "
+                yield "\t"
+                values = ', '.join([str(x) for x in record["values"]])
+                yield "| %s \n" % values
+
+
+    def get_existing_params_rows(self, results):
+        """
+        Yields HTML rows of the existing URL parameters table, a single row
+        (with nested table of details) for every parameter.
+        """
+        for param, record in results["existing_params"].items():
+            row = ["""<tr>
                 <td>%s</td>
                 <td>
                     <table>
@@ -117,116 +269,106 @@ class Presenter():
                         <th>Source</th>
                         <th>Values</th>
                         <th>Is reflected?</th>
-                    </tr>""" % utils.encode_for_html(param)
+                    </tr>""" % utils.encode_for_html(param)]
 
-                
-                sources = self.classify_param_sources(record["sources"])
+            
+            sources = self.classify_param_sources(record["sources"])
 
-                table_1 += "<tr><td>"
-                for _, values in sources.items():
-                    table_1 += utils.encode_for_html(values[0]) + "<br>"
-                table_1 += "</td>"
+            row.append("<tr><td>")
+            for _, values in sources.items():
+                row.append(utils.encode_for_html(values[0]) + "<br>")
+            row.append("</td>")
 
-                table_1 += "<td>"
-                values = ', '.join(
-                    [utils.encode_for_html(str(x)) for x in record["values"]]
-                )
-                
+            row.append("<td>")
+            values = ', '.join(
+                [utils.encode_for_html(str(x)) for x in record["values"]]
+            )
+            
 
-                table_1 += "%s</td></tr></table>" % values
-                table_1 += """
+            row.append("%s</td></tr></table>" % values)
+            row.append("""
                 </td>
-                </tr>"""
+                </tr>""")
 
-            table_1 += "</table>"
+            yield ''.join(row)
 
-            # Return also a table of discovered headers
 
-            table_2 = """
+    def get_existing_headers_table(self, results):
+        """Yields table of non-standard headers detected in crawled responses."""
+        if self.style == 'BWFormal':
+            yield PagedTable("""
             <h5>List of Detected Non-Standard Headers in Use</h5>
             <table>
                 <tr>
                     <th>Header name</th>
                 </tr>
-            """
+            """, [
+                "<tr><td>%s</td></tr>" % utils.encode_for_html(header)
+                for header in results["existing_headers"]
+            ], "</table>")
 
-            for header in results["existing_headers"]:
-                table_2 += "<tr><td>%s</td></tr>" % utils.encode_for_html(
-                    header
-                )
-
-            table_2 += """
-            </table>
+            yield """
 
             <p>Previous table does not include required and the most common 
             headers.</p>
             """
-
-            return table_3 + table_1 + table_2
         else:
-            table_3 = """
-LIST OF DISCOVERED HIDDEN URL PARAMETERS
-
-These parameters were mined on URL: %s
-
-
-Format: Parameter name | Is reflected?
-\n
-            """ % results["hidden_params"]["source_url"]
-
-            discovered_params = results["hidden_params"]["discovered"]
-            reflected_params = results["hidden_params"]["reflected"]
-            
-            for param in discovered_params:
-                
-                if param in reflected_params:
-                    reflected = "Yes"
-                else:
-                    reflected = "No"
+            yield """
+LIST OF DETECTED NON-STANDARD HEADERS IN USE
 
-                table_3 += "%s | %s \n" % (
-                    param,
-                    reflected
-                )
-            
-            table_3 += "\n"
+Names: 
+"""
 
-            
-            
-            table_1 = """
-LIST OF DETECTED URL PARAMETERS IN USE
+            yield ', '.join([str(x) for x in results["existing_headers"]])
 
-Format: Parameter name | Details
-\n
+            yield """\n\n
+Previous table does not include required and the most common headers.
 """
 
-            for param, record in results["existing_params"].items():
-                table_1 += """
-%s | (Format: Source | Values | Is Reflected?) 
 
-""" % param
-                sources = self.classify_param_sources(record["sources"])
-                table_1 += "\n\t"
-                for _, values in sources.items():
-                    table_1 += values[0] + ", "
-                table_1 += "\t"
-                values = ', '.join([str(x) for x in record["values"]])
-                table_1 += "| %s \n" % values
+    def get_mined_headers(self, hidden_headers):
+        """Returns unique names of headers that were discovered or reflected."""
+        headers = []
+        for header in hidden_headers["discovered"] + hidden_headers["reflected"]:
+            if header not in headers:
+                headers.append(header)
+        return headers
 
-            # Return also a table of discovered headers
 
-            table_2 = """
-LIST OF DETECTED NON-STANDARD HEADERS IN USE
+    def get_body_forms(self, results):
+        """Returns forms submitting body (empty for results without them)."""
+        return results.get("body_params", {}).get("forms", [])
 
-Names: 
-"""
 
-            x_headers = ', '.join([str(x) for x in results["existing_headers"]])
+    def get_hidden_body_params(self, form):
+        """
+        Returns hidden body parameters of the form, reflected ones are marked
+        with an asterisk.
+        """
+        hidden = form["hidden"]
+        params = []
+        for param in hidden["discovered"] + hidden["reflected"]:
+            marked = param + "*" if param in hidden["reflected"] else param
+            if marked not in params:
+                params.append(marked)
+        return params
+
 
-            table_2 += """\n\n
-Previous table does not include required and the most common headers.
-"""
-            return table_3 + table_1 + table_2
+    def get_mined_endpoints(self, results):
+        """
+        Returns hidden parameters grouped by the URL they were mined on. 
+        Results without per-endpoint records are treated as mined on the
+        single source URL.
+        """
+        hidden_params = results["hidden_params"]
+        if hidden_params.get("endpoints"):
+            return hidden_params["endpoints"]
+        return {
+            hidden_params["source_url"]: {
+                "discovered": hidden_params["discovered"],
+                "reflected": hidden_params["reflected"]
+            }
+        }
 
     
     def classify_param_sources(self, sources):
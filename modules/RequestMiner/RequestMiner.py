@@ -1,15 +1,18 @@
 import os
-import random
+import threading
 import requests
 import core.utils as utils
-import core.config as cfg
+from core import context
+from core import client
+from core import wordlists
 from core.helpers import URLHelper
 from requests.models import PreparedRequest
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-from urllib.parse import urlparse, urljoin, parse_qs, parse_qsl
-from time import sleep
+from urllib.parse import urlparse, parse_qs, parse_qsl, quote_plus
+from concurrent.futures import ThreadPoolExecutor
 from . import Presenter as p
+from . import HeaderMiner as _HM
+from . import BodyParamMiner as _BPM
+from .ResponseComparator import ResponseComparator
 
 
 class RequestMiner():
@@ -40,14 +43,49 @@ class RequestMiner():
         self.sitecopier_results = {}
 
         self.URLHelper = URLHelper()
+        self.client = client.get_client()
+        self.run_context = None
 
         self.DELAY = 0.1
         self.CANARY_LENGTH = 8
         self.MAX_REFLECTION_REQUESTS = 10
+        self.BATCH_REFLECTION_TESTS = True
 
         self.URLPARAM_DISCOVERY_HEURISTICS = "START_PAGE"
+        self.MAX_MINED_ENDPOINTS = 5
+        self.MINING_WORKERS = 4
         self.MAX_ACCEPTED_URL_LENGTH = 2000 # Sourced: https://stackoverflow.com/a/417184/
 
+        # Targets silently drop parameters over their own limit (PHP's
+        # max_input_vars defaults to 1000), dropped ones would never be found.
+        self.MAX_PARAMS_PER_REQUEST = 1000
+
+        # Real limits of the target are probed before mining starts, the
+        # static MAX_ACCEPTED_URL_LENGTH is only used when probing is off or
+        # when it fails.
+        self.PROBE_TARGET_LIMITS = True
+        self.MAX_PROBED_URL_LENGTH = 16384
+        self.MAX_PROBED_HEADER_LENGTH = 16384
+        self.LIMIT_PROBE_PRECISION = 256
+        self.max_url_length = self.MAX_ACCEPTED_URL_LENGTH
+        self.max_header_length = None
+
+        # Total size of mined headers sent in a single request. The probed
+        # limit is that of a single header value and only lowers this cap.
+        self.MAX_ACCEPTED_HEADER_LENGTH = 4096
+
+        self.MINE_HIDDEN_HEADERS = True
+        self.MAX_HEADERS_PER_REQUEST = 64
+
+        # Forms are submitted (POST requests with possible side effects on
+        # the target) only when body parameter mining is turned on.
+        self.MINE_BODY_PARAMS = False
+        self.MAX_MINED_FORMS = 5
+        self.MAX_BODY_PARAMS_PER_REQUEST = 256
+
+        # Number of baseline requests used to learn dynamic response parts.
+        self.BASELINE_SAMPLES = 3
+
         # struct[param] = {
         #   "sources": ['url1', 'url2', 'url3'],
         #   "values": ['value1', 'value2', 'value3'],
@@ -56,13 +94,39 @@ class RequestMiner():
         # }
         self.discovered_params = {}
         self.discovered_headers = []
-        self.hidden_params = {
+        self.hidden_headers = {
             "discovered": [],
             "reflected": [],
             "source_url": ""
         }
+        self.hidden_params = {
+            "discovered": [],
+            "reflected": [],
+            "source_url": "",
+            "endpoints": {}
+        }
+
+        # struct["forms"] = [{
+        #   "action": 'url', "method": 'POST', "enctype": 'enctype',
+        #   "fields": {field: default value},
+        #   "source": 'url', "source_id": id,
+        #   "reflected": ['field1', 'field2'],
+        #   "hidden": {"discovered": ['param1'], "reflected": ['param1']}
+        # }]
+        self.body_params = {
+            "forms": []
+        }
 
         self.url_discovery_parameters = []
+
+        # Crawled HTML pages (candidates for hidden parameter mining), learned
+        # baselines per mined endpoint and parameters found on any endpoint.
+        self.crawled_pages = []
+        self.baseline_cache = {}
+        self.baseline_locks = {}
+        self.baseline_lock = threading.Lock()
+        self.mined_params = []
+        self.mined_params_lock = threading.Lock()
     
     
     def mprint(self, string):
@@ -73,13 +137,8 @@ class RequestMiner():
     
     def fprint(self, string):
         """Write into the current log file instead of STDOU."""
-        file_name = os.path.join(".", "output", cfg.CURRENT_RUN_ID, "run.log")
         message = " [%s]: %s" % (self.module_name, string)
-        try:
-            with open(file_name, 'a') as f:
-                f.write(message + '\n')
-        except IOError:
-            print("[DBG-ERROR] Unable to write to file: %s" % file_name)
+        context.get_context(self.run_context).log(message)
     
 
     def execute(self, param):
@@ -87,7 +146,7 @@ class RequestMiner():
         self.target = param
 
         # Existing parameters & headers discovery
-        source = os.path.join("output", cfg.CURRENT_RUN_ID, "SiteCopier")
+        source = context.get_context(self.run_context).module_dir("SiteCopier")
         for id in range(len(os.listdir(source))):
             url = self.obtain_id_url(id)
             if not self.URLHelper.is_in_scope(self.target, url):
@@ -104,28 +163,56 @@ class RequestMiner():
             self.discover_headers(headers))
             self.add_discovered_headers(discovered_headers)
 
-        self.mprint("%s parameters & %s headers detected." % (
-            len(self.discovered_params), len(self.discovered_headers)
+            # HTML pages are the candidates for hidden parameter mining
+            mime_type = utils.get_mimetype_from_headers_file(headers)
+            if mime_type and utils.extract_mime_type(mime_type) == 'text/html':
+                self.crawled_pages.append(url)
+
+        # Parameters of forms found by the crawler
+        self.add_discovered_forms(self.obtain_forms())
+
+        self.mprint("%s parameters, %s headers & %s body forms detected." % (
+            len(self.discovered_params), len(self.discovered_headers),
+            len(self.body_params["forms"])
         ))
 
 
         # Find hidden URL parameters
-        pd_target = self.urlparam_startpage_heuristics()
-        self.hidden_params["source_url"] = pd_target
+        endpoints = self.rank_mining_endpoints()
+        self.hidden_params["source_url"] = endpoints[0]
+        if self.PROBE_TARGET_LIMITS:
+            self.probe_target_limits(endpoints[0])
         self.mprint(
-            "Initializing parameter mining: %s" % pd_target
+            "Initializing parameter mining on %s endpoint(s): %s" % (
+                len(endpoints), ', '.join(endpoints))
         )
-        discovered_ps, reflected_ps = self.discover_hidden_url_parameters(pd_target)
-        self.hidden_params["discovered"] = discovered_ps
-        self.hidden_params["reflected"] = reflected_ps
-        self.mprint("Discovered params: %s | Reflecting params: %s" % (len(discovered_ps), len(reflected_ps)))
+        self.mine_endpoints(endpoints)
+        self.mprint("Discovered params: %s | Reflecting params: %s" % (
+            len(self.hidden_params["discovered"]), 
+            len(self.hidden_params["reflected"])
+        ))
+
 
+        # Find hidden Headers
+        if self.MINE_HIDDEN_HEADERS:
+            self.mine_hidden_headers(endpoints[0])
 
-        # FUTURE: Find hidden Headers
+        # Find hidden body parameters of the forms
+        if self.MINE_BODY_PARAMS:
+            self.mprint("[WARNING] Body parameter mining submits %s form(s) to the target." % (
+                len(self.get_mined_forms())
+            ))
+            self.mine_hidden_body_params()
 
         # Detect existing url parameter reflections.
+        if self.BATCH_REFLECTION_TESTS:
+            batched_reflections = self.test_parameter_reflections_batched()
+
         for param_name, param_record in self.discovered_params.items():
-            reflections = self.test_parameter_reflection(param_name, param_record)
+            if self.BATCH_REFLECTION_TESTS:
+                reflections = batched_reflections[param_name]
+            else:
+                reflections = self.test_parameter_reflection(param_name, param_record)
             if reflections:
                 # Update discovered qpars structure with reflects: True and reflects on.
                 self.mprint("Parameter %s reflects!" % param_name)
@@ -134,6 +221,10 @@ class RequestMiner():
             else:
                 self.fprint("Nope, Param %s does not reflect." % param_name)
 
+        # Detect reflections of form fields sent in request body.
+        if self.MINE_BODY_PARAMS:
+            self.test_body_reflections()
+
         # FUTURE: Evaluate security standing for discovered headers (will require
         # keeping values of the headers (not currently doing that... aaah) - or
         # maybe calling securityheaders.com instead?)
@@ -142,48 +233,229 @@ class RequestMiner():
         self.mprint("Request mining completed....")
 
 
-    def discover_hidden_url_parameters(self, target):
+    def mine_hidden_headers(self, target):
+        """
+        Mines hidden request headers on the target. Total size of a batch is
+        capped by MAX_ACCEPTED_HEADER_LENGTH and by the probed header limit
+        when it is known.
+        """
+        HM = _HM.HeaderMiner(target, self.client, self.run_context)
+        HM.DELAY = self.DELAY
+        HM.CANARY_LENGTH = self.CANARY_LENGTH
+        HM.BASELINE_SAMPLES = self.BASELINE_SAMPLES
+        HM.WORKERS = self.MINING_WORKERS
+        HM.MAX_BATCH_SIZE = self.MAX_HEADERS_PER_REQUEST
+        HM.MAX_BATCH_LENGTH = self.MAX_ACCEPTED_HEADER_LENGTH
+        if self.max_header_length:
+            HM.MAX_BATCH_LENGTH = min(self.max_header_length, HM.MAX_BATCH_LENGTH)
+
+        self.mprint("Initializing header mining: %s" % target)
+        discovered_hs, reflected_hs = HM.mine()
+        self.hidden_headers = {
+            "discovered": discovered_hs,
+            "reflected": reflected_hs,
+            "source_url": target
+        }
+        self.mprint("Discovered headers: %s | Reflecting headers: %s" % (
+            len(discovered_hs), len(reflected_hs)
+        ))
+
+
+    def mine_hidden_body_params(self):
+        """
+        Mines hidden body parameters on (up to MAX_MINED_FORMS) forms that
+        submit their fields in the request body.
+        """
+        for form in self.get_mined_forms():
+            BPM = _BPM.BodyParamMiner(form, self.client, self.run_context)
+            BPM.DELAY = self.DELAY
+            BPM.CANARY_LENGTH = self.CANARY_LENGTH
+            BPM.BASELINE_SAMPLES = self.BASELINE_SAMPLES
+            BPM.WORKERS = self.MINING_WORKERS
+            BPM.MAX_BATCH_SIZE = self.MAX_BODY_PARAMS_PER_REQUEST
+
+            self.mprint("Initializing body parameter mining: %s %s" % (
+                form["method"], form["action"]
+            ))
+            discovered_ps, reflected_ps = BPM.mine()
+            form["hidden"] = {
+                "discovered": discovered_ps,
+                "reflected": reflected_ps
+            }
+            self.mprint("Discovered body params: %s | Reflecting body params: %s" % (
+                len(discovered_ps), len(reflected_ps)
+            ))
+
+
+    def get_mined_forms(self):
+        """Returns (up to MAX_MINED_FORMS) body forms that may be submitted."""
+        return self.body_params["forms"][:max(self.MAX_MINED_FORMS, 0)]
+
+
+    def mine_endpoints(self, endpoints):
+        """
+        Mines hidden parameters on all given endpoints. Groups of similar 
+        endpoints are mined concurrently, endpoints within the group one 
+        after another, so that parameters found on one of them can be tried
+        on the rest of the group first.
+        """
+        for endpoint in endpoints:
+            self.hidden_params["endpoints"][endpoint] = {
+                "discovered": [], "reflected": []
+            }
+
+        groups = self.group_similar_endpoints(endpoints)
+        with ThreadPoolExecutor(max_workers=self.MINING_WORKERS) as executor:
+            for group_results in executor.map(self.mine_endpoint_group, groups):
+                for endpoint, discovered_ps, reflected_ps in group_results:
+                    self.hidden_params["endpoints"][endpoint] = {
+                        "discovered": discovered_ps,
+                        "reflected": reflected_ps
+                    }
+
+        # Flat lists of parameters (kept for consumers that do not care
+        # about the endpoint the parameter was mined on).
+        for endpoint in endpoints:
+            record = self.hidden_params["endpoints"][endpoint]
+            for param in record["discovered"]:
+                if param not in self.hidden_params["discovered"]:
+                    self.hidden_params["discovered"].append(param)
+            for param in record["reflected"]:
+                if param not in self.hidden_params["reflected"]:
+                    self.hidden_params["reflected"].append(param)
+
+
+    def mine_endpoint_group(self, group):
+        """
+        Mines group of similar endpoints. Parameters discovered on endpoints 
+        of the group are put in front of the parameter list for the following
+        ones, then parameters discovered elsewhere and then the rest.
+        """
+        results = []
+        group_params = []
+        for endpoint in group:
+            with self.mined_params_lock:
+                priority = group_params + [
+                    x for x in self.mined_params if x not in group_params
+                ]
+
+            self.mprint("Mining parameters on: %s" % endpoint)
+            discovered_ps, reflected_ps = self.discover_hidden_url_parameters(
+                endpoint, priority
+            )
+            results.append((endpoint, discovered_ps, reflected_ps))
+
+            for param in discovered_ps:
+                if param in self.url_discovery_parameters and param not in group_params:
+                    group_params.append(param)
+            with self.mined_params_lock:
+                for param in group_params:
+                    if param not in self.mined_params:
+                        self.mined_params.append(param)
+
+        return results
+
+
+    def group_similar_endpoints(self, endpoints):
+        """
+        Groups endpoints by their directory. Endpoints living in the same 
+        directory are likely to be handled by the same code and share their
+        parameters.
+        """
+        groups = {}
+        for endpoint in endpoints:
+            path = urlparse(endpoint).path
+            directory = path[:path.rfind('/') + 1] if '/' in path else '/'
+            if directory not in groups:
+                groups[directory] = [endpoint]
+            else:
+                groups[directory].append(endpoint)
+
+        return list(groups.values())
+
+
+    def get_baseline(self, target):
+        """
+        Returns learned baseline for given endpoint. Baselines are learned
+        only once per endpoint and cached. Target is requested with several
+        random (non-existent) parameters, so the comparator can learn which
+        parts of the response are dynamic.
+        """
+        # Workers mining the same endpoint wait for the one learning its 
+        # baseline instead of learning it again.
+        with self.baseline_lock:
+            target_lock = self.baseline_locks.setdefault(target, threading.Lock())
+
+        with target_lock:
+            if target in self.baseline_cache:
+                return self.baseline_cache[target]
+
+            baseline = self.learn_baseline(target)
+            self.baseline_cache[target] = baseline
+            return baseline
+
+
+    def learn_baseline(self, target):
+        """
+        Requests the target with BASELINE_SAMPLES random parameters and 
+        returns baseline with the learned comparator. When the first random
+        parameter is reflected, its name is recorded as reflecting_param.
+        """
+        comparator = ResponseComparator()
+        reflecting_param = None
+        for sample in range(self.BASELINE_SAMPLES):
+            non_existing_q_param = utils.get_rnd_string(15)
+            non_existing_q_param_value = utils.get_rnd_string(10)
+            pne_r = self.client.get(
+                self.URLHelper.add_query_string_param(
+                    target, non_existing_q_param, non_existing_q_param_value
+                ), delay=self.DELAY)
+            comparator.learn(pne_r, 
+                [(non_existing_q_param, non_existing_q_param_value)]
+            )
+
+            # Randomly generated query string param was discovered in the
+            # response, there is a strong chance that every string param 
+            # is reflected.
+            if sample == 0 and (non_existing_q_param in pne_r.text 
+                or non_existing_q_param_value in pne_r.text):
+                reflecting_param = non_existing_q_param
+
+        self.fprint("Learned baseline noise for %s: %s line(s)." % (
+            target, comparator.noise
+        ))
+
+        return {
+            "comparator": comparator,
+            "reflects_everything": reflecting_param is not None,
+            "reflecting_param": reflecting_param
+        }
+
+
+    def discover_hidden_url_parameters(self, target, priority_params=[]):
         """
         Rains down the furious requeststorm upon thy target to figure out what
         parameters it had enshrouded.
         """
-        discovery_urls, canaries = self.prepare_param_discovery_urls(target)
+        discovery_urls, canaries = self.prepare_param_discovery_urls(
+            target, priority_params
+        )
         discovered_params = []
         reflected_params = []
         
-        # Preliminary analysis of target response to certain requests.
-        ok_response = {}
-        non_existing_q_param = utils.get_rnd_string(15)
-        non_existing_q_param_value = utils.get_rnd_string(10)
-        param_not_exists_response = {}
         try:
-            std_r = self._retry_session().get(target)
-            ok_response["code"] = std_r.status_code
-            ok_response["text"] = std_r.text
-            ok_response["headers"] = std_r.headers
-
-            pne_r = self._retry_session().get(
-                self.URLHelper.add_query_string_param(
-                    target, non_existing_q_param, non_existing_q_param_value
-                ))
-            param_not_exists_response["code"] = pne_r.status_code
-            param_not_exists_response["text"] = pne_r.text
-            param_not_exists_response["headers"] = pne_r.headers
-
-            # Randomly generated query string param was discovered in the response,
-            # there is a strong chance that every string param is reflected.
-            if (non_existing_q_param in param_not_exists_response["text"] 
-                or non_existing_q_param_value in param_not_exists_response["text"]):
-                discovered_params.append(non_existing_q_param)
-                reflected_params.append(non_existing_q_param)
-        
+            baseline = self.get_baseline(target)
         except requests.exceptions.RequestException as e:
             self.mprint("[ERROR][Preflight] Mining request failed (%s). Mining ops terminated." % e)
             self.fprint(repr(e))
-            return []
+            return ([], [])
+
+        if baseline["reflects_everything"]:
+            discovered_params.append(baseline["reflecting_param"])
+            reflected_params.append(baseline["reflecting_param"])
 
-        hidden_parameters = self.mine_hidden_parameters(discovery_urls, 
-            canaries, ok_response, param_not_exists_response
+        hidden_parameters = self.mine_hidden_parameters(target, discovery_urls, 
+            canaries, baseline["comparator"]
         )
 
         discovered_params += hidden_parameters["discovered"]
@@ -192,49 +464,37 @@ class RequestMiner():
         return (discovered_params, reflected_params)
 
 
-    def mine_hidden_parameters(self, urls, canaries, ref_ok, ref_pne):
+    def mine_hidden_parameters(self, target, urls, canaries, comparator):
         """
         Sends requests to prepared discovery URLs and returns lists of 
-        discovered parameters & list of reflective parameters.
-
-        FUTURE: Calculate the difference between .text responses and use it as an indicator.
+        discovered parameters & list of reflective parameters. A batch is
+        investigated further only when its response differs from the learned
+        baseline by more than the baseline noise.
         """
         reflected_params = []
         discovered_params = []
         run_through = 0
         for url in urls:
             try:
-                r = self._retry_session().get(url)
-                # Indicators of whether parameter has any effect
-                # [code, headers, text], forEach x, x € [0, 0.5, 1]
-                indicators = [
-                self.rate_indicators(
-                    r.status_code, 
-                    ref_ok["code"], 
-                    ref_pne["code"]
-                ),
-                self.rate_indicators(
-                    len(r.headers), 
-                    len(ref_ok["headers"]), 
-                    len(ref_pne["headers"])
-                ),
-                self.rate_indicators(
-                    len(r.text), len(ref_ok["text"]), len(ref_pne["text"]))
+                r = self.client.get(url, delay=self.DELAY)
+                sent = [
+                    (name, value) for name, value in parse_qsl(urlparse(url).query)
+                    if canaries.get(name) == value
                 ]
 
                 # Look for canaries & responsible parameters
-                if sum(indicators) > 0:
+                if comparator.is_anomalous(r, sent):
                     self.mprint("Found something... will try to pinpoint the parameter.")
-                    effective_params = self.identify_parameter(url, ref_ok, ref_pne)
+                    effective_params = self.identify_parameter(
+                        target, url, comparator, canaries
+                    )
                     if effective_params:
                         self.mprint("\t |-> Determined cause: %s" % effective_params)
                         discovered_params += effective_params
 
-                    for name, value in canaries.items():
-                        if value in r.text:
-                            reflected_params.append(name)
-
-                sleep(self.DELAY)
+                for name, value in sent:
+                    if value in r.text:
+                        reflected_params.append(name)
 
             except requests.exceptions.RequestException as e:
                 self.mprint("[ERROR][Discovery] Mining request failed (%s). Mining ops terminated." % e)
@@ -251,105 +511,100 @@ class RequestMiner():
         return {"reflected": reflected_params, "discovered": discovered_params}
 
 
-    def identify_parameter(self, url, ok, notok):
+    def identify_parameter(self, target, url, comparator, canaries):
         """
         Identifies parameters in URL that are responsible for detected changes
-        in the way target application replies. Request heavy and calls it off
-        when more than half of the batch of parameters influence responses.
+        in the way target application replies. Parameters of the batch are 
+        bisected, so a single effective parameter of N costs ~2*log2(N) 
+        requests.
         """
-        added_params = list(
-            set(
-                list(parse_qs(urlparse(url).query).keys())
-            ) & set(self.url_discovery_parameters)
-        )
-        effective_params = []
+        present = parse_qs(urlparse(target).query).keys()
+        batch = dict([
+            (name, value) for name, value in parse_qsl(urlparse(url).query)
+            if name in self.url_discovery_parameters and name not in present
+            and canaries.get(name) == value
+        ])
+        return self.bisect_parameters(target, batch, comparator)
 
-        for _ in range(len(added_params)):
-            to_append = added_params.pop()
-            appended = self.URLHelper.add_query_string_param(
-                self.urlparam_startpage_heuristics(), 
-                to_append, utils.get_rnd_string()
-            )
-            try:
-                r = self._retry_session().get(appended)
-                
-                ci = self.rate_indicators(
-                    r.status_code, ok["code"], notok["code"]
-                )
-                hi = self.rate_indicators(
-                    len(r.headers), len(ok["headers"]), len(notok["headers"])
-                )
-                ti = self.rate_indicators(
-                    len(r.text), len(ok["text"]), len(notok["text"])
-                )
 
-                if sum([ci, hi, ti]) > 0:
-                    effective_params.append(to_append)
-                
-                sleep(self.DELAY)
-            
+    def bisect_parameters(self, target, batch, comparator):
+        """
+        Isolates parameters responsible for the change of the response. Batch
+        is split in halves and only halves that still change the response
+        are split further.
+        """
+        if len(batch) == 1:
+            return list(batch.keys())
+
+        names = list(batch.keys())
+        middle = len(names) // 2
+        effective = []
+        for half in [names[:middle], names[middle:]]:
+            sub_batch = dict([(name, batch[name]) for name in half])
+            r = PreparedRequest()
+            r.prepare_url(target, sub_batch)
+            try:
+                response = self.client.get(r.url, delay=self.DELAY)
             except requests.exceptions.RequestException as e:
-                self.mprint("[ERROR][Pinpointing] Mining request failed (%s). Mining ops terminated." % url)
+                self.mprint("[ERROR][Pinpointing] Mining request failed (%s)." % e)
                 self.fprint(repr(e))
-                return None
-
-        return effective_params
+                continue
 
+            if comparator.is_anomalous(response, list(sub_batch.items())):
+                if len(sub_batch) == 1:
+                    effective += half
+                else:
+                    effective += self.bisect_parameters(target, sub_batch, comparator)
 
-    def rate_indicators(self, current, ok, pne):
-        """
-        Returns likelyhood with which current request contained parameter that
-        affected target's response.
-        """
-        if pne == ok:
-            if ok == current:
-                return 0
-            else:
-                return 1
-        else:
-            if current == pne:
-                return 0
-            elif current == ok:
-                return 1
-            else:
-                return 0.5
+        return effective
 
 
-    def prepare_param_discovery_urls(self, base_url):
+    def prepare_param_discovery_urls(self, base_url, priority_params=[]):
         """
         For given URL generates bunch of parameter discovery URLs with 
-        canaries and returns this information back.
+        canaries and returns this information back. Each URL is packed with
+        as many parameters as the (probed) maximum URL length allows, but at
+        most MAX_PARAMS_PER_REQUEST of them.
+        Parameters from 'priority_params' are packed into the first URLs.
         """
         PARAM_SEP_LEN = 2 ; CANARY_LEN = self.CANARY_LENGTH
-        url_len = len(base_url)
+        base_len = len(base_url)
+        url_len = base_len
         
         discovery_urls = []
         param_dict = {}
         canary_dict = {}
 
         try:
-            with open('payloads/parameters.txt', 'r') as f:
-                param_list = f.read().splitlines()
-                self.url_discovery_parameters = param_list
+            param_list = wordlists.load("parameters.txt")
+            self.url_discovery_parameters = param_list
         except IOError as e:
             self.mprint("[ERROR] Unable to open payloads/parameters.txt.")
             self.fprint(e)
-            return
+            return ([], {})
+
+        # Parameters already present in the base URL are not mined again.
+        present = set(parse_qs(urlparse(base_url).query).keys())
+        prioritized = set(priority_params)
+        param_list = [x for x in priority_params if x not in present] + [
+            x for x in param_list if x not in prioritized and x not in present
+        ]
         
         for param in param_list:
-            if (url_len + len(param) + PARAM_SEP_LEN + CANARY_LEN) < self.MAX_ACCEPTED_URL_LENGTH:
-                # URL Character limit not exceeded yet.
-                canary = utils.get_rnd_string(CANARY_LEN)
-                param_dict[param] = canary
-                canary_dict[param] = canary
-                url_len += (PARAM_SEP_LEN + len(param) + CANARY_LEN)
-            else:
+            param_len = PARAM_SEP_LEN + len(quote_plus(param)) + CANARY_LEN
+            if param_dict and (url_len + param_len >= self.max_url_length
+                or len(param_dict) >= self.MAX_PARAMS_PER_REQUEST):
                 # Add to URLs, start preparing a new one. 
                 r = PreparedRequest()
                 r.prepare_url(base_url, param_dict)
                 discovery_urls.append(r.url)
                 param_dict = {}
-                url_len = len(base_url)
+                url_len = base_len
+
+            canary = utils.get_rnd_string(CANARY_LEN)
+            param_dict[param] = canary
+            canary_dict[param] = canary
+            url_len += param_len
         
         # Leftovers after depleting all parameters from paramlist.
         if len(param_dict) != 0:
@@ -357,9 +612,99 @@ class RequestMiner():
             r.prepare_url(base_url, param_dict)
             discovery_urls.append(r.url)
 
+        self.fprint("Prepared %s discovery URLs (max. URL length: %s)." % (
+            len(discovery_urls), self.max_url_length
+        ))
         return (discovery_urls, canary_dict)
 
 
+    def probe_target_limits(self, target):
+        """
+        Probes the target for the longest URL and (when headers are mined)
+        the longest request header value it is willing to accept. Both limits
+        are found with a binary search, so only a handful of requests is spent
+        on each of them. Falls back to MAX_ACCEPTED_URL_LENGTH when probing
+        fails.
+        """
+        padding_param = utils.get_rnd_string(6)
+        padding_header = "X-%s" % utils.get_rnd_string(6)
+
+        try:
+            reference = self.client.get(target, delay=self.DELAY, retry=False).status_code
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR][Probing] Unable to probe target limits (%s)." % e)
+            self.fprint(repr(e))
+            return
+
+        def url_accepted(length):
+            padding = 'A' * max(length - len(target) - len(padding_param) - 2, 1)
+            url = self.URLHelper.add_query_string_param(
+                target, padding_param, padding
+            )
+            return self.is_accepted_by_target(url, reference)
+
+        def header_accepted(length):
+            return self.is_accepted_by_target(
+                target, reference, {padding_header: 'A' * length}
+            )
+
+        url_limit = self.binary_search_limit(url_accepted, 
+            len(target) + len(padding_param) + 3, self.MAX_PROBED_URL_LENGTH
+        )
+        if url_limit:
+            self.max_url_length = url_limit
+        else:
+            self.max_url_length = self.MAX_ACCEPTED_URL_LENGTH
+
+        self.mprint("Target accepts URLs up to ~%s characters." % self.max_url_length)
+
+        if self.MINE_HIDDEN_HEADERS:
+            self.max_header_length = self.binary_search_limit(header_accepted, 
+                64, self.MAX_PROBED_HEADER_LENGTH
+            )
+            self.mprint("Target accepts headers up to ~%s characters." % (
+                self.max_header_length
+            ))
+
+
+    def binary_search_limit(self, is_accepted, low, high):
+        """
+        Finds (with LIMIT_PROBE_PRECISION) the highest length accepted by 
+        the target. Returns None when not even the lowest length is accepted.
+        """
+        if is_accepted(high):
+            return high
+        if not is_accepted(low):
+            return None
+
+        while high - low > self.LIMIT_PROBE_PRECISION:
+            middle = (low + high) // 2
+            if is_accepted(middle):
+                low = middle
+            else:
+                high = middle
+
+        return low
+
+
+    def is_accepted_by_target(self, url, reference_code, headers=None):
+        """
+        Decides whether the request was processed normally, or whether it was
+        rejected for being too long (414, 431, 413, 400 or dropped connection).
+        Probes are not retried, rejections and errors are their answer.
+        """
+        rejection_codes = [400, 413, 414, 431]
+        try:
+            r = self.client.get(url, headers=headers, delay=self.DELAY, retry=False)
+        except requests.exceptions.RequestException as e:
+            self.fprint(repr(e))
+            return False
+
+        if r.status_code == reference_code:
+            return True
+        return r.status_code not in rejection_codes and r.status_code < 500
+
+
     def urlparam_startpage_heuristics(self):
         """
         Select which URL will be used as a base URL against which the query 
@@ -367,12 +712,40 @@ class RequestMiner():
 
         Available heuristics:
         - (A) Base URL (main page)
-        - (B) Page with the highest amount of query parameters (NotImplemented)
+        - (B) Page with the highest amount of query parameters
+        - (C) Base URL and the highest ranked crawled pages (MULTI_ENDPOINT)
+        """
+        return self.rank_mining_endpoints()[0]
+
+
+    def rank_mining_endpoints(self):
+        """
+        Returns list of endpoints on which the hidden parameters should be
+        mined, ordered by their rank. Crawled pages are ranked by the number
+        of query parameters they use (pages that already use parameters are
+        likely to accept more of them) and only one page is kept for every
+        combination of path and parameter names.
         """
         if self.URLPARAM_DISCOVERY_HEURISTICS == "START_PAGE":
-            return self.target
-        else:
-            return self.target
+            return [self.target]
+
+        classes = self.classify_param_sources(self.crawled_pages)
+        ranked = sorted(
+            [values[0] for _, values in classes.items()],
+            key=lambda url: (-len(parse_qs(urlparse(url).query)), url)
+        )
+
+        if self.URLPARAM_DISCOVERY_HEURISTICS == "MOST_PARAMETERS":
+            return ranked[:1] or [self.target]
+
+        if self.URLPARAM_DISCOVERY_HEURISTICS == "MULTI_ENDPOINT":
+            normalized_target = self.URLHelper.normalize(self.target)
+            endpoints = [self.target] + [
+                x for x in ranked if x != normalized_target
+            ]
+            return endpoints[:max(self.MAX_MINED_ENDPOINTS, 1)]
+
+        return [self.target]
 
 
     def test_parameter_reflection(self, parameter_name, parameter_record):
@@ -395,9 +768,9 @@ class RequestMiner():
                 parameter_name, canary)
             self.fprint("Checking candidate: %s" % current_target)
 
-            if reflection_requests <= self.MAX_REFLECTION_REQUESTS:
+            if reflection_requests < self.MAX_REFLECTION_REQUESTS:
                 try:
-                    r = requests.get(current_target)
+                    r = self.client.get(current_target, delay=self.DELAY)
                     reflection_requests += 1
                     if canary in r.text:
                         reflects_on.append(values[0])
@@ -411,6 +784,119 @@ class RequestMiner():
         return reflects_on
 
 
+    def test_parameter_reflections_batched(self):
+        """
+        Checks reflections of all discovered parameters at once. Parameters
+        that share a source URL class are tested together in a single request,
+        each one with its own canary, and reflections are attributed back to
+        parameters by the canary found in the response. MAX_REFLECTION_REQUESTS
+        limits the number of URL classes tested for each of the parameters.
+
+        Returns dictionary of parameter names and URLs they reflect on.
+        """
+        reflects_on = {}
+        url_classes = {}
+        for param_name, param_record in self.discovered_params.items():
+            reflects_on[param_name] = []
+            classes = self.classify_param_sources(param_record["sources"])
+            for class_hash, values in classes.items():
+                if class_hash not in url_classes:
+                    url_classes[class_hash] = {"url": values[0], "params": []}
+                url_classes[class_hash]["params"].append(param_name)
+
+        # Plan the requests, each parameter is checked in at most 
+        # MAX_REFLECTION_REQUESTS url classes.
+        tested = {}
+        planned = []
+        for class_hash in sorted(url_classes.keys()):
+            url_class = url_classes[class_hash]
+            canaries = {}
+            for param_name in url_class["params"]:
+                if tested.get(param_name, 0) < self.MAX_REFLECTION_REQUESTS:
+                    tested[param_name] = tested.get(param_name, 0) + 1
+                    canaries[param_name] = utils.get_rnd_string(self.CANARY_LENGTH)
+
+            if canaries:
+                planned.append((url_class["url"], canaries))
+
+        self.mprint("Checking reflections of %s parameters using %s requests." % (
+            len(self.discovered_params), len(planned)
+        ))
+
+        with ThreadPoolExecutor(max_workers=self.MINING_WORKERS) as executor:
+            responses = executor.map(self.send_reflection_request, planned)
+            for (url, canaries), text in zip(planned, responses):
+                for param_name, canary in canaries.items():
+                    if canary in text:
+                        reflects_on[param_name].append(url)
+
+        return reflects_on
+
+
+    def test_body_reflections(self):
+        """
+        Checks reflections of fields of (up to MAX_MINED_FORMS) body forms.
+        Every form is submitted once with a canary in each of its fields,
+        forms are submitted concurrently.
+        """
+        planned = []
+        for form in self.get_mined_forms():
+            canaries = dict([
+                (field, utils.get_rnd_string(self.CANARY_LENGTH))
+                for field in form["fields"]
+            ])
+            if canaries:
+                planned.append((form, canaries))
+
+        if not planned:
+            return
+
+        self.mprint("Checking reflections of fields of %s forms." % len(planned))
+        with ThreadPoolExecutor(max_workers=self.MINING_WORKERS) as executor:
+            responses = executor.map(self.send_body_reflection_request, planned)
+            for (form, canaries), text in zip(planned, responses):
+                form["reflected"] = [
+                    field for field, canary in canaries.items() if canary in text
+                ]
+                if form["reflected"]:
+                    self.mprint("Body fields %s of %s reflect!" % (
+                        ', '.join(form["reflected"]), form["action"]
+                    ))
+
+
+    def send_body_reflection_request(self, planned_request):
+        """
+        Submits the form with canaries in place of field values and returns
+        response body (empty string when the request fails).
+        """
+        form, canaries = planned_request
+        self.fprint("Checking form: %s %s" % (form["method"], form["action"]))
+        try:
+            return self.client.submit(form["method"], form["action"], canaries,
+                enctype=form["enctype"], delay=self.DELAY
+            ).text
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR] Mining request failed (%s)." % ', '.join(canaries.keys()))
+            self.fprint(repr(e))
+        return ""
+
+
+    def send_reflection_request(self, planned_request):
+        """
+        Sends request with canaries in place of parameter values and returns
+        response body (empty string when the request fails).
+        """
+        url, canaries = planned_request
+        current_target = self.URLHelper.replace_parameter_values(url, canaries)
+        self.fprint("Checking candidate: %s" % current_target)
+        try:
+            return self.client.get(current_target, delay=self.DELAY).text
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR] Mining request failed (%s)." % ', '.join(canaries.keys()))
+            self.fprint(repr(e))
+        return ""
+
+
     def classify_param_sources(self, sources):
         """
         Classify parameter sources by the number of parameters that appear in
@@ -467,6 +953,30 @@ class RequestMiner():
         return discovered
 
 
+    def add_discovered_forms(self, forms):
+        """
+        Adds fields of crawled forms into discovered parameters. Fields of
+        GET forms are query string parameters of the form's action, forms
+        submitting a body are kept for body parameter testing.
+        """
+        for form in forms:
+            if not self.URLHelper.is_in_scope(self.target, form["action"]):
+                continue
+
+            if form["method"] == "GET":
+                url = self.URLHelper.replace_parameter_values(
+                    form["action"], form["fields"]
+                )
+                self.add_discovered_params(url, dict([
+                    (name, [value]) for name, value in form["fields"].items()
+                ]))
+            else:
+                record = dict(form)
+                record["reflected"] = []
+                record["hidden"] = {"discovered": [], "reflected": []}
+                self.body_params["forms"].append(record)
+
+
     def add_discovered_headers(self, headers):
         """
         Adds header into the discovered headers list if it was not already there.
@@ -526,6 +1036,11 @@ class RequestMiner():
         return self.sitecopier_results["parsable"]["anyProcessor"][0]["crawledUrls"][id]
 
 
+    def obtain_forms(self):
+        """Looks up forms in results structure returned by SiteCopier."""
+        return self.sitecopier_results["parsable"]["anyProcessor"][0].get("forms", [])
+
+
     def provide_results(self, results_structure):
         """
         Allows RequestMiner to access results of other modules. RequestMiner 
@@ -546,6 +1061,8 @@ class RequestMiner():
                 "existing_params": self.discovered_params,
                 "existing_headers": self.discovered_headers,
                 "hidden_params": self.hidden_params,
+                "hidden_headers": self.hidden_headers,
+                "body_params": self.body_params,
             }
         }
 
@@ -558,10 +1075,45 @@ class RequestMiner():
             self.CANARY_LENGTH = options["CANARY_LENGTH"]
         if "MAX_REFLECTION_REQUESTS" in options:
             self.MAX_REFLECTION_REQUESTS = options["MAX_REFLECTION_REQUESTS"]
+        if "MINE_HIDDEN_HEADERS" in options:
+            self.MINE_HIDDEN_HEADERS = options["MINE_HIDDEN_HEADERS"] in [True, "True"]
+        if "MAX_HEADERS_PER_REQUEST" in options:
+            self.MAX_HEADERS_PER_REQUEST = max(int(options["MAX_HEADERS_PER_REQUEST"]), 1)
+        if "MAX_ACCEPTED_HEADER_LENGTH" in options:
+            self.MAX_ACCEPTED_HEADER_LENGTH = max(int(options["MAX_ACCEPTED_HEADER_LENGTH"]), 1)
+        if "MINE_BODY_PARAMS" in options:
+            self.MINE_BODY_PARAMS = options["MINE_BODY_PARAMS"] in [True, "True"]
+        if "MAX_MINED_FORMS" in options:
+            self.MAX_MINED_FORMS = int(options["MAX_MINED_FORMS"])
+        if "MAX_BODY_PARAMS_PER_REQUEST" in options:
+            self.MAX_BODY_PARAMS_PER_REQUEST = max(int(options["MAX_BODY_PARAMS_PER_REQUEST"]), 1)
+        if "BATCH_REFLECTION_TESTS" in options:
+            self.BATCH_REFLECTION_TESTS = options["BATCH_REFLECTION_TESTS"] in [True, "True"]
         if "URLPARAM_DISCOVERY_HEURISTICS" in options:
             self.URLPARAM_DISCOVERY_HEURISTICS = options["URLPARAM_DISCOVERY_HEURISTICS"]
+        if "MAX_MINED_ENDPOINTS" in options:
+            self.MAX_MINED_ENDPOINTS = options["MAX_MINED_ENDPOINTS"]
+        if "MINING_WORKERS" in options:
+            self.MINING_WORKERS = max(int(options["MINING_WORKERS"]), 1)
+        if "MAX_PARAMS_PER_REQUEST" in options:
+            self.MAX_PARAMS_PER_REQUEST = max(int(options["MAX_PARAMS_PER_REQUEST"]), 1)
         if "MAX_ACCEPTED_URL_LENGTH" in options:
             self.MAX_ACCEPTED_URL_LENGTH = options["MAX_ACCEPTED_URL_LENGTH"]
+            self.max_url_length = self.MAX_ACCEPTED_URL_LENGTH
+        if "BASELINE_SAMPLES" in options:
+            self.BASELINE_SAMPLES = max(int(options["BASELINE_SAMPLES"]), 1)
+        if "PROBE_TARGET_LIMITS" in options:
+            self.PROBE_TARGET_LIMITS = options["PROBE_TARGET_LIMITS"] in [True, "True"]
+        if "MAX_PROBED_URL_LENGTH" in options:
+            self.MAX_PROBED_URL_LENGTH = options["MAX_PROBED_URL_LENGTH"]
+        if "MAX_PROBED_HEADER_LENGTH" in options:
+            self.MAX_PROBED_HEADER_LENGTH = options["MAX_PROBED_HEADER_LENGTH"]
+
+
+    def set_context(self, run_context):
+        """Sets context of the run the module is executed in."""
+        self.run_context = run_context
+        self.client = run_context.client
 
 
     def get_dependencies(self):
@@ -578,25 +1130,3 @@ class RequestMiner():
     def leaves_physical_artifacts(self):
         """Does the module leave artifacts phisically on filesystem?"""
         return False
-
-
-    def _retry_session(self, 
-        retries = 5, 
-        backoff_factor = 0.3, 
-        status_forcelist = (500,502,503,504),
-        session = None):
-        """
-        Gets a retry session with default parameters unless specifically
-        requested otherwise.
-        """
-        session = session or requests.Session()
-        retry = Retry(
-            total= retries, read = retries, connect = retries,
-            backoff_factor = backoff_factor, status_forcelist = status_forcelist
-        )
-
-        adapter = HTTPAdapter(max_retries = retries)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        
-        return session
\ No newline at end of file
@@ -0,0 +1,177 @@
+import re
+from urllib.parse import quote_plus
+
+
+class ResponseComparator():
+    """
+        Learns what the target's response to a request looks like, including
+        its dynamic parts (timestamps, CSRF tokens, rotating ads, ...), and
+        decides whether other responses differ from it by more than the noise
+        observed between the learned samples.
+
+        Responses are compared using a normalised structural fingerprint:
+        body is split into lines and tags, reflected strings are removed,
+        numbers and long random-looking tokens are masked and the remaining
+        lines are compared as sets.
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+    # Headers whose presence commonly changes between two identical requests.
+    VOLATILE_HEADERS = set(['set-cookie', 'date', 'expires', 'age', 'etag',
+    'last-modified', 'content-length', 'x-request-id', 'x-runtime',
+    'cf-ray', 'x-amz-cf-id', 'via', 'x-cache', 'x-cache-hits', 'x-served-by',
+    'x-timer', 'server-timing', 'report-to', 'nel'])
+
+    TOKEN_PATTERN = re.compile(r"[A-Za-z0-9+/_=-]{16,}|\d+")
+    SEPARATOR_PATTERN = re.compile(r"(?:&amp;|[=&?;])+")
+
+
+    def __init__(self):
+        self.samples = []
+        self.codes = set()
+        self.stable_headers = None
+        self.seen_headers = set()
+        self.stable_lines = set()
+        self.seen_lines = set()
+        self.noise = 0
+
+
+    def learn(self, response, reflected=()):
+        """
+        Adds a baseline response (a response which is known not to be
+        affected by anything the tool sent) into the learned model.
+        """
+        code, headers, lines = self.fingerprint(response, reflected)
+
+        self.codes.add(code)
+        self.seen_headers |= headers
+        if self.stable_headers is None:
+            self.stable_headers = set(headers)
+        else:
+            self.stable_headers &= headers
+
+        self.samples.append(lines)
+        self.seen_lines |= lines
+        self.stable_lines = set.intersection(*self.samples)
+
+        # Noise = the highest number of lines that were not stable in any of
+        # the samples seen so far.
+        self.noise = max(
+            [len(sample - self.stable_lines) for sample in self.samples]
+        )
+
+
+    def difference(self, response, reflected=()):
+        """
+        Returns dictionary describing how the response differs from learned
+        baseline responses. Values of 'lines_added' and 'lines_missing' count
+        only lines outside of the learned dynamic regions.
+        """
+        code, headers, lines = self.fingerprint(response, reflected)
+        return {
+            "code": code not in self.codes,
+            "headers": bool(
+                (self.stable_headers or set()) - headers
+            ) or bool(headers - self.seen_headers),
+            "lines_added": len(lines - self.seen_lines),
+            "lines_missing": len(self.stable_lines - lines),
+        }
+
+
+    def is_anomalous(self, response, reflected=()):
+        """
+        Returns True when the response differs from the learned baseline by
+        more than the learned noise (in either added or missing lines), False
+        otherwise.
+        """
+        if not self.samples:
+            return False
+
+        diff = self.difference(response, reflected)
+        if diff["code"] or diff["headers"]:
+            return True
+        return diff["lines_missing"] > self.noise or \
+            diff["lines_added"] > self.noise
+
+
+    def fingerprint(self, response, reflected=()):
+        """
+        Computes (status code, header names, normalized lines) fingerprint
+        of the response. Parameters passed in 'reflected' as (name, value)
+        pairs are removed from the body first, so reflections of the sent
+        query string do not count as a change.
+        """
+        header_names = set(
+            [h.lower() for h in response.headers.keys()]
+        ) - self.VOLATILE_HEADERS
+
+        return (
+            response.status_code,
+            header_names,
+            self.normalize_body(response.text, reflected)
+        )
+
+
+    def normalize_body(self, text, reflected=()):
+        """
+        Splits body into lines (and tags) and masks volatile tokens in them.
+        """
+        pattern = self.reflection_pattern(reflected, text)
+        if pattern:
+            text = pattern.sub('', text)
+
+        lines = set()
+        for line in text.replace('>', '>\n').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            line = self.TOKEN_PATTERN.sub('#', line)
+            line = self.SEPARATOR_PATTERN.sub('&', line)
+            lines.add(line)
+
+        return lines
+
+
+    def reflection_pattern(self, reflected, text):
+        """
+        Compiles a single pattern matching reflections of sent parameters.
+        Sent name=value pairs are matched as a part of a query string, values
+        alone anywhere. Values too short to be told apart from the content
+        are not matched at all. Names are never matched on their own - the
+        page may link to the same parameter name with its own values, and
+        removing those links would look like missing content.
+
+        Only values present in the text make it into the pattern, so its 
+        size follows the number of reflections, not of the sent parameters.
+        """
+        alternatives = []
+        for name, value in reflected:
+            if not value or len(value) < 4:
+                continue
+            values = set([
+                v for v in [value, quote_plus(value)] if v in text
+            ])
+            for escaped_value in values:
+                alternatives.append(re.escape(escaped_value))
+                if not name:
+                    continue
+                for variant in set([name, quote_plus(name)]):
+                    alternatives.append(
+                        r"(?:[?&;]|&amp;)" + re.escape(variant) + "=" +
+                        re.escape(escaped_value)
+                    )
+
+        if not alternatives:
+            return None
+
+        # Longest alternatives first, so the pattern is greedy where needed.
+        return re.compile('|'.join(
+            sorted(set(alternatives), key=len, reverse=True)
+        ))
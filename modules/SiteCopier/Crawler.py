@@ -3,7 +3,7 @@ import sys
 import random
 import requests 
 import core.utils as utils
-import core.config as cfg
+from core import context
 from core.helpers import URLHelper
 from core import constants as Consts
 from requests.adapters import HTTPAdapter
@@ -29,12 +29,18 @@ class Crawler():
     def __init__(self):
         self.URLHelper = URLHelper()
         self.storer = Storer()
+        self.run_context = None
         self.current_request_number = 0
         self.requests_done = []
         self.requests_failed = []
         self.requests_filtered_out = []
         self.requests_queue = []
 
+        # Forms found on crawled pages, unique by their action, method and
+        # field names (see extract_forms_from_html for the record structure).
+        self.forms = []
+        self.form_keys = set()
+
         self.TOTAL_REQUESTS_LIMITATION = 100
         self.DELAY = 0.1
 
@@ -45,6 +51,12 @@ class Crawler():
         self.requests_queue = [self.URLHelper.normalize(target)]
 
 
+    def set_context(self, run_context):
+        """Sets context of the run the crawled pages are stored in."""
+        self.run_context = run_context
+        self.storer.run_context = run_context
+
+
     def set_options(self, options={}):
         """Sets options for a module."""
         if "TOTAL_REQUESTS_LIMITATION" in options:
@@ -61,13 +73,8 @@ class Crawler():
 
     def fprint(self, string):
         """Write into the current log file instead of STDOU."""
-        file_name = os.path.join(".", "output", cfg.CURRENT_RUN_ID, "run.log")
         message = " [%s]: %s" % ("SiteCopier", string)
-        try:
-            with open(file_name, 'a') as f:
-                f.write(message + '\n')
-        except IOError:
-            print("[DBG-ERROR] Unable to write to file: %s" % file_name)
+        context.get_context(self.run_context).log(message)
 
 
     def log_target_crawling(self, site, done, in_queue, filtered, failed):
@@ -126,7 +133,8 @@ class Crawler():
         return [{
             "crawledUrls": self.requests_done,
             "failedUrls": self.requests_failed,
-            "filteredUrls": self.requests_filtered_out 
+            "filteredUrls": self.requests_filtered_out,
+            "forms": self.forms
             }]
 
 
@@ -201,6 +209,7 @@ class Crawler():
                 self.process_a_links(link_group['a'])
                 self.process_a_links(link_group['media'])
                 self.process_resource_links(link_group['link'])
+                self.process_forms(link_group['form'])
 
             elif content_type == 'text/css':
 
@@ -232,6 +241,23 @@ class Crawler():
             self.add_to_queue(link)
 
 
+    def process_forms(self, forms):
+        """
+        Records in-scope forms that were not seen before. Forms are not
+        submitted by the crawler, their fields are left for other modules to
+        mine and test.
+        """
+        for form in forms:
+            if not self.URLHelper.is_in_scope(self.target, form["action"]):
+                continue
+
+            key = (form["action"], form["method"], tuple(sorted(form["fields"])))
+            if key in self.form_keys:
+                continue
+            self.form_keys.add(key)
+            self.forms.append(form)
+
+
     def process_a_links(self, link_group):
         """
         Loads desired 'a' link targets up into the request or filtered request
@@ -248,6 +274,7 @@ class Crawler():
     def extract_links_from_html(self, body):
         """
         Extracts links from various elements and returns them in given context.
+        Forms are extracted from the same parse of the page.
         """
         soup = BeautifulSoup(body, 'html.parser')
         # A-group
@@ -273,7 +300,69 @@ class Crawler():
         scripts = soup.find_all('script')
         script_urls = [url.get('src') for url in scripts if url != None]
 
-        return { 'a': a_urls + frame_urls, 'media': img_urls, 'link': link_urls + script_urls }
+        # Form-group (parsed into form records, not plain URLs)
+        forms = self.extract_forms_from_html(soup)
+
+        return { 'a': a_urls + frame_urls, 'media': img_urls, 'link': link_urls + script_urls, 'form': forms }
+
+
+    def extract_forms_from_html(self, soup):
+        """
+        Extracts forms from the parsed page. Each form is returned as:
+            {
+                "action": absolute URL the form is submitted to,
+                "method": "GET"|"POST"|...,
+                "enctype": "application/x-www-form-urlencoded"|...,
+                "fields": {name: default value},
+                "source": URL of the page the form was found on,
+                "source_id": id of the page's response in SiteCopier output
+            }
+        Disabled fields and fields without name are not submitted by the
+        browser, so they are skipped.
+        """
+        forms = []
+        for form in soup.find_all('form'):
+            action = form.get('action') or self.current_target
+            if action.startswith('#'):
+                action = self.current_target
+
+            fields = {}
+            for field in form.find_all(['input', 'textarea', 'select', 'button']):
+                name = field.get('name')
+                if not name or field.has_attr('disabled'):
+                    continue
+
+                if field.name == 'textarea':
+                    value = field.get_text()
+                elif field.name == 'select':
+                    option = field.find('option', selected=True) or field.find('option')
+                    value = Consts.EMPTY_STRING
+                    if option:
+                        value = option.get('value', option.get_text())
+                else:
+                    input_type = (field.get('type') or 'text').lower()
+                    if input_type in ['checkbox', 'radio'] and (
+                        name in fields or not field.has_attr('checked')):
+                        continue
+                    if input_type in ['file', 'image', 'reset']:
+                        continue
+                    value = field.get('value', Consts.EMPTY_STRING)
+
+                fields.setdefault(name, value)
+
+            forms.append({
+                "action": self.URLHelper.remove_fragment(
+                    self.URLHelper.absolutize(self.current_target, action)
+                ),
+                "method": (form.get('method') or 'GET').upper(),
+                "enctype": (form.get('enctype') 
+                    or 'application/x-www-form-urlencoded').lower(),
+                "fields": fields,
+                "source": self.current_target,
+                "source_id": self.current_request_number
+            })
+
+        return forms
 
 
     def extract_links_from_css(self, body):
@@ -368,7 +457,15 @@ class Storer():
 
 
     def __init__(self):
-        self.output_dir = "output/%s/SiteCopier/" % cfg.CURRENT_RUN_ID
+        self.run_context = None
+
+
+    def get_output_dir(self):
+        """
+        Returns folder requests are stored in. Resolved on every store, so
+        the storer follows the run it is used in.
+        """
+        return context.get_context(self.run_context).module_dir("SiteCopier")
 
     
     def store(self, target, response, id):
@@ -383,7 +480,7 @@ class Storer():
         encoding provided by the server. If that fails, it is stored as binary
         data and the processing hell is postponed for later.
         """
-        save_to = os.path.join(self.output_dir, str(id))
+        save_to = os.path.join(self.get_output_dir(), str(id))
         os.mkdir(save_to)
         req_header_file = os.path.join(save_to, "%s.request" % id)
         response_body_file = os.path.join(save_to, "%s.response" % id)
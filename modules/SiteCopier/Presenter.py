@@ -1,6 +1,7 @@
 from core import constants as Consts
 from core import utils as utils
-from core import config as cfg
+from core import context
+from core.helpers import PagedTable
 
 
 class Presenter():
@@ -18,8 +19,9 @@ class Presenter():
     """
 
 
-    def __init__(self, results):
+    def __init__(self, results, run_context=None):
         self.module_name = "SiteCopier"
+        self.run_context = context.get_context(run_context)
 
         """Is media data generated as part of the presentation?"""
         self._generates_media = False
@@ -40,6 +42,7 @@ class Presenter():
     def present_content(self, presentation_style):
         """
         Returns content ready for presentation in style specified by parameter.
+        Content is a generator of output fragments.
         """
         self.style = presentation_style
         return {
@@ -53,29 +56,29 @@ class Presenter():
         Assembles content to be returned from the presenter. In the future,
         this might be the place where a decision about style-specific 
         assembler method call will be made based on self.style.
+
+        Content is produced as a stream of fragments, so even the lists of
+        all crawled URLs are never held in memory as a single string.
         """
         results = self.results['SiteCopier']['results']['nonparsable'][0]
 
-        content = Consts.EMPTY_STRING
         if len(results) > 0:
             # There are data to be presented
-            content += self.get_requests_overview(results)
+            yield from self.get_requests_overview(results)
         else:
-            content += self.get_no_output()
-        
-        return content
+            yield self.get_no_output()
 
 
     def get_requests_overview(self, results):
         """
         Presents information about requests that were made during SiteCopier's
-        operations.
+        operations. Yields fragments of the output.
         """
         number_of_crawled_requests = len(results["crawledUrls"])
         number_of_failed_requests = len(results["failedUrls"])
         number_of_filtered_requests = len(results["filteredUrls"])
         if self.style == 'BWFormal':
-            cnt = """
+            yield """
             <p>SiteCopier issued <b>%s requests</b> against the target 
             application, out of which <b>%s</b> failed. Additionally, there 
             were <b>%s</b> links which pointed outside the target and they were
@@ -88,49 +91,21 @@ class Presenter():
 
 
             # Print out table of failed, filtered and requested links
-            table_1 = """
+            yield PagedTable("""
             <h5>Failed & Filtered targets</h5>
-            <table style='table-layout: fixed;width: 100%;'>"""
-
-            if number_of_failed_requests > 0:
-                table_1 += """
-                <tr>
-                    <th>Requests to following URLs failed to reach the target</th>
-                </tr>
-                <tr>
-                """
-                for url in results["failedUrls"]:
-                    table_1 += "<tr><td style='word-wrap:break-word;overflow-wrap:break-word;'>%s</td></tr>" % utils.encode_for_html(url)
-
-            table_1 += """
-            <tr>
-                <th>Requests to following URLs were out of the target scope</th>
-            </tr>
-            """
-
-            for url in results["filteredUrls"]:
-                table_1 += "<tr><td style='word-wrap:break-word;overflow-wrap:break-word;'>%s</td></tr>" % utils.encode_for_html(url)
-            
-            table_1 += "</table>"
-
-            cnt += table_1
+            <table style='table-layout: fixed;width: 100%;'>""",
+                self.get_failed_and_filtered_rows(results), "</table>"
+            )
 
-            table_2 = """
+            yield PagedTable("""
             <h5>Successfully Sent Requests</h5>
             <table style='table-layout: fixed;width: 100%;'>
                 <tr>
                     <th>Requests that successfully reached the target</th>
                 </tr>
-            """
-
-            for url in results["crawledUrls"]:
-                table_2 += "<tr><td style='word-wrap:break-word;overflow-wrap:break-word;'>%s</td></tr>" % utils.encode_for_html(url)
-            
-            table_2 += "</table>"
-            
-            cnt += table_2
+            """, self.get_url_rows(results["crawledUrls"]), "</table>")
         else:
-            cnt = """
+            yield """
 SiteCopier issued %s requests against the target application,
 out of which %s failed. Additionally, there were %s links which
 pointed outside the target and they were not requested.
@@ -140,7 +115,30 @@ pointed outside the target and they were not requested.
                 number_of_filtered_requests
             )
 
-        return cnt
+
+    def get_failed_and_filtered_rows(self, results):
+        """Yields rows of failed and filtered URLs (with their headings)."""
+        if len(results["failedUrls"]) > 0:
+            yield """
+                <tr>
+                    <th>Requests to following URLs failed to reach the target</th>
+                </tr>
+                <tr>
+                """
+            yield from self.get_url_rows(results["failedUrls"])
+
+        yield """
+            <tr>
+                <th>Requests to following URLs were out of the target scope</th>
+            </tr>
+            """
+        yield from self.get_url_rows(results["filteredUrls"])
+
+
+    def get_url_rows(self, urls):
+        """Yields table rows, one for each of the URLs."""
+        for url in urls:
+            yield "<tr><td style='word-wrap:break-word;overflow-wrap:break-word;'>%s</td></tr>" % utils.encode_for_html(url)
 
 
     def get_description(self):
@@ -153,14 +151,14 @@ pointed outside the target and they were not requested.
             Recorded responses can be found in <em>output/%s/SiteCopier</em> 
             folder.
             </p>
-            """ % cfg.CURRENT_RUN_ID
+            """ % self.run_context.run_id
             return intro
         else:
             return """
 SiteCopier module crawls the target from its root address, finds and processes every link. Links
 that are in scope of the target application are then requested and the response is recorded.
 Recorded responses can be found in output/%s/SiteCopier
-            """ % cfg.CURRENT_RUN_ID
+            """ % self.run_context.run_id
 
 
     def get_no_output(self):
@@ -23,6 +23,7 @@ class SiteCopier():
         self.module_name = "SiteCopier"
         self.crawler = c.Crawler()
         self.presenter = None
+        self.run_context = None
 
 
     def mprint(self, string):
@@ -55,6 +56,12 @@ class SiteCopier():
         }
 
 
+    def set_context(self, run_context):
+        """Sets context of the run the module is executed in."""
+        self.run_context = run_context
+        self.crawler.set_context(run_context)
+
+
     def set_options(self, options):
         """Sets options for a module."""
         self.crawler.set_options(options)
@@ -62,7 +69,7 @@ class SiteCopier():
 
     def get_presenter(self, results):
         """Prepares module's presenter with results structure."""
-        self.presenter = p.Presenter(results)
+        self.presenter = p.Presenter(results, self.run_context)
         return self.presenter
 
 
@@ -1,5 +1,6 @@
 from core import constants as Consts
 from core import utils as utils
+from core.helpers import PagedTable
 
 
 class Presenter():
@@ -78,71 +79,66 @@ returned by the target application.\n"""
         """
         results = self.results['TokenFinder']['results']['nonparsable']
 
-        content = Consts.EMPTY_STRING
         if len(results) > 0:
             # Something will be presented
-            content += self.get_secrets_table(results)
+            yield from self.get_secrets_table(results)
         else:
-            content += self.get_no_secrets_found_text()
-        
-        return content
+            yield self.get_no_secrets_found_text()
 
 
     def get_secrets_table(self, secrets):
-        """Prepares style-based table output containing discovered secrets."""
+        """Yields style-based table output containing discovered secrets."""
         if self.style == 'BWFormal':
-            print(secrets)
-            cnt = """
+            yield PagedTable("""
             <table>
                 <tr>
                     <th>Secret string</th>
                     <th>Instances</th>
                 </tr>
-            """
-
-            for secret, record in secrets.items():
-                cnt += """
-                <tr>
-                    <td><textarea>%s</textarea></td>
-                    <td>
-                    <table>
-                        <tr>
-                        <th>URL</th>
-                        <th>Line (in source code)</th>
-                        <th>Entropy (Min: 1.0, Max: 8.0)</th>
-                        </tr>""" % utils.encode_for_html(secret)
-                
-                for sr in record:
-                    cnt += """
-                    <tr>
-                        <td>%s</td>
-                        <td>%s</td>
-                        <td>%s</td>
-                    </tr>
-                    """ % (
-                    utils.encode_for_html(sr["url"]),
-                    utils.encode_for_html(sr["line"]),
-                    utils.encode_for_html(sr["entropy"])
-                    )
-
-                cnt += "</table></td></tr>"
-
-            cnt += "</table>"
-            return cnt
+            """, self.get_secrets_rows(secrets), "</table>")
         else:
-            cnt = "Format: Secret string | Instances\n"
+            yield "Format: Secret string | Instances\n"
             
             for secret, record in secrets.items():
-                cnt += """
+                yield """
 %s | (Format: URL | Line (in source code) | Entropy (Min: 1.0, Max: 8.0))\n
 """ % secret
 
                 for sr in record:
-                    cnt += """\t|->%s | %s | %s\n""" % (
+                    yield """\t|->%s | %s | %s\n""" % (
                         sr["url"], sr["line"], sr["entropy"]
                     )
+
+
+    def get_secrets_rows(self, secrets):
+        """Yields HTML rows of the secrets table, one row for every secret."""
+        for secret, record in secrets.items():
+            row = ["""
+            <tr>
+                <td><textarea>%s</textarea></td>
+                <td>
+                <table>
+                    <tr>
+                    <th>URL</th>
+                    <th>Line (in source code)</th>
+                    <th>Entropy (Min: 1.0, Max: 8.0)</th>
+                    </tr>""" % utils.encode_for_html(secret)]
             
-            return cnt
+            for sr in record:
+                row.append("""
+                <tr>
+                    <td>%s</td>
+                    <td>%s</td>
+                    <td>%s</td>
+                </tr>
+                """ % (
+                utils.encode_for_html(sr["url"]),
+                utils.encode_for_html(sr["line"]),
+                utils.encode_for_html(sr["entropy"])
+                ))
+
+            row.append("</table></td></tr>")
+            yield ''.join(row)
 
 
     def get_no_secrets_found_text(self):
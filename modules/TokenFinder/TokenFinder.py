@@ -1,7 +1,7 @@
 import os
 import math
 import core.utils as utils
-import core.config as cfg
+from core import context
 from core import constants as Consts
 from . import Presenter as p
 
@@ -28,6 +28,11 @@ class TokenFinder():
                 "depends_on": "SiteCopier",
                 "dependency_type": "output",
                 "is_essential": True
+            },
+            {
+                "depends_on": "MisconfChecker",
+                "dependency_type": "output",
+                "is_essential": False
             }
         ]
         self.module_name = "TokenFinder"
@@ -36,6 +41,8 @@ class TokenFinder():
         self.B64_SET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
         self.secrets = {}
         self.sitecopier_results = {}
+        self.misconfchecker_results = {}
+        self.run_context = None
 
 
     def mprint(self, string):
@@ -48,11 +55,19 @@ class TokenFinder():
         self.target = param
 
         # Acquire artifacts from sitecopier to search
-        source = os.path.join("output", cfg.CURRENT_RUN_ID, "SiteCopier")
+        source = context.get_context(self.run_context).module_dir("SiteCopier")
         for id in range(len(os.listdir(source))):
             response = os.path.join(source, str(id), "%s.response" % id)
             self.find_secrets(response, id)
 
+        # Files recovered from exposed VCS repositories (when available)
+        if self.misconfchecker_results:
+            recovered_files = self.misconfchecker_results["parsable"].get(
+                "recovered_files", []
+            )
+            for recovered_file in recovered_files:
+                self.find_secrets_in_recovered_file(recovered_file)
+
         self.mprint("Discovered %s secrets." % len(self.secrets))
         self.mprint("===================================%s===================================" % self.module_name)
 
@@ -64,6 +79,8 @@ class TokenFinder():
         """
         if "SiteCopier" in results_structure.keys():
             self.sitecopier_results = results_structure["SiteCopier"]["results"]
+        if "MisconfChecker" in results_structure.keys():
+            self.misconfchecker_results = results_structure["MisconfChecker"]["results"]
 
 
     def get_results(self):
@@ -82,6 +99,11 @@ class TokenFinder():
             self.MIN_TOKEN_LEN = options["MIN_TOKEN_LEN"]
 
 
+    def set_context(self, run_context):
+        """Sets context of the run the module is executed in."""
+        self.run_context = run_context
+
+
     def get_dependencies(self):
         """Provides information about the module's dependency requirements."""
         return self.dependencies
@@ -137,27 +159,56 @@ class TokenFinder():
         try:
             with open(target_file,
             encoding=file_encoding, errors="replace") as f:
-                # Go through the file line by line
-                line_number = 0
-                for line in f.read().split('\n'):
-                    line_number += 1
-                    # Tokenize each line by white-spaces
-                    for token in line.split():
-                        # And then tokenize once more into base 64 tokens
-                        for b64t in self.extract_b64_tokens(token, self.MIN_TOKEN_LEN):
-                            entropy = self.shannon_entropy(b64t)
-                            if entropy > self.ENTROPY_TRESHOLD:
-                                url = self.obtain_id_url(id)
-                                self.store_secret(
-                                    token, url, 
-                                    line_number, entropy
-                                )
+                for token, line_number, entropy in self.search_content(f.read()):
+                    url = self.obtain_id_url(id)
+                    self.store_secret(token, url, line_number, entropy)
         except LookupError:
             self.mprint("[ERROR] Unable to open the file with %s encoding" % file_encoding)
         except FileNotFoundError:
             self.mprint("[WARNING][404] Skipping %s" % target_file)
 
 
+    def find_secrets_in_recovered_file(self, recovered_file):
+        """
+        Searches file recovered from exposed VCS repository for secrets. 
+        Recovered files come without headers, binary files are recognized by
+        a NUL byte in their beginning.
+        """
+        try:
+            with open(recovered_file["path"], 'rb') as f:
+                content = f.read()
+        except IOError:
+            self.mprint("[WARNING] Unable to read %s" % recovered_file["path"])
+            return
+
+        if b'\0' in content[:8192]:
+            return
+
+        content = content.decode('utf-8', errors="replace")
+        for token, line_number, entropy in self.search_content(content):
+            self.store_secret(token, recovered_file["url"], line_number, entropy)
+
+
+    def search_content(self, content):
+        """
+        Returns (token, line number, entropy) for every highly entropic token
+        in the content.
+        """
+        found = []
+        # Go through the file line by line
+        line_number = 0
+        for line in content.split('\n'):
+            line_number += 1
+            # Tokenize each line by white-spaces
+            for token in line.split():
+                # And then tokenize once more into base 64 tokens
+                for b64t in self.extract_b64_tokens(token, self.MIN_TOKEN_LEN):
+                    entropy = self.shannon_entropy(b64t)
+                    if entropy > self.ENTROPY_TRESHOLD:
+                        found.append((token, line_number, entropy))
+        return found
+
+
     def store_secret(self, secret_string, url, line_number, entropy):
         """
         Conditionally stores discovered secret into the self.secrets property.
@@ -0,0 +1,215 @@
+import re
+from collections import deque
+
+
+class ContextTokenizer():
+    """
+        Incremental HTML tokenizer determining the parse context at given
+        offsets of a response in a single linear pass.
+
+        Recognized contexts:
+            TAG         - HTML text (outside of any tag)
+            RCDATA      - text of title/textarea (and other raw text) elements
+            COMMENT     - HTML comment
+            INSIDE_TAG  - inside a tag, but outside of an attribute value
+            ATTR        - attribute value (with its quote type)
+            URL_ATTR    - value of an attribute holding URL (href, src, ...)
+            EVENT_ATTR  - value of an event handler attribute (onclick, ...)
+            SCRIPT      - JavaScript code
+            SCRIPT_STRING - JavaScript string literal (with its quote type)
+            CSS         - style element or style attribute value
+
+        |>  This software is a part of the master thesis:
+        |>  "Web Application Penetration Testing Automation"
+        |>  Brno, University of Technology, 2019
+        |
+        |>  Author: Daniel Dušek (@dusekdan - github, gitlab, twitter)
+        |>  Contact: dusekdan@gmail.com
+        |>  https://danieldusek.com
+    """
+
+    URL_ATTRIBUTES = set(['href', 'src', 'action', 'formaction', 'data',
+    'background', 'poster', 'codebase', 'cite', 'lowsrc', 'dynsrc', 'xlink:href'])
+
+    RAW_TEXT_ELEMENTS = set(['script', 'style', 'title', 'textarea', 'xmp',
+    'iframe', 'noembed', 'noframes'])
+
+    TAG_PATTERN = re.compile(r"<(/?)([a-zA-Z][^\s/>]*)")
+    ATTRIBUTE_PATTERN = re.compile(
+        r"""[\s/]*(?:(>)|([^\s/>=]+)(?:\s*=\s*(?:"([^"]*)"?|'([^']*)'?|([^\s>]*)))?)"""
+    )
+    SCRIPT_TOKEN_PATTERN = re.compile(r"""["'`]|//|/\*""")
+
+    # Patterns of closing tags of the raw text elements (shared cache).
+    closing_patterns = {}
+
+
+    def get_contexts(self, text, offsets):
+        """
+        Returns a dictionary of offsets and contexts at those offsets. Each
+        context is a dictionary with 'context', 'quote', 'tag', 'attribute'
+        and 'value_start' (offset is at the very start of attribute value)
+        keys.
+        """
+        self.pending = deque(sorted(set(offsets)))
+        self.contexts = {}
+
+        pos = 0
+        end = len(text)
+        while pos < end and self.pending:
+            lt = text.find('<', pos)
+            if lt < 0:
+                lt = end
+            self.assign(lt, "TAG")
+            if lt >= end:
+                break
+
+            if text.startswith('<!--', lt):
+                pos = self.find_end(text, '-->', lt + 4)
+                self.assign(pos, "COMMENT")
+                continue
+
+            tag = self.TAG_PATTERN.match(text, lt)
+            if not tag:
+                # Doctype, processing instructions and bogus comments
+                if text.startswith('<!', lt) or text.startswith('<?', lt):
+                    pos = self.find_end(text, '>', lt + 2)
+                    self.assign(pos, "COMMENT")
+                else:
+                    pos = lt + 1
+                    self.assign(pos, "TAG")
+                continue
+
+            closing, name = tag.group(1), tag.group(2).lower()
+            pos = self.scan_attributes(text, tag.end(), name)
+
+            if not closing and name in self.RAW_TEXT_ELEMENTS:
+                pos = self.scan_raw_text(text, pos, name)
+
+        # Everything not reached (unterminated document) is HTML text.
+        self.assign(float('inf'), "TAG")
+        return self.contexts
+
+
+    def scan_attributes(self, text, pos, tag):
+        """Scans attributes of the tag. Returns offset after the tag end."""
+        self.assign(pos, "INSIDE_TAG", tag=tag)
+        end = len(text)
+        while pos < end:
+            attribute = self.ATTRIBUTE_PATTERN.match(text, pos)
+            if attribute is None:
+                # Garbage inside the tag (e.g. stray '=') or whitespace of a
+                # tag left open at the end of the text.
+                pos += 1
+                self.assign(pos, "INSIDE_TAG", tag=tag)
+                continue
+
+            if attribute.group(1):
+                pos = attribute.end()
+                self.assign(pos, "INSIDE_TAG", tag=tag)
+                return pos
+
+            name = attribute.group(2).lower()
+            for group, quote in [(3, '"'), (4, "'"), (5, '')]:
+                if attribute.group(group) is not None:
+                    self.assign(attribute.start(group), "INSIDE_TAG", tag=tag)
+                    self.assign(
+                        attribute.end(group), self.attribute_context(name),
+                        quote=quote, tag=tag, attribute=name,
+                        value_start=attribute.start(group)
+                    )
+                    break
+
+            pos = attribute.end()
+            self.assign(pos, "INSIDE_TAG", tag=tag)
+        return pos
+
+
+    def attribute_context(self, name):
+        """Returns context of the attribute value based on attribute name."""
+        if name.startswith('on'):
+            return "EVENT_ATTR"
+        if name in self.URL_ATTRIBUTES:
+            return "URL_ATTR"
+        if name == 'style':
+            return "CSS"
+        return "ATTR"
+
+
+    def scan_raw_text(self, text, pos, tag):
+        """
+        Scans content of the raw text element (up to its closing tag). Returns
+        offset of the closing tag.
+        """
+        if tag not in self.closing_patterns:
+            self.closing_patterns[tag] = re.compile(
+                r"</%s[\s/>]" % re.escape(tag), re.IGNORECASE
+            )
+        closing = self.closing_patterns[tag].search(text, pos)
+        end = closing.start() if closing else len(text)
+
+        if tag == 'script':
+            self.scan_script(text, pos, end)
+        elif tag == 'style':
+            self.assign(end, "CSS", tag=tag)
+        else:
+            self.assign(end, "RCDATA", tag=tag)
+        return end
+
+
+    def scan_script(self, text, pos, end):
+        """Scans script for string literals and comments."""
+        while pos < end and self.pending:
+            token = self.SCRIPT_TOKEN_PATTERN.search(text, pos, end)
+            if not token:
+                break
+            self.assign(token.start(), "SCRIPT", tag="script")
+
+            if token.group() == '//':
+                pos = self.find_end(text, '\n', token.end(), end)
+                self.assign(pos, "SCRIPT", tag="script")
+            elif token.group() == '/*':
+                pos = self.find_end(text, '*/', token.end(), end)
+                self.assign(pos, "SCRIPT", tag="script")
+            else:
+                quote = token.group()
+                pos = self.find_string_end(text, token.end(), end, quote)
+                self.assign(pos, "SCRIPT_STRING", quote=quote, tag="script")
+        self.assign(end, "SCRIPT", tag="script")
+
+
+    def find_string_end(self, text, pos, end, quote):
+        """Returns offset after the closing quote (escapes are skipped)."""
+        while pos < end:
+            char = text[pos]
+            if char == '\\':
+                pos += 2
+                continue
+            if char == quote or (char == '\n' and quote != '`'):
+                return pos + 1
+            pos += 1
+        return end
+
+
+    def find_end(self, text, terminator, pos, end=None):
+        """Returns offset after the terminator (or end of the text)."""
+        if end is None:
+            end = len(text)
+        found = text.find(terminator, pos, end)
+        if found < 0:
+            return end
+        return found + len(terminator)
+
+
+    def assign(self, limit, context, quote=None, tag=None, attribute=None,
+        value_start=None):
+        """Assigns context to all pending offsets lower than the limit."""
+        while self.pending and self.pending[0] < limit:
+            offset = self.pending.popleft()
+            self.contexts[offset] = {
+                "context": context,
+                "quote": quote,
+                "tag": tag,
+                "attribute": attribute,
+                "value_start": offset == value_start
+            }
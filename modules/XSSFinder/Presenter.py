@@ -1,5 +1,6 @@
 from core import constants as Consts
 from core import utils as utils
+from core.helpers import PagedTable
 
 class Presenter():
     """
@@ -15,6 +16,10 @@ class Presenter():
         |>  https://danieldusek.com
     """
 
+    # Protections that call for the exploitation advisory.
+    NONTRIVIAL_PROTECTIONS = set(['EncodedForHTML', 'EncodedForAttributes',
+    'OtherwiseModified'])
+
 
     def __init__(self, results):
         self.module_name = "XSSFinder"
@@ -56,70 +61,70 @@ class Presenter():
         """
         results = self.results['XSSFinder']['results']['nonparsable']
 
-        content = Consts.EMPTY_STRING
         if len(results['discovered_xss']) > 0:
-            content += self.get_discovered_number_text(
+            yield self.get_discovered_number_text(
                 len(results['discovered_xss'])
             )
-            content += self.get_discovered_table(results['discovered_xss'])
+            yield from self.get_discovered_table(results['discovered_xss'])
         else:
-            content += self.get_no_issues_discovered_text()
-
-        return content
+            yield self.get_no_issues_discovered_text()
 
 
-    def context_to_readable(self, ctx):
+    def context_to_readable(self, ctx, quote=None):
         """Translates code-name for context into human readable string."""
-        if ctx == 'ATTR':
-            return 'Inside attribute'
-        elif ctx == 'TAG':
-            return 'Inside HTML body'
+        readable = {
+            'ATTR': 'Inside attribute',
+            'URL_ATTR': 'Inside URL attribute',
+            'EVENT_ATTR': 'Inside event handler attribute',
+            'INSIDE_TAG': 'Inside HTML tag',
+            'TAG': 'Inside HTML body',
+            'RCDATA': 'Inside title/textarea',
+            'COMMENT': 'Inside HTML comment',
+            'SCRIPT': 'Inside script',
+            'SCRIPT_STRING': 'Inside script string',
+            'CSS': 'Inside CSS',
+        }.get(ctx, ctx)
+
+        quotes = {'"': 'double-quoted', "'": 'single-quoted', '`': 'template literal', '': 'unquoted'}
+        if quote in quotes:
+            readable += ' (%s)' % quotes[quote]
+        return readable
+
+
+    def param_to_readable(self, xss):
+        """Names the parameter, body parameters along with request method."""
+        if "method" in xss:
+            return "%s (%s body)" % (xss["param"], xss["method"])
+        return xss["param"]
+
+
+    def confidence_to_readable(self, xss):
+        """Formats confidence of the finding as percentage."""
+        if "confidence" not in xss:
+            return "-"
+        return "%d %%" % round(xss["confidence"] * 100)
 
 
     def get_discovered_table(self, discovered):
         """
-        Prepares style-based table output containing discovered XSS findings.
+        Yields style-based table output containing discovered XSS findings.
+        Findings are ranked by confidence of the verification.
         """
+        discovered = sorted(
+            discovered, key=lambda x: x.get("confidence", 0), reverse=True
+        )
+        protections = set([xss["protection"] for xss in discovered])
         if self.style == 'BWFormal':
-            cnt = """
+            yield PagedTable("""
             <table>
                 <tr>
                     <th>URL</th>
                     <th>Vulnerable parameter</th>
                     <th>Protection</th>
                     <th>Rendering Context</th>
+                    <th>Confidence</th>
                 </tr>
-            """
-            attr_pl_mention = dif_pl_mention = tag_pl_mention = False
-            for xss in discovered:
-                ctx = Consts.EMPTY_STRING
-                if "context" in xss:
-                    ctx = self.context_to_readable(xss["context"])
-                else:
-                    ctx = "&mdash;"
-                
-                cnt += """
-                <tr>
-                    <td>%s</td>
-                    <td>%s</td>
-                    <td>%s</td>
-                    <td>%s</td>
-                </tr>
-                """ % (
-                    utils.encode_for_html(xss["url"]), 
-                    utils.encode_for_html(xss["param"]), 
-                    utils.encode_for_html(xss["protection"]),
-                    ctx
-                )
-
-                if xss["protection"] == 'EncodedForHTML':
-                    tag_pl_mention = 1
-                elif xss["protection"] == 'EncodedForAttributes':
-                    attr_pl_mention = 1
-                elif xss["protection"] == 'OtherwiseModified':
-                    dif_pl_mention = 1
-            
-            cnt += "</table>"
+            """, self.get_discovered_rows(discovered), "</table>")
 
             # This polyglot was first published by Ahmed El Sobky(@0xsobky on Twitter)
             el_sobkys_payload= utils.encode_for_html("""jaVasCript:/*-/*/*\/*'/*"/**/(/* */oNcliCk=alert() )//0A0a//</stYle/</titLe/</teXtarEa/</scRipt/-->\x3csVg/<sVg/oNloAd=alert()//>\x3e""")
@@ -134,37 +139,28 @@ class Presenter():
 
 
             # If non-trivial protections were mentioned, provide advisory
-            if attr_pl_mention or dif_pl_mention or tag_pl_mention:
-                cnt += advisory_paragraph
+            if protections & self.NONTRIVIAL_PROTECTIONS:
+                yield advisory_paragraph
             
-            if dif_pl_mention:
-                cnt += """When parameter is protected by 
+            if 'OtherwiseModified' in protections:
+                yield """When parameter is protected by 
                 <strong>OtherwiseModified</strong> type of protection, it is
                 highly likely that it is vulnerable to XSS. Some of the special
                 characters (&gt;, &lt;, ", ') were not properly encoded and 
                 it is probably possible to escape the rendering context.
                 """
-            
-            return cnt
         else:
-            cnt = """Format: URL | Vulnerable parameter name | Protection | Rendering Context\n"""
-            attr_pl_mention = dif_pl_mention = tag_pl_mention = False
+            yield """Format: URL | Vulnerable parameter name | Protection | Rendering Context | Confidence\n"""
             for xss in discovered:
                 ctx = Consts.EMPTY_STRING
                 if "context" in xss:
-                    ctx = self.context_to_readable(xss["context"])
+                    ctx = self.context_to_readable(xss["context"], xss.get("quote"))
                 else:
                     ctx = "-"
                 
-                cnt += """%s|%s|%s|%s""" % (
-                    xss["url"], xss["param"], xss["protection"], ctx)
-
-                if xss["protection"] == 'EncodedForHTML':
-                    tag_pl_mention = 1
-                elif xss["protection"] == 'EncodedForAttributes':
-                    attr_pl_mention = 1
-                elif xss["protection"] == 'OtherwiseModified':
-                    dif_pl_mention = 1
+                yield """%s|%s|%s|%s|%s\n""" % (
+                    xss["url"], self.param_to_readable(xss), xss["protection"], ctx,
+                    self.confidence_to_readable(xss))
             
             el_sobkys_payload="""jaVasCript:/*-/*/*\/*'/*"/**/(/* */oNcliCk=alert() )//0A0a//</stYle/</titLe/</teXtarEa/</scRipt/-->\x3csVg/<sVg/oNloAd=alert()//>\x3e"""
             advisory_paragraph = """Exploitation advisory: If URL and parameter are listed in the previous table with 
@@ -176,15 +172,39 @@ vulnerability, following payload can be used.
 
 
             # If non-trivial protections were mentioned, provide advisory
-            if attr_pl_mention or dif_pl_mention or tag_pl_mention:
-                cnt += advisory_paragraph
+            if protections & self.NONTRIVIAL_PROTECTIONS:
+                yield advisory_paragraph
 
-            if dif_pl_mention:
-                cnt += """When parameter is protected by OtherwiseModified type of protection, it is
+            if 'OtherwiseModified' in protections:
+                yield """When parameter is protected by OtherwiseModified type of protection, it is
 highly likely that it is vulnerable to XSS. Some of the special characters (&gt;, &lt;, ", ') were 
 not properly encoded and it is probably possible to escape the rendering context."""
 
-            return cnt
+
+    def get_discovered_rows(self, discovered):
+        """Yields HTML rows of the discovered XSS table."""
+        for xss in discovered:
+            ctx = Consts.EMPTY_STRING
+            if "context" in xss:
+                ctx = self.context_to_readable(xss["context"], xss.get("quote"))
+            else:
+                ctx = "&mdash;"
+            
+            yield """
+            <tr>
+                <td>%s</td>
+                <td>%s</td>
+                <td>%s</td>
+                <td>%s</td>
+                <td>%s</td>
+            </tr>
+            """ % (
+                utils.encode_for_html(xss["url"]), 
+                utils.encode_for_html(self.param_to_readable(xss)), 
+                utils.encode_for_html(xss["protection"]),
+                ctx,
+                self.confidence_to_readable(xss)
+            )
 
 
     def get_no_issues_discovered_text(self):
@@ -1,13 +1,14 @@
-import os, re
+import asyncio
 import requests
-from time import sleep
 import core.utils as utils
-import core.config as cfg
+from core import context
+from core import client
 from core import constants as Consts
 from core.helpers import URLHelper
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 from . import Presenter as p
+from . import ContextTokenizer as _CT
 
 class XSSFinder():
     """
@@ -34,6 +35,15 @@ class XSSFinder():
         self.requestminer_results = {}
         self.URLHelper = URLHelper()
         self.DELAY = 0.1
+        self.WORKERS = 4
+
+        # Breakout characters of all the rendering contexts recognized by the
+        # ContextTokenizer (probe characters are sent in this order).
+        self.DETECTOR_STRING = '<"\'>`/-=:()'
+        self.SEPARATOR_LENGTH = 6
+        self.client = client.get_client()
+        self.async_client = None
+        self.run_context = None
         self.results = {}
 
 
@@ -44,29 +54,23 @@ class XSSFinder():
 
     def fprint(self, string):
         """Write into the current log file instead of STDOU."""
-        file_name = os.path.join(".", "output", cfg.CURRENT_RUN_ID, "run.log")
         message = " [%s]: %s" % (self.module_name, string)
-        try:
-            with open(file_name, 'a') as f:
-                f.write(message + '\n')
-        except IOError:
-            print("[DBG-ERROR] Unable to write to file: %s" % file_name)
+        context.get_context(self.run_context).log(message)
 
 
     def execute(self, param):
         self.mprint("Looking for XSS...")
         self.target = param
 
-        group1, group2 = self.get_reflected_params()
+        probes = self.plan_all_probes()
+        self.mprint("Verifying %s reflecting parameters..." % len(probes))
 
+        # Results are collected in the order of planned probes, no matter in
+        # which order the checks finish.
         discovered_xss = []
-        for param, meta in group1.items():
-            for url in meta["reflects_on"]:
-                discovered_xss += self.reflects_XSS(url, param)
-        
-        for param, meta in group2.items():
-            for url in meta["reflects_on"]:
-                discovered_xss += self.reflects_XSS(url, param)
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            for found in executor.map(self.verify_probe, probes):
+                discovered_xss += found
         
         self.fprint(discovered_xss)
         self.results = discovered_xss
@@ -74,76 +78,294 @@ class XSSFinder():
         self.mprint("XSS search done...")
 
 
-    def reflects_XSS(self, url, param):
-        """Check whether there is a reflected XSS in parameter on given URL."""
-        discovered = []
-        detector_string = '<"\'>'
+    async def execute_async(self, run_context):
+        """
+        Asynchronous variant of execute(). All probes are checked at once on
+        the event loop, the number of requests in flight is bounded by the
+        asynchronous client of the run (and spaced out by its rate limiter),
+        not by the number of worker threads.
+        """
+        self.mprint("Looking for XSS...")
+        self.target = run_context.target
+        self.async_client = run_context.async_client
+
+        probes = self.plan_all_probes()
+        self.mprint("Verifying %s reflecting parameters..." % len(probes))
+
+        # Results are collected in the order of planned probes.
+        discovered_xss = []
+        for found in await asyncio.gather(*[
+            self.reflects_XSS_async(url, param, form) for url, param, form in probes
+        ]):
+            discovered_xss += found
+
+        self.fprint(discovered_xss)
+        self.results = discovered_xss
+
+        self.mprint("XSS search done...")
+
+
+    def plan_all_probes(self):
+        """Returns probes of reflected query string and body parameters."""
+        group1, group2 = self.get_reflected_params()
+        return self.plan_probes([group1, group2]) + self.plan_body_probes(
+            self.get_reflected_forms()
+        )
+
+
+    def plan_probes(self, param_groups):
+        """
+        Returns (url, param, form) probes to be checked for XSS. Parameter is
+        checked only once per URL class (URLs with the same path and parameter
+        names produce the same reflection). Query string probes have no form.
+        """
+        probes = []
+        planned = set()
+        for group in param_groups:
+            for param, meta in group.items():
+                for url in meta["reflects_on"]:
+                    probe_class = (self.get_url_class(url), param)
+                    if probe_class in planned:
+                        continue
+                    planned.add(probe_class)
+                    probes.append((url, param, None))
+        return probes
+
+
+    def plan_body_probes(self, forms):
+        """
+        Returns (action, param, form) probes for reflected fields and hidden
+        parameters of forms submitting request body. Parameter is checked only
+        once per action URL class and method.
+        """
+        probes = []
+        planned = set()
+        for form in forms:
+            for param in form["reflected"] + form["hidden"]["reflected"]:
+                probe_class = (
+                    self.get_url_class(form["action"]), param, form["method"]
+                )
+                if probe_class in planned:
+                    continue
+                planned.add(probe_class)
+                probes.append((form["action"], param, form))
+        return probes
+
+
+    def verify_probe(self, probe):
+        """Checks single (url, param, form) probe for XSS."""
+        url, param, form = probe
+        return self.reflects_XSS(url, param, form)
+
+
+    def get_url_class(self, url):
+        """
+        Returns URL class - file path and names of parameters in the query 
+        string (same as RequestMiner's classification of parameter sources).
+        """
+        parts = urlparse(url)
+        path_hash = ''.join(sorted(parts.path.split('/')))
+        query_hash = ''.join(sorted(list(parse_qs(parts.query).keys())))
+        return path_hash + query_hash
+
 
+    def reflects_XSS(self, url, param, form=None):
+        """
+        Check whether there is a reflected XSS in parameter on given URL. When
+        form is given, parameter is sent in the body of the submitted form.
+        
+        (1) Benign canary locates reflections and contexts they render in.
+        (2) Only characters needed to break out of these contexts are then 
+            sent, all in a single request, each wrapped in its own pair of
+            separators, to see which of them are reflected unmodified.
+        """
+        start_sep, end_sep, canary = self.craft_canary()
+        r = self.send_probe(url, param, canary, form)
+        if r is None:
+            return []
+
+        contexts = self.locate_reflection_contexts(r, url, param, start_sep, end_sep)
+        if not contexts:
+            return []
+
+        characters, probes, payload = self.craft_character_probes(
+            contexts, start_sep, end_sep
+        )
+        r = self.send_probe(url, param, payload, form)
+        if r is None:
+            return []
+
+        return self.evaluate_character_probes(
+            r, url, param, form, start_sep, end_sep, characters, probes
+        )
+
+
+    async def reflects_XSS_async(self, url, param, form=None):
+        """Asynchronous variant of reflects_XSS (same two steps)."""
+        start_sep, end_sep, canary = self.craft_canary()
+        r = await self.send_probe_async(url, param, canary, form)
+        if r is None:
+            return []
+
+        contexts = self.locate_reflection_contexts(r, url, param, start_sep, end_sep)
+        if not contexts:
+            return []
+
+        characters, probes, payload = self.craft_character_probes(
+            contexts, start_sep, end_sep
+        )
+        r = await self.send_probe_async(url, param, payload, form)
+        if r is None:
+            return []
+
+        return self.evaluate_character_probes(
+            r, url, param, form, start_sep, end_sep, characters, probes
+        )
+
+
+    def craft_canary(self):
+        """Returns (start separator, end separator, benign canary)."""
         start_sep = utils.get_rnd_string(8)
         end_sep = utils.get_rnd_string(8)
-        payload = start_sep + detector_string + end_sep 
+        return (start_sep, end_sep, start_sep + utils.get_rnd_string(8) + end_sep)
+
+
+    def locate_reflection_contexts(self, r, url, param, start_sep, end_sep):
+        """
+        Locates reflections of the canary and returns contexts they are 
+        rendered in (in the order of reflections in the page).
+        """
+        reflections = utils.find_reflections(r.text, start_sep, end_sep)
+        if not reflections:
+            self.fprint("Canary not reflected (%s, %s)" % (url, param))
+            return []
+        contexts = self.get_XSS_context(r.text, reflections)
+        return [contexts[reflection["start"]] for reflection in reflections]
+
 
-        target = self.URLHelper.update_query_string_param(url, param, payload)
+    def craft_character_probes(self, contexts, start_sep, end_sep):
+        """
+        Returns (characters, probes, payload) - characters needed to break out
+        of the contexts, (character, start, end) probes wrapping each one of
+        them in separators and the payload carrying all the probes between
+        the separators of the canary.
+        """
+        characters = self.plan_probe_characters(contexts)
+        probes = [
+            (c, utils.get_rnd_string(self.SEPARATOR_LENGTH), 
+            utils.get_rnd_string(self.SEPARATOR_LENGTH)) for c in characters
+        ]
+        payload = start_sep + ''.join([start + c + end for c, start, end in probes]) + end_sep
+        return (characters, probes, payload)
 
-        self.fprint("XSS-Checking: %s" % target)
 
+    def evaluate_character_probes(self, r, url, param, form, start_sep, end_sep,
+        characters, probes):
+        """
+        Classifies XSS in every reflection of the character probes. Probes
+        are attributed to reflections by the canary separators wrapping them
+        (never by the order of reflections in the page) and contexts of the
+        reflections are determined in this very response.
+        """
+        reflections = utils.find_reflections(r.text, start_sep, end_sep)
+        if not reflections:
+            self.fprint("Character probes not reflected (%s, %s)" % (url, param))
+            return []
+        contexts = self.get_XSS_context(r.text, reflections)
+
+        discovered = []
+        for reflection in reflections:
+            ctx = contexts[reflection["start"]]
+            reflected_characters = set([
+                c for c, start, end in probes if start + c + end in reflection["value"]
+            ])
+            protection_level = self.detect_protection_level(
+                ''.join(characters), 
+                ''.join([c for c in characters if c in reflected_characters])
+            )
+            finding = self.classify_XSS(
+                url, param, reflected_characters, ctx, protection_level,
+                method=form["method"] if form else None
+            )
+            if finding != Consts.EMPTY_OBJECT and finding not in discovered:
+                self.mprint("Parameter %s is vulnerable to XSS (confidence %s)." % (
+                    param, finding["confidence"]
+                ))
+                discovered.append(finding)
+        
+        return discovered
+
+
+    def send_probe(self, url, param, payload, form=None):
+        """
+        Sends payload in the parameter (query string one, or a field of the
+        form body). Returns response, or None when the request fails or the
+        response can not render XSS.
+        """
         try:
-            # Acquire response for given payload for further inspection.
-            r = self._retry_session().get(target)
-            sleep(self.DELAY)
+            if form:
+                fields = dict(form["fields"])
+                fields[param] = payload
+                self.fprint("XSS-Checking: %s %s (%s)" % (form["method"], url, param))
+                r = self.client.submit(form["method"], url, fields,
+                    enctype=form["enctype"], delay=self.DELAY
+                )
+            else:
+                target = self.URLHelper.update_query_string_param(url, param, payload)
+                self.fprint("XSS-Checking: %s" % target)
+                r = self.client.get(target, delay=self.DELAY)
         except requests.exceptions.RequestException as e:
-            print("Exception occurred when sending a request.")
-            print(e)
-            return []
+            self.mprint("[ERROR] Exception occurred when sending a request.")
+            self.fprint(repr(e))
+            return None
+
+        return self.check_probe_response(r, url)
+
+
+    async def send_probe_async(self, url, param, payload, form=None):
+        """Asynchronous variant of send_probe (sent by the async client)."""
+        try:
+            if form:
+                fields = dict(form["fields"])
+                fields[param] = payload
+                self.fprint("XSS-Checking: %s %s (%s)" % (form["method"], url, param))
+                r = await self.async_client.submit(form["method"], url, fields,
+                    enctype=form["enctype"], delay=self.DELAY
+                )
+            else:
+                target = self.URLHelper.update_query_string_param(url, param, payload)
+                self.fprint("XSS-Checking: %s" % target)
+                r = await self.async_client.get(target, delay=self.DELAY)
+        except requests.exceptions.RequestException as e:
+            self.mprint("[ERROR] Exception occurred when sending a request.")
+            self.fprint(repr(e))
+            return None
 
+        return self.check_probe_response(r, url)
+
+
+    def check_probe_response(self, r, url):
+        """Returns response, or None when the response can not render XSS."""
         # XSS is only possible when content around it is of text/html c-type.
-        if not r.headers['content-type'] or \
+        if not r.headers.get('content-type') or \
             not r.headers['content-type'].strip().startswith('text/html'):
             self.mprint("XSS Reflection check skipped (content-type is missing or not text/html).")
             self.mprint("(%s)" % url)
-            return []
+            return None
 
-        # Locate reflections
-        reflections = utils.find_all_between_str(r.text, start_sep, end_sep)
-        if len(reflections) > 0:
-            ref_index = 0
-            for ref in reflections:
-                protection_level = self.detect_protection_level(
-                    detector_string, ref.strip()
-                )
+        return r
 
-                # Unsanitized reflection requires no more testing.
-                if protection_level == "None":
-                    self.mprint("Parameter %s is vulnerable to XSS." % param)
-                    discovered.append(
-                        self.craft_discovered_XSS_object(url, param, "None")
-                    )
-                else:
-                    # Classify XSS based on whether sanitization was a success
-                    # or a RMS Tayleur-class failure.
-                    discovered.append(
-                        self.classify_XSS(url, r, param, ref, protection_level,
-                        start_sep, end_sep, ref_index)
-                    )
-
-                ref_index += 1
-        else:
-            # Maybe more simple payload will trigger some response.
-            self.mprint("Complex check did not trigger desired response. Trying more simple payload.")
-            try:
-                target = self.URLHelper.update_query_string_param(url, param, detector_string)
-                r = self._retry_session().get(target)
-            except requests.exceptions.RequestException:
-                self.mprint("[ERROR] Exception occurred when sending a request.")
-                self.fprint(repr(e))
-                return []
-
-            if detector_string in r.text:
-                discovered.append(
-                    self.craft_discovered_XSS_object(url, param, "None")
-                )
-        
-        return [x for x in discovered if x != Consts.EMPTY_OBJECT]
+
+    def plan_probe_characters(self, contexts):
+        """
+        Returns the minimal set of characters that needs to be tested to 
+        decide about breaking out of any of the contexts.
+        """
+        needed = set()
+        for ctx in contexts:
+            for characters, _ in self.get_breakout_characters(ctx):
+                needed.update(characters)
+        return [c for c in self.DETECTOR_STRING if c in needed]
 
 
     def detect_protection_level(self, detector_string, reflection):
@@ -172,87 +394,119 @@ class XSSFinder():
             return "OtherwiseModified"
 
 
-    def craft_discovered_XSS_object(self, url, param, protection_type, context=None):
-        """Creates discovered XSS object out of its properties."""
-        if context:
-            return {
-                "url": url,
-                "param": param,
-                "protection": protection_type,
-                "context": context
-            }
-        return {
+    def craft_discovered_XSS_object(self, url, param, protection_type, 
+        context=None, quote=None, confidence=None, method=None):
+        """
+        Creates discovered XSS object out of its properties. Method is set
+        only for parameters sent in request body.
+        """
+        discovered = {
             "url": url,
             "param": param,
             "protection": protection_type,
         }
+        if method:
+            discovered["method"] = method
+        if context:
+            discovered["context"] = context
+        if quote is not None:
+            discovered["quote"] = quote
+        if confidence is not None:
+            discovered["confidence"] = confidence
+        return discovered
 
 
-    def classify_XSS(
-        self, url, response, param, reflection,
-        protection_level, start_sep, end_sep, ref_index):
+    def classify_XSS(self, url, param, reflected, context, protection_level,
+        method=None):
         """
-        Based on the reflections and their context classifies XSS and returns
-        either vulnerable places with their type and optionally context, or
-        returns an empty object.
+        Based on the reflected characters and their context classifies XSS
+        and returns either vulnerable places with their type, context and 
+        confidence, or returns an empty object.
+
+        Confidence is the one of the most reliable breakout that is possible, 
+        raised a bit when more than one breakout is possible.
         """
-        # Get index of the n-th openinig adn n-th closing separator
-        start_index = utils.find_nth(start_sep, response.text, ref_index+1)
-        end_index = utils.find_nth(end_sep, response.text, ref_index+1)
-        
-        # Acquire boundaries immediatelly next to payload
-        lh_bound = response.text[start_index-3:start_index]
-        rh_bound = response.text[end_index+len(end_sep):end_index+len(end_sep)+3]
-        param_bound_end = param[len(param)-2:] + '='
-        
-        ctx = self.get_XSS_context(lh_bound, rh_bound, param_bound_end)
+        possible = [
+            confidence for characters, confidence 
+            in self.get_breakout_characters(context)
+            if all([c in reflected for c in characters])
+        ]
+        if not possible:
+            return Consts.EMPTY_OBJECT
 
-        if ctx == 'ATTR':
-            # We need " or ' to be reflected (to decrease false positives
-            # require both to be reflected.)
-            if "'" in reflection and '"' in reflection:
-                return self.craft_discovered_XSS_object(url, param, protection_level, context=ctx)
-        else:
-            # We need < and/or > for XSS.
-            if ">" in reflection and "<" in reflection:
-                return self.craft_discovered_XSS_object(url, param, protection_level, context=ctx)
-        
-        return Consts.EMPTY_OBJECT
+        confidence = max(possible)
+        if len(possible) > 1:
+            confidence = min(confidence + 0.1, 1.0)
+
+        return self.craft_discovered_XSS_object(
+            url, param, protection_level, context=context["context"], 
+            quote=context["quote"], confidence=round(confidence, 2),
+            method=method
+        )
 
 
-    def get_XSS_context(self, lh_bound, rh_bound, param_bound_end):
+    def get_breakout_characters(self, context):
         """
-        Determines in what context was the XSS detector payload rendered. 
+        Returns alternatives (characters, confidence) of which any one allows
+        escaping the rendering context and executing a script. Confidence
+        expresses how likely the breakout leads to script execution.
+        """
+        ctx = context["context"]
+        quote = context["quote"]
+        closing_tag = ['<', '/', '>']
+
+        if ctx == 'TAG':
+            return [(['<', '>'], 0.9)]
+        if ctx == 'RCDATA':
+            return [(closing_tag, 0.9)]
+        if ctx == 'COMMENT':
+            return [(['-', '>', '<'], 0.8)]
+        if ctx == 'INSIDE_TAG':
+            # New attribute (e.g. event handler) or a new tag.
+            return [(['/', '='], 0.6), (['>', '<'], 0.8)]
+        if ctx == 'SCRIPT':
+            return [(['(', ')'], 0.7), (closing_tag, 0.9)]
+        if ctx == 'SCRIPT_STRING':
+            # Quote might still be escaped by a backslash.
+            return [([quote], 0.7), (closing_tag, 0.9)]
+
+        # Attribute values (and CSS in style element)
+        alternatives = []
+        if quote:
+            alternatives.append(([quote], 0.9))
+        elif quote == '':
+            alternatives.append((['>', '<'], 0.8))
+        else:
+            alternatives.append((closing_tag, 0.8))
 
-        TAG context = XSS is rendered outside HTML tag attribute
-        ATTR context = XSS is rendered as a value of an HTML tag attribute
+        if ctx == 'EVENT_ATTR':
+            alternatives.append((['(', ')'], 0.6))
+        if ctx == 'URL_ATTR' and context["value_start"]:
+            # javascript: scheme
+            alternatives.append(([':', '(', ')'], 0.7))
+        return alternatives
 
-        From implementation point of view, it is always TAG context, unless
-        there is an evidence of it being rendered inside the attribute.
+
+    def get_XSS_context(self, text, reflections):
         """
-        ctx = 'TAG'
-        # Cover low-hanging attr scenarios (if not an attribute, go with body)
-        if  lh_bound[2] == '"' and rh_bound[0] == '"' or \
-            lh_bound[2] == "'" and rh_bound[0] == "'":
-            # Wrapped in quotes -> still can be just reflected search
-            if '=' in lh_bound[:2]:
-                # Decent chance we are in an attribute
-                ctx = 'ATTR'
-            if bool(re.search(r"(\s{2}|(\s[a-zA-Z]))", rh_bound[1:])):
-                # Covers all the possible 2-character sequences following 
-                # attr context.
-                ctx = 'ATTR'
-        
-        # Scenarios where while reflection is inside the attribute, it is 
-        # not enclosed in quotes/apostrophes.
-        
-        if ("'>" == rh_bound[:2] or '">' == rh_bound[:2]) and \
-            lh_bound == param_bound_end:
-            # Covers scenario when reflection is before the tag closes
-            # e.g. current URL is reflected into the page.
-            ctx = 'ATTR'            
-        
-        return ctx
+        Determines in what context were the XSS detector payloads rendered.
+        Returns dictionary of reflection offsets and their contexts (see 
+        ContextTokenizer).
+
+        Reflections are masked before the response is tokenized, so the
+        detector characters in them do not change the parse of the page.
+        """
+        masked = []
+        position = 0
+        for reflection in reflections:
+            masked.append(text[position:reflection["start"]])
+            masked.append('x' * (reflection["end"] - reflection["start"]))
+            position = reflection["end"]
+        masked.append(text[position:])
+
+        return _CT.ContextTokenizer().get_contexts(
+            ''.join(masked), [r["start"] for r in reflections]
+        )
 
 
     def get_reflected_params(self):
@@ -264,6 +518,19 @@ class XSSFinder():
         )
 
 
+    def get_reflected_forms(self):
+        """
+        Extracts forms submitting request body with any reflected field or
+        hidden parameter from RequestMiner results structure.
+        """
+        forms = self.requestminer_results["parsable"].get(
+            "body_params", {}).get("forms", [])
+        return [
+            form for form in forms 
+            if form["reflected"] or form["hidden"]["reflected"]
+        ]
+
+
     def filter_reflected_only(self, param_struct, existing=True):
         """Returns only parameter records that reflect."""
         filtered = {}
@@ -275,17 +542,24 @@ class XSSFinder():
             # Reflected parameters structure needs to be unified with 
             # existing reflected parameters structure.
             # TODO: Maybe address this in RequestMiner already?
-            for param in param_struct["reflected"]:
-                reflects_on = [
-                    self.URLHelper.add_query_string_param(
-                    param_struct["source_url"], param, "any")
-                ]
-                filtered[param] = {
-                    "sources": [],
-                    "values": [],
-                    "reflects": True,
-                    "reflects_on": reflects_on
+            endpoints = param_struct.get("endpoints") or {
+                param_struct["source_url"]: {
+                    "reflected": param_struct["reflected"]
                 }
+            }
+            for endpoint, record in endpoints.items():
+                for param in record["reflected"]:
+                    reflects_on = self.URLHelper.add_query_string_param(
+                        endpoint, param, "any")
+                    if param not in filtered:
+                        filtered[param] = {
+                            "sources": [],
+                            "values": [],
+                            "reflects": True,
+                            "reflects_on": [reflects_on]
+                        }
+                    else:
+                        filtered[param]["reflects_on"].append(reflects_on)
         
         return filtered
 
@@ -313,6 +587,14 @@ class XSSFinder():
         """Sets options for a module."""
         if "DELAY" in options:
             self.DELAY = options["DELAY"]
+        if "WORKERS" in options:
+            self.WORKERS = max(int(options["WORKERS"]), 1)
+
+
+    def set_context(self, run_context):
+        """Sets context of the run the module is executed in."""
+        self.run_context = run_context
+        self.client = run_context.client
 
 
     def get_dependencies(self):
@@ -329,25 +611,3 @@ class XSSFinder():
     def leaves_physical_artifacts(self):
         """Does the module leave artifacts phisically on filesystem?"""
         return False
-
-
-    def _retry_session(self, 
-    retries = 5, 
-    backoff_factor = 0.3, 
-    status_forcelist = (500,502,503,504),
-    session = None):
-        """
-        Gets a retry session with default parameters unless specifically
-        requested otherwise.
-        """
-        session = session or requests.Session()
-        retry = Retry(
-            total= retries, read = retries, connect = retries,
-            backoff_factor = backoff_factor, status_forcelist = status_forcelist
-        )
-
-        adapter = HTTPAdapter(max_retries = retries)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        
-        return session
\ No newline at end of file
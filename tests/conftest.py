@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+import requests
+
+# Modules import the tool's packages (core, modules) from the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import client
+from core.context import RunContext
+
+
+@pytest.fixture
+def run_context(tmp_path, monkeypatch):
+    """Run "test" working in a temporary directory, requests are not retried."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("output", "test"))
+    return RunContext("test", target="http://127.0.0.1/",
+        http_client=client.HTTPClient(delay=0, retries=0))
+
+
+@pytest.fixture
+def response():
+    """Factory of HTML responses with given body and status code."""
+    def make_response(text, status_code=200):
+        r = requests.Response()
+        r.status_code = status_code
+        r.headers = requests.structures.CaseInsensitiveDict({"Content-Type": "text/html"})
+        r._content = text.encode("utf-8")
+        r.encoding = "utf-8"
+        return r
+    return make_response
@@ -0,0 +1,54 @@
+import pytest
+
+from modules.XSSFinder.ContextTokenizer import ContextTokenizer
+
+
+def context_of(text, marker="XX"):
+    offset = text.index(marker)
+    return ContextTokenizer().get_contexts(text, [offset])[offset]
+
+
+@pytest.mark.parametrize("text, context, quote", [
+    ("<p>XX</p>", "TAG", None),
+    ("<title>XX</title>", "RCDATA", None),
+    ("<!-- XX -->", "COMMENT", None),
+    ("<div XX>", "INSIDE_TAG", None),
+    ('<input value="XX">', "ATTR", '"'),
+    ("<input value='XX'>", "ATTR", "'"),
+    ("<input value=XX>", "ATTR", ''),
+    ('<a href="XX">', "URL_ATTR", '"'),
+    ('<a onclick="XX">', "EVENT_ATTR", '"'),
+    ('<p style="XX">', "CSS", '"'),
+    ("<script>var a = XX;</script>", "SCRIPT", None),
+    ("<script>var a = 'XX';</script>", "SCRIPT_STRING", "'"),
+    ("<style>XX</style>", "CSS", None),
+])
+def test_contexts(text, context, quote):
+    found = context_of(text)
+    assert (found["context"], found["quote"]) == (context, quote)
+
+
+@pytest.mark.parametrize("text, context", [
+    # Stray '=' inside a tag.
+    ("<div class=a =b>XX</div>", "TAG"),
+    ("<div =XX>", "INSIDE_TAG"),
+    ("<a =>XX", "TAG"),
+    # Tags left open at the end of the body.
+    ("<input value=XX ", "ATTR"),
+    ("<input value=XX", "ATTR"),
+    ("<input value=a XX", "INSIDE_TAG"),
+    ('<input value="XX', "ATTR"),
+    # Unterminated comment, script and raw text.
+    ("<!-- XX", "COMMENT"),
+    ("<script>var a = 'XX", "SCRIPT_STRING"),
+    ("<textarea>XX", "RCDATA"),
+    # Lone '<' in text.
+    ("a < b XX", "TAG"),
+])
+def test_malformed_markup(text, context):
+    assert context_of(text)["context"] == context
+
+
+def test_open_tag_at_end_of_text_without_offsets_inside():
+    text = "<p>XX</p><div class=a ="
+    assert context_of(text)["context"] == "TAG"
@@ -0,0 +1,21 @@
+import pytest
+
+from core import wordlists
+from modules.MisconfChecker.HRLocator import HiddenResourcesLocator
+
+
+@pytest.fixture
+def missing_payloads(run_context, tmp_path, monkeypatch):
+    monkeypatch.setattr(wordlists, "PAYLOADS_FOLDER", str(tmp_path / "payloads"))
+    monkeypatch.setattr(wordlists, "_loaded", {})
+    return run_context
+
+
+@pytest.mark.parametrize("randomize", [True, False])
+def test_select_resources_without_payload_file(missing_payloads, randomize):
+    locator = HiddenResourcesLocator("http://127.0.0.1/", run_context=missing_payloads)
+    locator.RANDOMIZE_SELECTION = randomize
+
+    assert len(locator.resource_list) == 0
+    assert locator.select_resources() == []
+    assert not locator.is_vcs_leftover(".git/HEAD")
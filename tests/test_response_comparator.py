@@ -0,0 +1,61 @@
+import pytest
+
+from modules.RequestMiner.ResponseComparator import ResponseComparator
+
+
+STATIC_PAGE = """<html><body>
+<a href="/search?q=1">Search</a>
+<a href="/list?page=2&amp;sort=asc">Next</a>
+<p>Hello</p>
+</body></html>"""
+
+
+@pytest.fixture
+def learned(response):
+    def learned(text):
+        comparator = ResponseComparator()
+        for i in range(3):
+            comparator.learn(response(text), [("rndname%d" % i, "rndvalue%d" % i)])
+        return comparator
+    return learned
+
+
+def test_name_linked_from_static_page_is_not_anomalous(learned, response):
+    comparator = learned(STATIC_PAGE)
+    assert not comparator.is_anomalous(response(STATIC_PAGE), [("q", "xyzxyzxy")])
+    assert not comparator.is_anomalous(response(STATIC_PAGE), [("page", "xyzxyzxy")])
+    assert not comparator.is_anomalous(response(STATIC_PAGE), [("zz", "xyzxyzxy")])
+
+
+def test_reflected_name_value_pair_is_ignored(learned, response):
+    comparator = learned(STATIC_PAGE)
+    reflecting = STATIC_PAGE.replace(
+        "/search?q=1", "/search?q=1&amp;debug=canary42"
+    )
+    assert not comparator.is_anomalous(response(reflecting), [("debug", "canary42")])
+
+
+def test_changed_content_is_anomalous(learned, response):
+    comparator = learned(STATIC_PAGE)
+    changed = STATIC_PAGE.replace("<p>Hello</p>", "<p>Debug mode enabled</p>")
+    assert comparator.is_anomalous(response(changed), [("debug", "canary42")])
+    assert comparator.is_anomalous(response(STATIC_PAGE, 500), [("debug", "canary42")])
+
+
+def test_missing_lines_are_tolerated_within_noise(response):
+    comparator = ResponseComparator()
+    for i in range(3):
+        comparator.learn(response(STATIC_PAGE + "<div>ad %s</div>" % ("abc"[i] * 3)))
+    assert comparator.noise == 1
+    assert not comparator.is_anomalous(response(STATIC_PAGE))
+    assert comparator.is_anomalous(response("<html><body></body></html>"))
+
+
+def test_pattern_holds_only_reflected_values():
+    sent = [("param%d" % i, "value%04d" % i) for i in range(1000)]
+    text = STATIC_PAGE.replace("<p>Hello</p>", "<p>value0007 value0042</p>")
+    pattern = ResponseComparator().reflection_pattern(sent, text)
+    assert pattern.sub('', text).count("value") == 0
+    assert "value0007" in pattern.pattern and "value0042" in pattern.pattern
+    assert "value0008" not in pattern.pattern
+    assert ResponseComparator().reflection_pattern(sent, STATIC_PAGE) is None
@@ -0,0 +1,63 @@
+import pytest
+
+from core.runner import ModuleRunner
+
+
+class Module():
+    def __init__(self, depends_on=(), is_essential=True, fails=False):
+        self.dependencies = [
+            {"depends_on": name, "dependency_type": "output", "is_essential": is_essential}
+            for name in depends_on
+        ]
+        self.fails = fails
+
+    def get_dependencies(self):
+        return self.dependencies
+
+    def leaves_physical_artifacts(self):
+        return False
+
+    def set_options(self, options):
+        pass
+
+    def provide_results(self, results):
+        pass
+
+    def execute(self, target):
+        if self.fails:
+            raise ValueError("broken")
+        return 0
+
+    def get_results(self):
+        return {}
+
+
+class AsyncModule(Module):
+    async def execute_async(self, ctx):
+        return self.execute(ctx.target)
+
+
+@pytest.fixture
+def runner(run_context):
+    return ModuleRunner(run_context)
+
+
+def test_failed_module_does_not_stop_the_others(runner):
+    done, results, unrunnable, failed = runner.run(
+        {"Broken": Module(fails=True), "BrokenAsync": AsyncModule(fails=True),
+            "Working": Module()},
+        {"Dependent": AsyncModule(["Working"])}
+    )
+    assert sorted(done) == ["Dependent", "Working"]
+    assert sorted(failed) == ["Broken", "BrokenAsync"]
+    assert unrunnable == []
+
+
+def test_dependents_of_failed_module_are_released(runner):
+    done, results, unrunnable, failed = runner.run(
+        {"Broken": Module(fails=True)},
+        {"Essential": Module(["Broken"]),
+            "Optional": Module(["Broken"], is_essential=False)}
+    )
+    assert list(done) == ["Optional"]
+    assert sorted(failed) == ["Broken", "Essential"]
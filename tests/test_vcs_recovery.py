@@ -0,0 +1,177 @@
+import os
+import shutil
+import subprocess
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+from modules.MisconfChecker.VCSRecovery import VCSRecovery
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+FILES = {
+    "README.md": b"# Recovered\n",
+    "config/database.php": b"<?php $password = 'secret';\n",
+    "config/settings.php": b"<?php $debug = true;\n",
+    "src/app/controllers/HomeController.php": b"<?php class HomeController {}\n",
+    "src/app/controllers/UserController.php": b"<?php class UserController {}\n",
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def git(repository, *args):
+    return subprocess.run(
+        ["git", "-c", "core.symlinks=true"] + list(args), cwd=repository,
+        check=True, capture_output=True
+    ).stdout
+
+
+def encode_git_varint(value):
+    """Encodes value the way git's encode_varint() does."""
+    encoded = [value & 0x7f]
+    value >>= 7
+    while value:
+        value -= 1
+        encoded.insert(0, 0x80 | (value & 0x7f))
+        value >>= 7
+    return bytes(encoded)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = tmp_path / "site"
+    repository.mkdir()
+    git(repository, "init", "-q")
+    for path, content in FILES.items():
+        (repository / path).parent.mkdir(parents=True, exist_ok=True)
+        (repository / path).write_bytes(content)
+    os.symlink("README.md", repository / "link.md")
+    git(repository, "add", ".")
+    return repository
+
+
+@pytest.fixture
+def served(repository):
+    """Serves the working tree (including .git) over HTTP."""
+    handler = partial(QuietHandler, directory=str(repository))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%s/" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def tracked_files(repository):
+    """Returns {path: object hash} of regular files as listed by git."""
+    files = {}
+    for line in git(repository, "ls-files", "-s").decode().splitlines():
+        meta, path = line.split('\t')
+        mode, sha, _ = meta.split(' ')
+        if mode.startswith("100"):
+            files[path] = sha
+    return files
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_parse_git_index(repository, run_context, version):
+    git(repository, "update-index", "--index-version", str(version))
+    if version >= 3:
+        # Extended flags are only present in version 3+ entries.
+        git(repository, "update-index", "--skip-worktree", "config/settings.php")
+    index = (repository / ".git" / "index").read_bytes()
+    assert int.from_bytes(index[4:8], "big") == version
+
+    entries = VCSRecovery("", run_context=run_context).parse_git_index(index)
+
+    assert dict(entries) == tracked_files(repository)
+    assert sorted(path for path, _ in entries) == sorted(FILES)
+
+
+def test_parse_git_index_refuses_unknown_format(run_context):
+    with pytest.raises(ValueError):
+        VCSRecovery("", run_context=run_context).parse_git_index(
+            b"DIRC" + (5).to_bytes(4, "big") + (0).to_bytes(4, "big")
+        )
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 129, 255, 16511, 16512, 2 ** 32])
+def test_decode_git_varint(run_context, value):
+    data = b"\xaa" + encode_git_varint(value) + b"\xbb"
+    decoded, position = VCSRecovery("", run_context=run_context).decode_git_varint(data, 1)
+    assert decoded == value
+    assert data[position:] == b"\xbb"
+
+
+def test_decode_git_varint_known_encodings(run_context):
+    recovery = VCSRecovery("", run_context=run_context)
+    assert recovery.decode_git_varint(b"\x80\x00", 0) == (128, 2)
+    assert recovery.decode_git_varint(b"\x80\x7f", 0) == (255, 2)
+    assert recovery.decode_git_varint(b"\xff\x7f", 0) == (16511, 2)
+
+
+def test_fetch_git_object_size_limit(repository, served, run_context):
+    (repository / "exact.txt").write_bytes(b"a" * 100)
+    (repository / "over.txt").write_bytes(b"a" * 101)
+    (repository / "huge.bin").write_bytes(b"\0" * 8 * 1048576)
+    git(repository, "add", "exact.txt", "over.txt", "huge.bin")
+    files = tracked_files(repository)
+
+    recovery = VCSRecovery(served, run_context.client, run_context)
+    recovery.DELAY = 0
+    recovery.MAX_FILE_SIZE = 100
+    fetch = partial(recovery.fetch_git_object, served + ".git/")
+
+    assert fetch(files["exact.txt"]) == b"a" * 100
+    assert fetch(files["over.txt"]) is None
+    assert fetch(files["huge.bin"]) is None
+    assert fetch("0" * 40) is None
+
+
+def test_fetch_git_object_skips_non_blobs(repository, served, run_context):
+    tree = git(repository, "write-tree").decode().strip()
+    recovery = VCSRecovery(served, run_context.client, run_context)
+    recovery.DELAY = 0
+    assert recovery.fetch_git_object(served + ".git/", tree) is None
+
+
+@pytest.mark.parametrize("path", [
+    "../escape.txt", "a/../../escape.txt", "a/b/../../../escape.txt",
+    "..\\escape.txt", "C:\\Windows\\win.ini", "", "./",
+])
+def test_local_path_refuses_traversal(run_context, path):
+    recovery = VCSRecovery("", run_context=run_context)
+    assert recovery.local_path(os.path.join("output", "repo"), path) is None
+
+
+@pytest.mark.parametrize("path", ["a.txt", "/etc/passwd", "a/./b/c.txt", "a\\b.txt"])
+def test_local_path_stays_in_repository_dir(run_context, path):
+    recovery = VCSRecovery("", run_context=run_context)
+    repository_dir = os.path.abspath(os.path.join("output", "repo"))
+    local_path = recovery.local_path(repository_dir, path)
+    assert os.path.commonpath([repository_dir, local_path]) == repository_dir
+
+
+def test_recover_git_repository(repository, served, run_context):
+    recovery = VCSRecovery(served, run_context.client, run_context)
+    recovery.DELAY = 0
+    recovery.WORKERS = 2
+
+    repositories, recovered_files = recovery.recover([served + ".git/HEAD"])
+
+    assert len(repositories) == 1
+    assert repositories[0]["vcs"] == "git"
+    assert repositories[0]["tracked_files"] == len(FILES)
+    assert repositories[0]["recovered_files"] == len(FILES)
+    for recovered_file in recovered_files:
+        path = recovered_file["url"][len(served):]
+        with open(recovered_file["path"], 'rb') as f:
+            assert f.read() == FILES[path]
@@ -0,0 +1,55 @@
+import pytest
+
+from modules.XSSFinder.XSSFinder import XSSFinder
+
+
+START, END = "StArTs", "EnDsEp"
+PROBES = [("<", "aaaaaa", "bbbbbb"), (">", "cccccc", "dddddd")]
+
+
+def reflection(lt="<", gt=">"):
+    return START + "aaaaaa" + lt + "bbbbbb" + "cccccc" + gt + "dddddd" + END
+
+
+@pytest.fixture
+def finder(run_context):
+    finder = XSSFinder()
+    finder.set_context(run_context)
+    return finder
+
+
+@pytest.fixture
+def evaluate(finder, response):
+    def evaluate(text):
+        return finder.evaluate_character_probes(
+            response(text), "http://target/", "q", None, START, END, ["<", ">"], PROBES
+        )
+    return evaluate
+
+
+def test_probes_are_attributed_by_separators(evaluate):
+    # Encoded reflection in an attribute precedes the raw one in the text.
+    text = '<input value="%s"><div>%s</div>' % (
+        reflection("&lt;", "&gt;"), reflection()
+    )
+    found = evaluate(text)
+    assert [(f["context"], f["protection"]) for f in found] == [("TAG", "None")]
+
+
+def test_truncated_reflection_is_not_merged_with_the_next_one(evaluate):
+    truncated = reflection("&lt;", "&gt;")[:len(START) + 10]
+    text = '<input value="%s"><div>%s</div>' % (truncated, reflection())
+    found = evaluate(text)
+    assert [f["context"] for f in found] == ["TAG"]
+
+
+def test_unreflected_probes_find_nothing(evaluate):
+    assert evaluate("<div>nothing</div>") == []
+
+
+def test_reflection_in_malformed_page(finder, response):
+    text = '<div class=a =b><input value=%s ' % (START + "canary" + END)
+    contexts = finder.locate_reflection_contexts(
+        response(text), "http://target/", "q", START, END
+    )
+    assert [c["context"] for c in contexts] == ["ATTR"]